@@ -0,0 +1,92 @@
+"""Overhead of the admission-control layer: bare check() calls and whole /suggestions requests.
+
+    python -m benchmarks.admission
+
+check() is timed with the memory and SQLite bucket stores, for one hot client and
+for many distinct clients, single-threaded and from several threads at once. The
+request timings compare the same in-process Flask request with admission off,
+with memory buckets and with SQLite buckets.
+"""
+import argparse
+import tempfile
+import threading
+import time
+import timeit
+
+from .common import import_app, save_results
+
+
+def bench(func, number, repeat=5):
+    """Best-of-repeat time per call in microseconds."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def threaded(func, threads, number):
+    """Wall-clock microseconds per call with threads calling func number times each."""
+    barrier = threading.Barrier(threads + 1)
+
+    def run():
+        barrier.wait()
+        for _ in range(number):
+            func()
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) / (threads * number) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=5000, help="calls per timing run")
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--output', default='admission')
+    args = parser.parse_args()
+
+    app = import_app({'SESSION_BACKEND': 'memory'})
+    from api.admission import DEFAULT_LIMITS, AdmissionControl, Limit, create_bucket_store
+
+    # Generous limits so every call takes the admitted path, the common case
+    limits = {route: Limit(1e9, 1e9) for route in DEFAULT_LIMITS}
+    stores = {
+        'memory': create_bucket_store('memory'),
+        'sqlite': create_bucket_store('sqlite', path=tempfile.mktemp(suffix='.sqlite3')),
+    }
+    results = {'config': vars(args), 'check_us': {}, 'request_us': {}}
+    for backend, store in stores.items():
+        admission = AdmissionControl(store, limits)
+        counter = iter(range(10 ** 9))
+        cases = {
+            'one client': lambda: admission.check('/suggestions', 'client'),
+            'distinct clients': lambda: admission.check('/suggestions', f"client{next(counter) % 10000}"),
+        }
+        for name, func in cases.items():
+            key = f"{backend}, {name}"
+            results['check_us'][key] = bench(func, args.number)
+            results['check_us'][f"{key}, {args.threads} threads"] = threaded(func, args.threads, args.number // 4)
+
+    client = app.app.test_client()
+    client.get('/suggestions?prefix=nor')  # fill the response cache, so the request itself is cheap
+    admissions = {'off': None}
+    for backend, store in stores.items():
+        admissions[backend] = AdmissionControl(store, limits)
+    # Interleaved, so drift over the run does not favour whichever variant goes first
+    timings = {name: [] for name in admissions}
+    for _ in range(5):
+        for name, admission in admissions.items():
+            app.ADMISSION = admission
+            timings[name].append(bench(lambda: client.get('/suggestions?prefix=nor'), args.number // 5, repeat=1))
+    for name, values in timings.items():
+        results['request_us'][f"/suggestions, admission {name}"] = min(values)
+
+    for section in ('check_us', 'request_us'):
+        for name, value in results[section].items():
+            print(f"{name:<44} {value:>10.2f} us/call")
+    print(f"Results written to {save_results(args.output, results)}")
+
+
+if __name__ == '__main__':
+    main()
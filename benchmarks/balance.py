@@ -0,0 +1,196 @@
+"""Offline solver simulation: how many guesses each target takes with the current hints.
+
+    python -m benchmarks.balance --strategies random greedy elimination --workers 8
+
+Plays every (target, starting guess) pair of the playable countries with each
+strategy, against the same GeoEngine tables /guess reads. After every wrong guess
+a strategy sees only what a player sees: the 8-way direction and the distance
+rounded to whole km. Strategies:
+
+- random: any country not guessed yet.
+- greedy: dead reckoning from the last hint. It travels the hinted distance in
+  the hinted direction and guesses the unguessed country nearest to that point.
+- elimination: keeps the countries that are consistent with every hint so far
+  (same direction and same rounded distance from each guess) and guesses one of them.
+
+All games of one target are played together, one row per starting guess, so
+candidate filtering is a few array operations per turn. Targets are spread
+over a ProcessPoolExecutor. The report has a guess-count distribution per target
+and overall, and the runtime of every strategy.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .common import SRC_DIR, import_app, percentile, save_results
+
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+from game.geo import DIRECTIONS, EARTH_RADIUS_KM, GeoEngine  # noqa: E402
+
+# What a strategy knows before its next guess, one row per game still running
+Turn = namedtuple('Turn', ['guess', 'cardinal', 'distance', 'guessed', 'candidates'])
+
+_GEO = None  # GeoEngine of a worker process, built by _init_worker
+
+
+def random_guess(geo, turn, rng):
+    """Any country not guessed yet."""
+    # Rejection sampling: a draw per game instead of a random score per country, over ~N turns.
+    # Games with most countries guessed would need many draws; they get an exact pick instead.
+    games = np.arange(len(turn.guess))
+    choice = rng.integers(len(geo), size=len(games))
+    retry = np.flatnonzero(turn.guessed[games, choice])
+    for _ in range(3):
+        if not retry.size:
+            return choice
+        choice[retry] = rng.integers(len(geo), size=retry.size)
+        retry = retry[turn.guessed[retry, choice[retry]]]
+    if retry.size:
+        choice[retry] = _pick(~turn.guessed[retry], rng)
+    return choice
+
+
+def greedy_guess(geo, turn, rng):
+    """Unguessed country nearest to the point the last hint points at."""
+    phi = np.radians(geo.lat[turn.guess])
+    lam = np.radians(geo.lon[turn.guess])
+    theta = np.radians(turn.cardinal * (360 / len(DIRECTIONS)))
+    delta = turn.distance / EARTH_RADIUS_KM
+    lat = np.arcsin(np.sin(phi) * np.cos(delta) + np.cos(phi) * np.sin(delta) * np.cos(theta))
+    lon = lam + np.arctan2(np.sin(theta) * np.sin(delta) * np.cos(phi), np.cos(delta) - np.sin(phi) * np.sin(lat))
+    # Haversine from every aim point to every country (monotonic in the distance, so no arctan)
+    a = (np.sin((np.radians(geo.lat) - lat[:, None]) / 2)**2
+         + np.cos(lat[:, None]) * np.cos(np.radians(geo.lat)) * np.sin((np.radians(geo.lon) - lon[:, None]) / 2)**2)
+    a[turn.guessed] = np.inf
+    return a.argmin(axis=1)
+
+
+def elimination_guess(geo, turn, rng):
+    """Any country consistent with every hint so far."""
+    return _pick(turn.candidates, rng)
+
+
+def _pick(mask, rng):
+    # Uniform choice of one True column per row
+    scores = rng.random(mask.shape)
+    scores[~mask] = -1.0
+    return scores.argmax(axis=1)
+
+
+STRATEGIES = {
+    'random': random_guess,
+    'greedy': greedy_guess,
+    'elimination': elimination_guess,
+}
+
+
+def play(geo, strategy, target, starts, rng):
+    """Guess counts of strategy against target, one game per starting guess (that is guess 1).
+
+    Strategies must return unguessed countries, so every game ends within len(geo) guesses.
+    """
+    starts = np.asarray(starts, dtype=np.intp)
+    guesses = np.ones(len(starts), dtype=np.int32)
+    games = np.flatnonzero(starts != target)  # games still running; the arrays below have a row for each
+    last = starts[games]
+    guessed = np.zeros((len(games), len(geo)), dtype=bool)
+    candidates = np.ones((len(games), len(geo)), dtype=bool)
+    while len(games):
+        guessed[np.arange(len(games)), last] = True
+        cardinal = geo.cardinals[last, target]
+        distance = np.round(geo.distances[last, target])
+        # The guess itself reads as CORRECT from itself, so it drops out of the candidates here
+        candidates &= ((geo.cardinals[last] == cardinal[:, None])
+                       & (np.abs(geo.distances[last] - distance[:, None]) <= 0.5))
+        guess = strategy(geo, Turn(last, cardinal, distance, guessed, candidates), rng)
+        guesses[games] += 1
+        running = guess != target
+        if running.all():
+            last = guess
+        else:
+            games, last, guessed, candidates = games[running], guess[running], guessed[running], candidates[running]
+    return guesses
+
+
+def simulate_target(geo, strategy, target, seed=0):
+    """Guess counts against target from every starting guess, reproducible for (seed, target)."""
+    return play(geo, STRATEGIES[strategy], target, np.arange(len(geo)), np.random.default_rng([seed, target]))
+
+
+def _init_worker(names, lat, lon):
+    global _GEO
+    _GEO = GeoEngine({name: (la, lo) for name, la, lo in zip(names, lat, lon)}, names=names)
+
+
+def _simulate_in_worker(strategy, target, seed):
+    return simulate_target(_GEO, strategy, target, seed)
+
+
+def simulate(geo, strategy, seed=0, workers=None):
+    """(N x N guess counts, [target, start], seconds) for every pair. workers=1 plays in this process."""
+    start = time.perf_counter()
+    targets = range(len(geo))
+    if workers == 1:
+        rows = [simulate_target(geo, strategy, target, seed) for target in targets]
+    else:
+        # Workers rebuild the tables from the coordinates instead of unpickling N x N arrays
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(geo.names, geo.lat.tolist(), geo.lon.tolist())) as pool:
+            rows = list(pool.map(_simulate_in_worker, [strategy] * len(geo), targets, [seed] * len(geo),
+                                 chunksize=max(1, len(geo) // (4 * (workers or os.cpu_count() or 1)))))
+    return np.vstack(rows), time.perf_counter() - start
+
+
+def distribution(counts):
+    """Summary of guess counts; histogram[i] is the number of games won with guess i + 1."""
+    values = np.sort(counts, axis=None).tolist()
+    return {
+        'mean': float(np.mean(values)),
+        'p50': percentile(values, 50),
+        'p90': percentile(values, 90),
+        'max': values[-1],
+        'histogram': np.bincount(counts.ravel())[1:].tolist(),
+    }
+
+
+def report(geo, counts, seconds, workers):
+    overall = distribution(counts)
+    per_target = {geo.names[target]: distribution(row) for target, row in enumerate(counts)}
+    hardest = sorted(per_target, key=lambda name: per_target[name]['mean'], reverse=True)[:10]
+    return dict(overall, games=int(counts.size), seconds=seconds, games_per_s=counts.size / seconds,
+                workers=workers, hardest=hardest, targets=per_target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--strategies', nargs='+', choices=list(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="processes (1 plays in this one)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='balance')
+    args = parser.parse_args()
+
+    app = import_app({'SESSION_DB_PATH': tempfile.mktemp(suffix='.sqlite3'), 'DATA_WATCH_INTERVAL': '0'})
+    geo = app.DATA.current.geo
+    results = {'config': vars(args), 'countries': len(geo), 'strategies': {}}
+    for strategy in args.strategies:
+        counts, seconds = simulate(geo, strategy, args.seed, args.workers)
+        results['strategies'][strategy] = report(geo, counts, seconds, args.workers)
+
+    print(f"{len(geo)} targets x {len(geo)} starting guesses, {args.workers} workers")
+    print(f"{'strategy':<12} {'mean':>6} {'p50':>4} {'p90':>4} {'max':>4} {'seconds':>8} {'games/s':>9}  "
+          f"hardest targets")
+    for strategy, result in results['strategies'].items():
+        print(f"{strategy:<12} {result['mean']:>6.2f} {result['p50']:>4} {result['p90']:>4} {result['max']:>4} "
+              f"{result['seconds']:>8.2f} {result['games_per_s']:>9.0f}  {', '.join(result['hardest'][:3])}")
+    print(f"Results written to {save_results(args.output, results)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Shared helpers for the benchmark scripts: latency stats, local servers and HTTP sessions."""
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from http.cookiejar import CookieJar
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+RESULTS_DIR = os.path.join(ROOT_DIR, 'benchmarks', 'results')
+
+
+# Environment for benchmark runs: offline hints, and no rate limits since every client shares one IP
+BENCH_ENV = {
+    'HINT_PROVIDER': 'stub',
+    'HINT_STUB_DELAY': '0.05',
+    'HINT_WARM_AHEAD': '0',
+    'ADMISSION': '0',
+}
+
+
+def import_app(env=None):
+    """Import src/app.py in-process (as the 'app' module, like gunicorn --pythonpath src)."""
+    for key, value in dict(BENCH_ENV, **(env or {})).items():
+        os.environ.setdefault(key, value)
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    import app
+    return app
+
+
+def percentile(sorted_values, q):
+    """q-th percentile (0-100) of an already sorted list, nearest-rank."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies, elapsed):
+    """Throughput and latency percentiles (ms) for a list of per-request latencies in seconds."""
+    values = sorted(latencies)
+    return {
+        'count': len(values),
+        'throughput_rps': len(values) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(values, 50) * 1000,
+        'p95_ms': percentile(values, 95) * 1000,
+        'p99_ms': percentile(values, 99) * 1000,
+        'max_ms': (values[-1] if values else 0.0) * 1000,
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def running_server(command, port, env=None, timeout=60):
+    """Start a server process from the repo root and wait until it answers on port."""
+    with server_process(command, port, env, timeout) as (_, url):
+        yield url
+
+
+@contextmanager
+def server_process(command, port, env=None, timeout=60):
+    """Like running_server, but yields (Popen, url) for callers that need the process."""
+    process = subprocess.Popen(command, cwd=ROOT_DIR, env=dict(os.environ, **(env or {})),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + timeout
+        while True:
+            try:
+                urllib.request.urlopen(f"{url}/suggestions?prefix=a", timeout=1).read()
+                break
+            except (urllib.error.URLError, ConnectionError, OSError):
+                if process.poll() is not None or time.time() > deadline:
+                    raise RuntimeError(f"Server did not start: {' '.join(command)}")
+                time.sleep(0.2)
+        yield process, url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+class HttpSession:
+    """Cookie-keeping HTTP client that times each request."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    def request(self, method, path, payload=None):
+        """Returns (status, body bytes, seconds)."""
+        data = None if payload is None else json.dumps(payload).encode()
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'} if data else {})
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=60) as response:
+                body, status = response.read(), response.status
+        except urllib.error.HTTPError as e:
+            body, status = e.read(), e.code
+        return status, body, time.perf_counter() - start
+
+
+def save_results(name, results):
+    """Write results as JSON to benchmarks/results/<name>.json and return the path."""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{name}.json")
+    results = dict(results, python=sys.version.split()[0], timestamp=time.strftime('%Y-%m-%dT%H:%M:%S'))
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    return path
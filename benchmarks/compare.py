@@ -0,0 +1,58 @@
+"""Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/new.json --threshold 10
+
+Compares every latency-like number (keys ending in _ms or _us, and the values
+under micro_us) present in both files. Exits with status 1 if any of them got
+slower by more than --threshold percent.
+"""
+import argparse
+import json
+import sys
+
+
+def flatten(results, prefix=''):
+    """{'a.b.p50_ms': value} for every latency metric in a nested result dict."""
+    metrics = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, f"{path}."))
+        elif isinstance(value, (int, float)) and (key.endswith(('_ms', '_us')) or prefix.endswith('micro_us.')):
+            metrics[path] = float(value)
+    return metrics
+
+
+def compare(base, new, threshold):
+    """[(metric, base, new, change_percent, regressed)] for metrics present in both runs."""
+    base_metrics, new_metrics = flatten(base), flatten(new)
+    rows = []
+    for metric in sorted(set(base_metrics) & set(new_metrics)):
+        before, after = base_metrics[metric], new_metrics[metric]
+        change = (after - before) / before * 100 if before else 0.0
+        rows.append((metric, before, after, change, change > threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10.0, help="allowed slowdown in percent")
+    args = parser.parse_args()
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    rows = compare(base, new, args.threshold)
+    for metric, before, after, change, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{metric:<60} {before:>10.2f} -> {after:>10.2f} {change:>+7.1f}% {flag}")
+    regressions = sum(1 for row in rows if row[4])
+    print(f"{len(rows)} metrics compared, {regressions} regressed by more than {args.threshold:.0f}%")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
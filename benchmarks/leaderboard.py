@@ -0,0 +1,100 @@
+"""Leaderboard operations with a million synthetic players.
+
+    python -m benchmarks.leaderboard --players 1000000
+
+Every player gets a random all-time, weekly and daily score, written straight
+into a fresh SQLite store. The benchmark times loading that store, score updates
+(record_win: one SQLite transaction, then all three boards), "my rank" queries
+and top-50 reads. A sorted-list baseline (bisect.insort on one flat list) is
+timed for comparison.
+"""
+import argparse
+import bisect
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import timeit
+
+from .common import SRC_DIR, save_results
+
+
+def bench(func, number, repeat=3):
+    """Best-of-repeat time per call in microseconds."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def synthetic(path, players, rng):
+    """Write players with a random score on every board to a new leaderboard store; returns the player ids."""
+    from game.leaderboard import PERIODS, SCHEMA, period_key
+    now = time.time()
+    ids = [f"player{i:07d}" for i in range(players)]
+    conn = sqlite3.connect(path)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    for n, (period, scale) in enumerate(zip(PERIODS, (100, 700, 30000))):
+        key = period_key(period, now)
+        conn.executemany("INSERT INTO scores VALUES (?, ?, ?, ?, ?)",
+                         ((period, key, player, rng.randrange(scale) * 10, n * players + i)
+                          for i, player in enumerate(ids, 1)))
+    conn.execute("UPDATE leaderboard_seq SET value = ?", (len(PERIODS) * players,))
+    conn.commit()
+    conn.close()
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, default=1000000)
+    parser.add_argument('--number', type=int, default=20000, help="operations per timing run")
+    parser.add_argument('--output', default='leaderboard')
+    args = parser.parse_args()
+
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    from game.leaderboard import SEQ_BITS, Leaderboard
+
+    rng = random.Random(0)
+    path = os.path.join(tempfile.mkdtemp(), 'leaderboard.sqlite3')
+    ids = synthetic(path, args.players, rng)
+    results = {'config': vars(args), 'store_mb': os.path.getsize(path) / 1e6, 'ops_us': {}}
+    start = time.perf_counter()
+    leaderboard = Leaderboard(path)
+    results['load_s'] = time.perf_counter() - start
+
+    def next_player():
+        return ids[rng.randrange(len(ids))]
+
+    results['ops_us'] = {
+        'record_win (3 boards)': bench(lambda: leaderboard.record_win(next_player(), rng.randint(1, 8)), args.number),
+        'rank (alltime)': bench(lambda: leaderboard.rank('alltime', next_player()), args.number),
+        'top 50 (alltime)': bench(lambda: leaderboard.top('alltime', 50), args.number // 10),
+    }
+
+    baseline = sorted(leaderboard.boards['alltime'].keys.values())
+
+    def flat_update():
+        # Same work on one plain sorted list: delete a key and insert the new one (O(n) memmove)
+        i = rng.randrange(len(baseline))
+        value = baseline.pop(i)
+        bisect.insort(baseline, value - (10 << SEQ_BITS))
+    results['ops_us']['baseline: flat sorted list update'] = bench(flat_update, args.number // 10)
+
+    start = time.perf_counter()
+    restored = Leaderboard(path)
+    results['reload_s'] = time.perf_counter() - start
+    assert restored.top('alltime', 50) == leaderboard.top('alltime', 50)
+    shutil.rmtree(os.path.dirname(path))
+
+    print(f"{args.players:,} players, {results['store_mb']:.1f} MB store, loaded in {results['load_s']:.2f} s")
+    for name, value in results['ops_us'].items():
+        print(f"{name:<40} {value:>10.2f} us/op")
+    print(f"reload after the updates: {results['reload_s']:.2f} s")
+    print(f"Results written to {save_results(args.output, results)}")
+
+
+if __name__ == '__main__':
+    main()
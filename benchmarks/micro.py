@@ -0,0 +1,68 @@
+"""Microbenchmarks for the hot helpers behind /start_game, /suggestions and /guess.
+
+    python -m benchmarks.micro
+"""
+import argparse
+import random
+import tempfile
+import timeit
+
+from .common import import_app, save_results
+
+
+def bench(func, number, repeat=5):
+    """Best-of-repeat time per call in microseconds."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=2000, help="calls per timing run")
+    parser.add_argument('--output', default='micro')
+    args = parser.parse_args()
+
+    app = import_app({'SESSION_DB_PATH': tempfile.mktemp(suffix='.sqlite3')})
+    from game.geo import get_bearing, get_cardinal, haversine_distance
+
+    rng = random.Random(0)
+    countries = app.get_available_countries()
+    prefixes = [name[:rng.randint(1, 4)] for name in rng.sample(countries, 50)]
+    typos = [name[:3] + name[4:] for name in rng.sample(countries, 50) if len(name) > 5]
+    geo = app.DATA.current.geo
+    pairs = [(rng.randrange(len(geo)), rng.randrange(len(geo))) for _ in range(256)]
+    coords = [(geo.coordinates(a), geo.coordinates(b)) for a, b in pairs]
+    batch = [a for a, _ in pairs[:16]]
+
+    def cycle(items):
+        state = {'i': 0}
+
+        def next_item():
+            state['i'] = (state['i'] + 1) % len(items)
+            return items[state['i']]
+        return next_item
+
+    next_prefix, next_typo, next_pair, next_coords = cycle(prefixes), cycle(typos), cycle(pairs), cycle(coords)
+    index = app.DATA.current.suggestions
+
+    def scalar_guess():
+        c1, c2 = next_coords()
+        return get_cardinal(get_bearing(c1, c2)), haversine_distance(c1, c2)
+
+    cases = {
+        'get_random_country_energy': lambda: app.get_random_country_energy(),
+        'get_country_suggestions (cached)': lambda: app.get_country_suggestions(next_prefix()),
+        'suggestions prefix (uncached)': lambda: index._suggest(next_prefix()),
+        'suggestions fuzzy (uncached)': lambda: index._suggest(next_typo()),
+        'get_direction_hint': lambda: app.get_direction_hint(*next_pair()),
+        'scalar bearing+haversine': scalar_guess,
+        'GeoEngine.score (16 guesses)': lambda: geo.score(batch, 0),
+    }
+    results = {'config': vars(args), 'micro_us': {}}
+    for name, func in cases.items():
+        results['micro_us'][name] = bench(func, args.number)
+        print(f"{name:<36} {results['micro_us'][name]:>10.2f} us/call")
+    print(f"Results written to {save_results(args.output, results)}")
+
+
+if __name__ == '__main__':
+    main()
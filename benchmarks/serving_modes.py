@@ -0,0 +1,94 @@
+"""Compare the sync gunicorn deployment with the async (ASGI) serving mode.
+
+Both servers run with the stub hint provider, which makes every /hint take
+--hint-delay seconds. Some clients keep requesting hints while others send
+/suggestions keystrokes. The report shows how /suggestions latency holds up in
+each mode.
+
+    python -m benchmarks.serving_modes --workers 2 --duration 20
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+
+from .common import HttpSession, free_port, running_server, save_results, summarize
+
+PREFIXES = ['a', 'ge', 'nor', 'un', 'sw', 'ch', 'in', 'b', 'ma', 'ca']
+
+
+def server_command(mode, port, workers):
+    if mode == 'sync':
+        return ['gunicorn', '--pythonpath', 'src', '-w', str(workers), '-b', f'127.0.0.1:{port}', 'src.app:app']
+    return ['uvicorn', '--app-dir', 'src', '--workers', str(workers), '--port', str(port),
+            '--no-access-log', 'asgi:app']
+
+
+def run_load(url, duration, hint_clients, suggestion_clients):
+    latencies = {'/hint': [], '/suggestions': []}
+    lock = threading.Lock()
+    stop = time.time() + duration
+
+    def hint_client():
+        session = HttpSession(url)
+        while time.time() < stop:
+            session.request('GET', '/start_game')
+            _, _, seconds = session.request('GET', '/hint')
+            with lock:
+                latencies['/hint'].append(seconds)
+
+    def suggestion_client():
+        session = HttpSession(url)
+        while time.time() < stop:
+            _, _, seconds = session.request('GET', f'/suggestions?prefix={random.choice(PREFIXES)}')
+            with lock:
+                latencies['/suggestions'].append(seconds)
+
+    threads = [threading.Thread(target=hint_client) for _ in range(hint_clients)]
+    threads += [threading.Thread(target=suggestion_client) for _ in range(suggestion_clients)]
+    start = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - start
+    return {path: summarize(values, elapsed) for path, values in latencies.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--hint-clients', type=int, default=4)
+    parser.add_argument('--suggestion-clients', type=int, default=4)
+    parser.add_argument('--hint-delay', type=float, default=1.0)
+    parser.add_argument('--modes', default='sync,async')
+    parser.add_argument('--output', default='serving_modes')
+    args = parser.parse_args()
+
+    env = {
+        'HINT_PROVIDER': 'stub',
+        'HINT_STUB_DELAY': str(args.hint_delay),
+        'HINT_BUDGET': str(args.hint_delay * 10),
+        'HINT_TTL': '0',  # every hint is a cache miss, i.e. a slow upstream call
+        'HINT_WARM_AHEAD': '0',
+        'SESSION_DB_PATH': tempfile.mktemp(suffix='.sqlite3'),
+        'ADMISSION': '0',  # measures the serving modes, not the rate limits
+    }
+    results = {'config': vars(args), 'modes': {}}
+    for mode in args.modes.split(','):
+        port = free_port()
+        with running_server(server_command(mode, port, args.workers), port, env) as url:
+            results['modes'][mode] = run_load(url, args.duration, args.hint_clients, args.suggestion_clients)
+
+    print(f"{'mode':<6} {'endpoint':<13} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for mode, endpoints in results['modes'].items():
+        for path, stats in endpoints.items():
+            print(f"{mode:<6} {path:<13} {stats['throughput_rps']:>8.1f} {stats['p50_ms']:>9.1f} "
+                  f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+    print(f"Results written to {save_results(args.output, results)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Replay realistic game sessions against the API and report per-endpoint latency.
+
+A session is /start_game, then for each guess a few keystroke-driven
+/suggestions calls followed by /guess, with an occasional /hint (stub provider).
+Sessions run either in-process through Flask's test client or over HTTP against
+a locally launched gunicorn.
+
+    python -m benchmarks.sessions --target client --sessions 300
+    python -m benchmarks.sessions --target gunicorn --workers 2 --concurrency 8
+"""
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import quote
+
+from .common import BENCH_ENV, HttpSession, free_port, import_app, running_server, save_results, summarize
+
+
+class TestClientTransport:
+    """Same interface as HttpSession, backed by the Flask test client."""
+
+    def __init__(self, flask_app):
+        self.client = flask_app.test_client()
+
+    def request(self, method, path, payload=None):
+        start = time.perf_counter()
+        response = self.client.open(path, method=method, json=payload)
+        return response.status_code, response.data, time.perf_counter() - start
+
+
+def play_session(transport, countries, rng, record, hint_probability=0.3, max_guesses=6):
+    """Play one game, calling record(endpoint, status, seconds) for each request."""
+    def call(method, path, payload=None):
+        status, body, seconds = transport.request(method, path, payload)
+        record(path.split('?')[0], status, seconds)
+        return body
+
+    call('GET', '/start_game')
+    target = None
+    for attempt in range(rng.randint(2, max_guesses)):
+        # Last guess of a session is sometimes the target, once a response revealed it
+        name = target if target and attempt and rng.random() < 0.3 else rng.choice(countries)
+        for length in range(1, min(len(name), rng.randint(2, 5)) + 1):
+            call('GET', f'/suggestions?prefix={quote(name[:length])}')
+        if rng.random() < hint_probability:
+            call('GET', '/hint')
+        body = json.loads(call('POST', '/guess', {'guess': name}))
+        target = body.get('target', target)
+        if body.get('game_over'):
+            break
+
+
+def run_sessions(make_transport, countries, sessions, concurrency, seed):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    remaining = [sessions]
+
+    def record(endpoint, status, seconds):
+        with lock:
+            latencies[endpoint].append(seconds)
+            if status >= 500:
+                errors[endpoint] += 1
+
+    def worker(worker_id):
+        rng = random.Random(seed + worker_id)
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            play_session(make_transport(), countries, rng, record)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    all_latencies = [s for values in latencies.values() for s in values]
+    return {
+        'elapsed_s': elapsed,
+        'sessions_per_s': sessions / elapsed,
+        'overall': summarize(all_latencies, elapsed),
+        'endpoints': {endpoint: dict(summarize(values, elapsed), server_errors=errors[endpoint])
+                      for endpoint, values in sorted(latencies.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', choices=['client', 'gunicorn'], default='client')
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn workers")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help="results name (default: sessions_<target>)")
+    args = parser.parse_args()
+
+    env = {'SESSION_DB_PATH': tempfile.mktemp(suffix='.sqlite3')}
+    app = import_app(env)
+    countries = app.get_available_countries()
+    if args.target == 'client':
+        results = run_sessions(lambda: TestClientTransport(app.app), countries,
+                               args.sessions, args.concurrency, args.seed)
+    else:
+        port = free_port()
+        command = ['gunicorn', '--pythonpath', 'src', '-w', str(args.workers), '-b', f'127.0.0.1:{port}', 'src.app:app']
+        with running_server(command, port, dict(BENCH_ENV, **env)) as url:
+            results = run_sessions(lambda: HttpSession(url), countries,
+                                   args.sessions, args.concurrency, args.seed)
+    results['config'] = vars(args)
+
+    print(f"{args.sessions} sessions in {results['elapsed_s']:.2f} s ({results['sessions_per_s']:.1f} sessions/s)")
+    print(f"{'endpoint':<14} {'count':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for endpoint, stats in results['endpoints'].items():
+        print(f"{endpoint:<14} {stats['count']:>7} {stats['throughput_rps']:>9.1f} {stats['p50_ms']:>8.2f} "
+              f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+    print(f"Results written to {save_results(args.output or f'sessions_{args.target}', results)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Import-time profile and cold start of the app.
+
+    python -m benchmarks.startup --top 25
+
+Runs `python -X importtime -c "import app"` in a fresh interpreter and reports
+what every imported module costs: its own time, and its cumulative time with
+everything it imports in turn. Module times are also summed per top-level
+package, so a heavy dependency shows up as one line. Then it times cold starts,
+from launching a fresh process to the first successful /start_game, with
+WARMUP=sync (data loaded during the import) and WARMUP=background (data loaded
+by a thread while the app already answers /ready).
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+from .common import BENCH_ENV, SRC_DIR, save_results
+
+ImportTime = namedtuple('ImportTime', ['module', 'self_us', 'cumulative_us', 'depth'])
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)\s*$')
+
+# Modules that should stay out of the web path; the cold start reports which ones were imported
+WATCHED_MODULES = ('pandas', 'numpy', 'geopy', 'utils.geocoding', 'openai', 'dotenv')
+
+COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+while True:
+    status = client.get('/start_game').status_code
+    if status == 200:
+        break
+    if status != 503 or app.DATA.error is not None:
+        raise SystemExit(f"/start_game answered {status}: {app.DATA.error!r}")
+    time.sleep(0.005)
+print(json.dumps({
+    'import_s': imported - start,
+    'first_game_s': time.perf_counter() - start,
+    'modules': [name for name in %r if name in sys.modules],
+}), flush=True)
+""" % (WATCHED_MODULES,)
+
+
+def app_env(env=None):
+    """BENCH_ENV plus throwaway session, event and leaderboard stores, so runs start from nothing."""
+    tmp = tempfile.mkdtemp(prefix='energy-game-startup-')
+    merged = dict(os.environ, **BENCH_ENV)
+    merged.update(SESSION_BACKEND='memory', EVENTS_DB_PATH=os.path.join(tmp, 'events.sqlite3'),
+                  LEADERBOARD_PATH=os.path.join(tmp, 'leaderboard.sqlite3'))
+    merged.update(env or {})
+    return merged
+
+
+def parse_importtime(stderr):
+    """[ImportTime] from `python -X importtime` output, in the order the imports finished."""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append(ImportTime(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def subtree(rows, module):
+    """The rows of module and everything it imported (importtime lists children before their parent)."""
+    end = next(i for i, row in enumerate(rows) if row.module == module and row.depth == 0)
+    start = end
+    while start > 0 and rows[start - 1].depth > 0:
+        start -= 1
+    return rows[start:end + 1]
+
+
+def package_totals(rows):
+    """{top-level package: summed self time in us}, most expensive first."""
+    totals = {}
+    for row in rows:
+        package = row.module.split('.')[0]
+        totals[package] = totals.get(package, 0) + row.self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def import_profile(env=None):
+    """[ImportTime] of importing the app in a fresh interpreter (without what site imported before it)."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=SRC_DIR,
+                            env=app_env(env), capture_output=True, text=True, check=True)
+    return subtree(parse_importtime(result.stderr), 'app')
+
+
+def cold_start(env=None, timeout=60):
+    """Time a fresh process from launch to its first successful /start_game.
+
+    Returns {'wall_s': launch to first game, 'import_s' and 'first_game_s': the
+    same measured inside the process (without interpreter start-up), 'modules':
+    the WATCHED_MODULES that were imported by then}.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', COLD_START_SCRIPT], cwd=SRC_DIR, env=app_env(env),
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        # The app prints its own start-up lines; the result is the JSON line after them
+        for line in process.stdout:
+            if line.startswith('{'):
+                return dict(json.loads(line), wall_s=time.perf_counter() - start)
+        _, stderr = process.communicate(timeout=timeout)
+        raise RuntimeError(f"Cold start failed:\n{stderr}")
+    finally:
+        process.kill()
+        process.communicate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=25, help="modules listed by cumulative time")
+    parser.add_argument('--repeat', type=int, default=3, help="cold starts per mode (best is reported)")
+    parser.add_argument('--output', default='startup')
+    args = parser.parse_args()
+
+    rows = import_profile({'WARMUP': 'background'})
+    results = {
+        'config': vars(args),
+        'import_total_ms': next(row.cumulative_us for row in rows if row.module == 'app') / 1000,
+        'modules_ms': {row.module: {'self': row.self_us / 1000, 'cumulative': row.cumulative_us / 1000}
+                       for row in sorted(rows, key=lambda row: row.cumulative_us, reverse=True)[:args.top]},
+        'packages_ms': {package: us / 1000 for package, us in list(package_totals(rows).items())[:args.top]},
+        'cold_start': {},
+    }
+    for warmup in ('sync', 'background'):
+        runs = [cold_start({'WARMUP': warmup}) for _ in range(args.repeat)]
+        results['cold_start'][warmup] = min(runs, key=lambda run: run['wall_s'])
+
+    print(f"import app (WARMUP=background): {results['import_total_ms']:.0f} ms")
+    print(f"{'module':<45} {'self ms':>9} {'cumul. ms':>10}")
+    for module, times in results['modules_ms'].items():
+        print(f"{module:<45} {times['self']:>9.1f} {times['cumulative']:>10.1f}")
+    print(f"\n{'package':<45} {'self ms':>9}")
+    for package, ms in results['packages_ms'].items():
+        print(f"{package:<45} {ms:>9.1f}")
+    print()
+    for warmup, run in results['cold_start'].items():
+        print(f"cold start, WARMUP={warmup:<10} import {run['import_s'] * 1000:6.0f} ms, "
+              f"first /start_game {run['wall_s'] * 1000:6.0f} ms after launch, imported {', '.join(run['modules'])}")
+    print(f"Results written to {save_results(args.output, results)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Measure gunicorn worker memory with and without the shared dataset (SHARED_DATA=1).
+
+For each worker count, starts gunicorn in both modes, plays a few requests so
+every worker has served traffic, and reads RSS, PSS and USS of the master and
+each worker from /proc (Linux only). RSS counts shared pages in full for every
+process, so PSS (shared pages split between the processes mapping them) is the
+number that shows what the shared arrays save.
+
+    python -m benchmarks.worker_memory --workers 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from .common import BENCH_ENV, HttpSession, free_port, save_results, server_process
+
+MODES = {'copy': {}, 'shared': {'SHARED_DATA': '1'}}
+
+
+def child_pids(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The command name may contain spaces; fields after the closing paren are fixed
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def memory_kb(pid):
+    """{'rss': kB, 'pss': kB, 'uss': kB} from smaps_rollup (or smaps on older kernels)."""
+    totals = {'Rss': 0, 'Pss': 0, 'Private_Clean': 0, 'Private_Dirty': 0}
+    path = f'/proc/{pid}/smaps_rollup'
+    if not os.path.exists(path):
+        path = f'/proc/{pid}/smaps'
+    with open(path) as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in totals:
+                totals[key] += int(rest.split()[0])
+    return {'rss': totals['Rss'], 'pss': totals['Pss'], 'uss': totals['Private_Clean'] + totals['Private_Dirty']}
+
+
+def measure(workers, mode, requests_per_worker, settle):
+    port = free_port()
+    env = dict(BENCH_ENV, SESSION_DB_PATH=tempfile.mktemp(suffix='.sqlite3'), **MODES[mode])
+    command = ['gunicorn', '--pythonpath', 'src', '-w', str(workers), '-b', f'127.0.0.1:{port}', 'src.app:app']
+    with server_process(command, port, env) as (process, url):
+        deadline = time.time() + 60
+        while len(child_pids(process.pid)) < workers and time.time() < deadline:
+            time.sleep(0.2)
+        session = HttpSession(url)
+        for i in range(requests_per_worker * workers):
+            session.request('GET', '/start_game')
+            session.request('GET', f'/suggestions?prefix={chr(ord("a") + i % 26)}')
+            session.request('POST', '/guess', {'guess': 'Norway'})
+        time.sleep(settle)
+        master = memory_kb(process.pid)
+        per_worker = [memory_kb(pid) for pid in child_pids(process.pid)]
+    count = len(per_worker)
+    return {
+        'workers': workers,
+        'mode': mode,
+        'master_kb': master,
+        'worker_kb': per_worker,
+        'mean_worker_rss_kb': sum(w['rss'] for w in per_worker) / count,
+        'mean_worker_pss_kb': sum(w['pss'] for w in per_worker) / count,
+        'mean_worker_uss_kb': sum(w['uss'] for w in per_worker) / count,
+        'total_pss_kb': master['pss'] + sum(w['pss'] for w in per_worker),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, 8])
+    parser.add_argument('--requests', type=int, default=20, help="request rounds per worker before measuring")
+    parser.add_argument('--settle', type=float, default=1.0, help="seconds to wait before reading /proc")
+    parser.add_argument('--output', default='worker_memory')
+    args = parser.parse_args()
+
+    runs = [measure(workers, mode, args.requests, args.settle) for workers in args.workers for mode in MODES]
+    print(f"{'workers':>7} {'mode':<7} {'RSS/worker':>11} {'PSS/worker':>11} {'USS/worker':>11} {'total PSS':>10}")
+    for run in runs:
+        print(f"{run['workers']:>7} {run['mode']:<7} {run['mean_worker_rss_kb'] / 1024:>9.1f}MB "
+              f"{run['mean_worker_pss_kb'] / 1024:>9.1f}MB {run['mean_worker_uss_kb'] / 1024:>9.1f}MB "
+              f"{run['total_pss_kb'] / 1024:>8.1f}MB")
+    print(f"Results written to {save_results(args.output, {'runs': runs, 'config': vars(args)})}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Gunicorn settings, read automatically when gunicorn is started from the repo root.
+
+SHARED_DATA=1 makes the master load the energy data and coordinates once, before
+forking, into read-only arrays on tmpfs that every worker maps instead of
+loading its own copy (see src/utils/shared_data.py).
+
+PRELOAD_APP=1 imports the app, data included, in the master before forking, so
+workers start ready and share the loaded pages copy-on-write. SHARED_DATA is not
+needed (and is skipped) then.
+
+With METRICS_DIR set, the master empties that directory at start-up and folds
+the metrics of every worker that exits into its totals (see src/api/metrics.py).
+"""
+import os
+import shutil
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(ROOT_DIR, 'data')
+
+preload_app = os.environ.get('PRELOAD_APP') == '1'
+
+
+def on_starting(server):
+    sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+    if os.environ.get('METRICS_DIR'):
+        from api.metrics import clear_directory
+        os.makedirs(os.environ['METRICS_DIR'], exist_ok=True)
+        clear_directory(os.environ['METRICS_DIR'])
+    if os.environ.get('SHARED_DATA') != '1' or preload_app:
+        return
+    from game.round_pool import ENERGY_COLUMNS
+    from utils.shared_data import SHARED_DATA_ENV, publish_shared_data
+
+    directory = publish_shared_data(
+        os.path.join(DATA_DIR, 'owid-energy-data.csv'),
+        os.path.join(DATA_DIR, 'owid-energy-data.snapshot'),
+        os.path.join(DATA_DIR, 'coordinates_all_countries.csv'),
+        ENERGY_COLUMNS,
+    )
+    # Workers inherit the environment when they are forked
+    os.environ[SHARED_DATA_ENV] = directory
+    server.log.info("Published shared data to %s", directory)
+
+
+def child_exit(server, worker):
+    if os.environ.get('METRICS_DIR'):
+        from api.metrics import mark_process_dead
+        mark_process_dead(os.environ['METRICS_DIR'], worker.pid)
+
+
+def on_exit(server):
+    directory = os.environ.get('SHARED_DATA_DIR')
+    if os.environ.get('SHARED_DATA') == '1' and directory:
+        shutil.rmtree(directory, ignore_errors=True)
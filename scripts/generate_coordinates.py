@@ -1,24 +1,29 @@
+"""Geocode the 2020 countries of the OWID energy data into data/coordinates_all_countries.csv.
+
+Only countries without coordinates in the existing CSV are looked up. Answers
+are kept in a JSON cache (data/geocode_cache.json), and both files are
+checkpointed after every batch, so an interrupted run picks up where it stopped.
+
+    python scripts/generate_coordinates.py
+    python scripts/generate_coordinates.py --geocoder fixture --fixture old_coordinates.csv --rate 0
+"""
+import argparse
 import os
+import sys
+
 import pandas as pd
-from geopy.geocoders import Nominatim
-import time
 
-# Define file paths
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
 
-OWID_CSV = os.path.join(DATA_DIR, 'owid-energy-data.csv')
-if not os.path.exists(OWID_CSV):
-    print(f"Error: OWID CSV not found at {OWID_CSV}")
-    exit(1)
-else:
-    print(f"Found energy data CSV at {OWID_CSV}")
+from utils.geocoding import (GeocodeCache, create_geocoder, geocode_missing,  # noqa: E402
+                             read_coordinates_csv, write_coordinates_csv)
 
+# Define file paths
+DATA_DIR = os.path.join(ROOT_DIR, 'data')
+OWID_CSV = os.path.join(DATA_DIR, 'owid-energy-data.csv')
 OUTPUT_CSV = os.path.join(DATA_DIR, 'coordinates_all_countries.csv')
-
-# Read energy data
-df = pd.read_csv(OWID_CSV)
+CACHE_PATH = os.path.join(DATA_DIR, 'geocode_cache.json')
 
 # Filter countries
 exclusions = [
@@ -29,36 +34,70 @@ exclusions = [
     "Low-income countries", "Antarctica", "High-income countries",
     "Netherlands Antilles", "Upper-middle-income countries"
 ]
-df_2020 = df[df['year'] == 2020]
-mask = ~df_2020['country'].isin(exclusions)
-countries = df_2020[mask]['country'].unique()
-print(f"Processing {len(countries)} countries...")
-
-# Get coordinates with retries
-geolocator = Nominatim(user_agent="energy_game", timeout=10)
-results = []
-
-try:
-    for country in sorted(countries):
-        print(f"Processing: {country}")
-        lat, lon = None, None
-        for attempt in range(3):
-            try:
-                location = geolocator.geocode(country, timeout=10)
-                if location:
-                    lat, lon = location.latitude, location.longitude
-                    print(f"Found {country}: {lat}, {lon}")
-                    break
-            except Exception as e:
-                print(f"Error processing {country} on attempt {attempt+1}: {e}")
-            time.sleep(0.5)  # reduced sleep time
-        if lat is None or lon is None:
-            print(f"Warning: Coordinates not found for {country}")
-        results.append([country, lat, lon])
-except KeyboardInterrupt:
-    print("Process interrupted by user. Saving partial results...")
-
-# Save to CSV
-coords_df = pd.DataFrame(results, columns=['country', 'latitude', 'longitude'])
-coords_df.to_csv(OUTPUT_CSV, index=False)
-print(f"Coordinates file generated at {OUTPUT_CSV}")
+
+
+def load_countries(owid_csv):
+    df = pd.read_csv(owid_csv, usecols=['country', 'year'])
+    df_2020 = df[df['year'] == 2020]
+    mask = ~df_2020['country'].isin(exclusions)
+    return sorted(df_2020[mask]['country'].unique())
+
+
+def generate(countries, output_csv, geocoder, cache, refresh=False, **pool_options):
+    """Fill output_csv with coordinates for countries, geocoding only what neither it nor the cache has."""
+    coordinates = {} if refresh else read_coordinates_csv(output_csv)
+    missing = []
+    for country in countries:
+        if coordinates.get(country):
+            continue
+        if (geocoder.name, country) in cache:
+            coordinates[country] = cache.get(geocoder.name, country)
+        else:
+            coordinates.setdefault(country, None)
+            missing.append(country)
+    print(f"{len(countries)} countries, {len(missing)} to geocode")
+
+    def checkpoint(results):
+        coordinates.update(results)
+        write_coordinates_csv(output_csv, coordinates)
+
+    try:
+        geocode_missing(missing, geocoder, cache, on_batch=checkpoint, **pool_options)
+    finally:
+        write_coordinates_csv(output_csv, coordinates)
+    return coordinates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--geocoder', choices=['nominatim', 'fixture'], default='nominatim')
+    parser.add_argument('--fixture', help="coordinates CSV answering lookups for --geocoder fixture")
+    parser.add_argument('--owid-csv', default=OWID_CSV)
+    parser.add_argument('--output', default=OUTPUT_CSV)
+    parser.add_argument('--cache', default=CACHE_PATH)
+    parser.add_argument('--workers', type=int, default=2)
+    # Nominatim's usage policy allows at most one request per second
+    parser.add_argument('--rate', type=float, default=1.0, help="max lookups per second, 0 for no limit")
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=20, help="lookups between checkpoints")
+    parser.add_argument('--refresh', action='store_true', help="ignore the existing output CSV")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.owid_csv):
+        print(f"Error: OWID CSV not found at {args.owid_csv}")
+        return 1
+    print(f"Found energy data CSV at {args.owid_csv}")
+    geocoder = create_geocoder(args.geocoder, args.fixture)
+    cache = GeocodeCache(args.cache)
+    try:
+        generate(load_countries(args.owid_csv), args.output, geocoder, cache, refresh=args.refresh,
+                 workers=args.workers, rate=args.rate, retries=args.retries, batch_size=args.batch_size)
+    except KeyboardInterrupt:
+        print("Process interrupted by user. Progress is saved; run again to resume.")
+        return 1
+    print(f"Coordinates file generated at {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""Admission control: per-client, per-route token buckets and a concurrency cap for upstream-bound routes.
+
+A bucket holds up to burst tokens and refills at rate tokens per second; each
+request takes one. A request that finds the bucket empty is rejected right away
+with the seconds until a token is available (for Retry-After). Buckets are
+stored in process memory, or in a SQLite file shared by every gunicorn worker on
+the host. Keystroke debouncing for /suggestions is a bucket with burst 1.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+Limit = namedtuple('Limit', ['rate', 'burst'])  # tokens per second, bucket size
+
+# route -> Limit; routes in the same group share one bucket per client
+DEFAULT_LIMITS = {
+    '/hint': Limit(0.2, 5),
+    '/hint/stream': Limit(0.2, 5),
+    '/suggestions': Limit(10, 30),
+    '/guess': Limit(5, 20),
+    '/start_game': Limit(2, 10),
+    '/start_timeseries': Limit(2, 10),
+}
+ROUTE_GROUPS = {'/hint/stream': '/hint'}
+UPSTREAM_ROUTES = ('/hint',)
+DEFAULT_MAX_BUCKETS = 100000
+
+Decision = namedtuple('Decision', ['status', 'retry_after', 'reason'])
+
+
+def parse_limits(spec):
+    """'/hint=0.2:5,/suggestions=10:30' -> {route: Limit}. Raises ValueError.
+
+    The rate must be positive and the burst at least 1: a bucket that never
+    refills has no time to retry after.
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        route, _, value = item.partition('=')
+        rate, _, burst = value.partition(':')
+        limit = Limit(float(rate), float(burst or 1))
+        if not limit.rate > 0:
+            raise ValueError(f"Rate limit for {route.strip()} must be above 0 requests per second, got {rate}")
+        if not limit.burst >= 1:
+            raise ValueError(f"Burst for {route.strip()} must be at least 1, got {burst}")
+        limits[route.strip()] = limit
+    return limits
+
+
+def refill(tokens, updated, now, limit):
+    """Tokens in a bucket last written at updated with tokens, as of now."""
+    return min(limit.burst, tokens + (now - updated) * limit.rate)
+
+
+class BucketStore:
+    """Interface for bucket backends."""
+
+    def take(self, key, limit, now):
+        """Take one token from key's bucket. Returns 0 if admitted, else seconds until a token is available."""
+        raise NotImplementedError
+
+
+class MemoryBucketStore(BucketStore):
+    """In-process buckets, sharded so concurrent requests rarely contend for the same lock."""
+
+    def __init__(self, max_buckets=DEFAULT_MAX_BUCKETS, shards=16):
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+        self._per_shard = max(1, max_buckets // shards)
+
+    def take(self, key, limit, now):
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        with lock:
+            entry = buckets.pop(key, None)
+            tokens = limit.burst if entry is None else refill(entry[0], entry[1], now, limit)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / limit.rate
+            # Most recently used last, so the least recently seen clients are dropped first
+            buckets[key] = (tokens, now)
+            if len(buckets) > self._per_shard:
+                buckets.popitem(last=False)
+        return wait
+
+    def __len__(self):
+        return sum(len(buckets) for _, buckets in self._shards)
+
+
+class SQLiteBucketStore(BucketStore):
+    """Buckets in a local SQLite file, shared by every gunicorn worker on the host."""
+
+    PURGE_EVERY = 1000  # takes between sweeps of idle buckets
+    IDLE_SECONDS = 3600
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._takes = 0
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _conn(self):
+        # One connection per thread, reopened after a fork (gunicorn workers)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # losing a few buckets in a crash is harmless
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def take(self, key, limit, now):
+        conn = self._conn()
+        # BEGIN IMMEDIATE takes the write lock up front, so read-modify-write is atomic across workers
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = limit.burst if row is None else refill(row[0], row[1], now, limit)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / limit.rate
+            conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._takes += 1
+        if self._takes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM buckets WHERE updated < ?", (now - self.IDLE_SECONDS,))
+        return wait
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM buckets").fetchone()[0]
+
+
+def create_bucket_store(backend, path=None, max_buckets=DEFAULT_MAX_BUCKETS):
+    """Bucket store for backend 'memory' or 'sqlite' (path required)."""
+    if backend == 'memory':
+        return MemoryBucketStore(max_buckets=max_buckets)
+    if backend == 'sqlite':
+        return SQLiteBucketStore(path)
+    raise ValueError(f"Unknown rate limit backend: {backend!r}")
+
+
+class AdmissionControl:
+    """Decides whether a request may run; call release(route) when an admitted upstream request ends."""
+
+    def __init__(self, store, limits=None, debounce=0.0, upstream_routes=UPSTREAM_ROUTES, max_upstream=16,
+                 clock=time.time, on_stat=None):
+        self.store = store
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        if debounce > 0:
+            # At most one keystroke request per debounce seconds per client
+            self.debounce = Limit(1.0 / debounce, 1)
+        else:
+            self.debounce = None
+        self.upstream_routes = frozenset(upstream_routes)
+        self.max_upstream = max_upstream
+        self._upstream = threading.BoundedSemaphore(max_upstream)
+        self.clock = clock
+        self.stats = {'admitted': 0, 'limited': 0, 'debounced': 0, 'busy': 0}
+        self.on_stat = on_stat  # optional callback(stat_name, route), e.g. to feed metrics
+
+    def _count(self, stat, route):
+        self.stats[stat] += 1
+        if self.on_stat is not None:
+            self.on_stat(stat, route)
+
+    def check(self, route, client):
+        """None if the request is admitted, else a Decision with the status (429 or 503) and Retry-After seconds."""
+        now = self.clock()
+        if route == '/suggestions' and self.debounce is not None:
+            wait = self.store.take(f"debounce|{client}", self.debounce, now)
+            if wait:
+                self._count('debounced', route)
+                return Decision(429, wait, "Typing too fast, waiting for the next keystroke.")
+        limit = self.limits.get(route)
+        if limit is not None:
+            wait = self.store.take(f"{ROUTE_GROUPS.get(route, route)}|{client}", limit, now)
+            if wait:
+                self._count('limited', route)
+                return Decision(429, wait, "Too many requests, please slow down.")
+        if route in self.upstream_routes and not self._upstream.acquire(blocking=False):
+            self._count('busy', route)
+            return Decision(503, 1.0, "Server busy, please retry.")
+        self._count('admitted', route)
+        return None
+
+    def release(self, route):
+        if route in self.upstream_routes:
+            self._upstream.release()
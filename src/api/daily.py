@@ -0,0 +1,110 @@
+"""Daily challenge: one target per UTC date, with every response precomputed.
+
+Each country appears once per cycle: targets follow a seeded shuffle of the
+playable countries, and a new shuffle is drawn per cycle. The first request of a
+day builds that day's responses: the round payload, and the scored reply for
+every possible guess (one column of the geo tables). All of them are encoded
+once, so a spike of players on the same puzzle is served from bytes in memory.
+Responses are cacheable until the next midnight UTC.
+
+A data reload changes the candidates and so the schedule. The instance built on
+reload keeps the previous one's targets for yesterday and today by country name.
+A challenge that is under way keeps its target, and workers that reload at
+different times still agree on it. The new schedule starts the next day.
+"""
+import datetime
+import random
+import threading
+from collections import namedtuple
+
+from .response_cache import encode_json
+
+EPOCH = datetime.date(2024, 1, 1)  # challenge number 1
+
+Daily = namedtuple('Daily', ['date', 'number', 'target', 'start', 'guesses'])
+
+
+def utc_today(now=None):
+    now = datetime.datetime.now(datetime.timezone.utc) if now is None else now
+    return now.date()
+
+
+def seconds_until_midnight(now=None):
+    now = datetime.datetime.now(datetime.timezone.utc) if now is None else now
+    midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time(),
+                                         tzinfo=datetime.timezone.utc)
+    return max(1, int((midnight - now).total_seconds()))
+
+
+class DailyChallenges:
+    """Builds and keeps the Daily for today (and yesterday, for requests straddling midnight).
+
+    candidates are registry ids that have a round in year; score_all(target)
+    returns (cardinals, distances_km) for every id against target. previous is
+    the instance built from the data this one replaces.
+    """
+
+    def __init__(self, registry, pool, score_all, correct, year, seed="energy-game-daily", previous=None):
+        self.registry = registry
+        self.pool = pool
+        self.score_all = score_all
+        self.correct = correct
+        self.year = year
+        self.seed = seed
+        self.candidates = [i for i, name in enumerate(registry.names) if pool.find(name, year) is not None]
+        if not self.candidates:
+            raise ValueError(f"No playable rounds in {year} for the daily challenge")
+        self._days = {}
+        self._lock = threading.Lock()
+        self._pinned = {}  # date -> registry id carried over from previous
+        if previous is not None:
+            today = utc_today()
+            for date in (today - datetime.timedelta(days=1), today):
+                target = registry.ids.get(previous.registry.name(previous.target_for(date)))
+                if target in self.candidates:
+                    self._pinned[date] = target
+
+    def target_for(self, date):
+        """Registry id of date's target: pinned by a reload, else its position in this cycle's seeded shuffle."""
+        if date in self._pinned:
+            return self._pinned[date]
+        day = (date - EPOCH).days
+        cycle, position = divmod(day, len(self.candidates))
+        order = list(self.candidates)
+        random.Random(f"{self.seed}:{cycle}").shuffle(order)
+        return order[position]
+
+    def get(self, date=None):
+        date = date or utc_today()
+        daily = self._days.get(date)
+        if daily is None:
+            with self._lock:
+                daily = self._days.get(date)
+                if daily is None:
+                    daily = self._build(date)
+                    self._days = {d: v for d, v in self._days.items() if d >= date - datetime.timedelta(days=1)}
+                    self._days[date] = daily
+        return daily
+
+    def _build(self, date):
+        target = self.target_for(date)
+        name = self.registry.name(target)
+        round_ = self.pool.find(name, self.year)
+        number = (date - EPOCH).days + 1
+        start = encode_json({
+            "energy_data": round_.payload,
+            "message": "Guess today's country!",
+            "year": round_.year,
+            "date": date.isoformat(),
+            "challenge": number,
+        }, cache_control=None)
+        cardinals, distances = self.score_all(target)
+        guesses = []
+        for cardinal, distance in zip(cardinals, distances):
+            if cardinal == self.correct:
+                body = {"message": "Correct! You've guessed the country!", "target": name, "game_over": True}
+            else:
+                body = {"message": f"Try looking {cardinal}. Distance: {float(distance):,.0f} km.",
+                        "direction": cardinal, "distance_km": round(float(distance)), "game_over": False}
+            guesses.append(encode_json(dict(body, challenge=number), cache_control=None))
+        return Daily(date, number, target, start, guesses)
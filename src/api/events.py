@@ -0,0 +1,310 @@
+"""Gameplay event log: fixed-size records in a ring buffer, flushed in batches to SQLite.
+
+Handlers append one record per game start and per guess; that is a lock, a few
+array stores and an index bump, with no I/O. A background thread drains the
+buffer every interval seconds (sooner when it fills up) and, in one
+transaction, appends the batch to the raw events table and folds it into the
+aggregate tables that /stats reads. The aggregates are updated incrementally
+from each batch and never recomputed from the raw log. When the flusher falls
+behind, new events are dropped and counted rather than blocking requests.
+
+Every gunicorn worker flushes into the same WAL-mode SQLite file, so /stats
+covers the whole host.
+
+Records name countries by ids from the countries table, not by registry ids:
+a data reload that adds or removes a country renumbers the registry, while a
+country keeps its id here for good. country_ids() maps a registry to them.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+START, GUESS, WIN = 0, 1, 2
+NO_GUESS = 0xFFFF
+
+EVENT_DTYPE = np.dtype([
+    ('session', '<i8'),   # hash of the session id (signed, like SQLite integers)
+    ('time', '<f8'),      # unix timestamp
+    ('distance', '<f4'),  # km between guess and target, 0 for starts and wins
+    ('target', '<u2'),    # country ids (see country_ids)
+    ('guess', '<u2'),
+    ('attempt', '<u2'),   # guess number within the game, 0 for starts
+    ('kind', 'u1'),
+])
+DEFAULT_CAPACITY = 65536
+DEFAULT_INTERVAL = 2.0
+MAX_ATTEMPTS = 32  # guess-distribution buckets; longer games count in the last one
+TOP_WRONG_GUESSES = 3
+HARDEST_MIN_WINS = 5  # wins a country needs before it can be listed among the hardest
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS events ("
+    "session INTEGER NOT NULL, time REAL NOT NULL, distance REAL NOT NULL, target INTEGER NOT NULL, "
+    "guess INTEGER NOT NULL, attempt INTEGER NOT NULL, kind INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS country_stats ("
+    "target INTEGER PRIMARY KEY, games INTEGER NOT NULL, wins INTEGER NOT NULL, "
+    "attempts_to_win INTEGER NOT NULL, wrong_guesses INTEGER NOT NULL, wrong_distance REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS guess_distribution ("
+    "target INTEGER NOT NULL, attempts INTEGER NOT NULL, wins INTEGER NOT NULL, PRIMARY KEY (target, attempts))",
+    "CREATE TABLE IF NOT EXISTS wrong_guesses ("
+    "target INTEGER NOT NULL, guess INTEGER NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (target, guess))",
+    "CREATE TABLE IF NOT EXISTS countries (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+)
+
+
+def session_hash(sid):
+    return int.from_bytes(hashlib.blake2b(sid.encode(), digest_size=8).digest(), 'little', signed=True)
+
+
+class EventBuffer:
+    """Fixed-capacity ring of EVENT_DTYPE records with one producer lock; drain() returns a copy."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.records = np.zeros(capacity, dtype=EVENT_DTYPE)
+        self.capacity = capacity
+        self.head = 0  # total records ever appended
+        self.tail = 0  # total records drained
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def append(self, session, kind, target, guess=NO_GUESS, attempt=0, distance=0.0, now=None):
+        """Store one record. Returns False (and counts a drop) when the buffer is full."""
+        with self._lock:
+            if self.head - self.tail >= self.capacity:
+                self.dropped += 1
+                return False
+            self.records[self.head % self.capacity] = (
+                session, time.time() if now is None else now, distance, target, guess, attempt, kind)
+            self.head += 1
+        return True
+
+    def drain(self):
+        """Copy of the records appended since the last drain, oldest first."""
+        with self._lock:
+            head, tail = self.head, self.tail
+            start, end = tail % self.capacity, head % self.capacity
+            if head - tail == 0:
+                batch = self.records[:0].copy()
+            elif start < end:
+                batch = self.records[start:end].copy()
+            else:
+                batch = np.concatenate([self.records[start:], self.records[:end]])
+            self.tail = head
+        return batch
+
+
+class EventLog:
+    """EventBuffer plus the SQLite store; start() runs the flusher thread, summary() serves /stats."""
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, interval=DEFAULT_INTERVAL, on_stat=None):
+        self.path = path
+        self.buffer = EventBuffer(capacity)
+        self.interval = interval
+        self.on_stat = on_stat  # optional callback(stat_name, count), e.g. to feed metrics
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._local = threading.local()
+        self._summary = None  # (computed at, summary)
+        self._flush_lock = threading.Lock()
+        conn = self._conn()
+        for statement in SCHEMA:
+            conn.execute(statement)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # The parent's unflushed records are the parent's to write; threads do not survive a fork
+        running = self._thread is not None
+        self.buffer = EventBuffer(self.buffer.capacity)
+        self._wake, self._stop, self._flush_lock = threading.Event(), threading.Event(), threading.Lock()
+        self._thread = None
+        if running:
+            self.start()
+
+    def _conn(self):
+        # One connection per thread, reopened after a fork (gunicorn workers)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def country_ids(self, names):
+        """Country ids of names (registry order), adding the names not seen before.
+
+        New names get the next free ids in order, so the first list ever seen is
+        numbered like its registry.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            ids = dict(conn.execute("SELECT name, id FROM countries"))
+            missing = [name for name in names if name not in ids]
+            if missing:
+                start = max(ids.values(), default=-1) + 1
+                if start + len(missing) > NO_GUESS:
+                    raise ValueError(f"More than {NO_GUESS} countries in the event log")
+                ids.update((name, start + i) for i, name in enumerate(missing))
+                conn.executemany("INSERT INTO countries (id, name) VALUES (?, ?)",
+                                 [(ids[name], name) for name in missing])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [ids[name] for name in names]
+
+    def record(self, sid, kind, target, guess=NO_GUESS, attempt=0, distance=0.0):
+        """Append one event; target and guess are country ids."""
+        if not self.buffer.append(session_hash(sid), kind, target, guess, attempt, distance):
+            self._count('dropped', 1)
+        elif len(self.buffer) >= self.buffer.capacity // 2:
+            self._wake.set()
+
+    def _count(self, stat, count):
+        if self.on_stat is not None:
+            self.on_stat(stat, count)
+
+    def start(self):
+        """Start the flusher thread (again, in a forked worker)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='event-flusher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"Event flush failed: {e}")
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of records written."""
+        with self._flush_lock:
+            batch = self.buffer.drain()
+            if not len(batch):
+                return 0
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO events (session, time, distance, target, guess, attempt, kind) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    zip(*(batch[name].tolist() for name in EVENT_DTYPE.names)),
+                )
+                self._aggregate(conn, batch)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        self._count('flushed', len(batch))
+        return len(batch)
+
+    @staticmethod
+    def _aggregate(conn, batch):
+        """Fold a batch into the aggregate tables with one upsert per touched row."""
+        kind, target = batch['kind'], batch['target'].astype(np.int64)
+        size = int(target.max()) + 1
+        starts, wins, wrong = kind == START, kind == WIN, kind == GUESS
+        attempts = np.minimum(batch['attempt'].astype(np.int64), MAX_ATTEMPTS)
+        columns = (
+            np.bincount(target[starts], minlength=size),
+            np.bincount(target[wins], minlength=size),
+            np.bincount(target[wins], weights=attempts[wins], minlength=size),
+            np.bincount(target[wrong], minlength=size),
+            np.bincount(target[wrong], weights=batch['distance'][wrong], minlength=size),
+        )
+        touched = np.flatnonzero(columns[0] + columns[1] + columns[3])
+        conn.executemany(
+            "INSERT INTO country_stats (target, games, wins, attempts_to_win, wrong_guesses, wrong_distance) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (target) DO UPDATE SET "
+            "games = games + excluded.games, wins = wins + excluded.wins, "
+            "attempts_to_win = attempts_to_win + excluded.attempts_to_win, "
+            "wrong_guesses = wrong_guesses + excluded.wrong_guesses, "
+            "wrong_distance = wrong_distance + excluded.wrong_distance",
+            [(int(t), int(columns[0][t]), int(columns[1][t]), int(columns[2][t]), int(columns[3][t]),
+              float(columns[4][t])) for t in touched],
+        )
+        pairs, counts = np.unique(target[wins] * (MAX_ATTEMPTS + 1) + attempts[wins], return_counts=True)
+        conn.executemany(
+            "INSERT INTO guess_distribution (target, attempts, wins) VALUES (?, ?, ?) "
+            "ON CONFLICT (target, attempts) DO UPDATE SET wins = wins + excluded.wins",
+            [(int(p) // (MAX_ATTEMPTS + 1), int(p) % (MAX_ATTEMPTS + 1), int(c)) for p, c in zip(pairs, counts)],
+        )
+        pairs, counts = np.unique(target[wrong] * 65536 + batch['guess'][wrong], return_counts=True)
+        conn.executemany(
+            "INSERT INTO wrong_guesses (target, guess, count) VALUES (?, ?, ?) "
+            "ON CONFLICT (target, guess) DO UPDATE SET count = count + excluded.count",
+            [(int(p) >> 16, int(p) & 0xFFFF, int(c)) for p, c in zip(pairs, counts)],
+        )
+
+    def summary(self, max_age=10.0):
+        """/stats payload from the aggregate tables, recomputed at most every max_age seconds."""
+        cached = self._summary
+        if cached is not None and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+        conn = self._conn()
+        # One read transaction: a flush between the queries could add targets the first one did not see
+        conn.execute("BEGIN")
+        try:
+            names = dict(conn.execute("SELECT id, name FROM countries"))
+            stats = conn.execute("SELECT target, games, wins, attempts_to_win, wrong_guesses, wrong_distance "
+                                 "FROM country_stats").fetchall()
+            distributions = conn.execute(
+                "SELECT target, attempts, wins FROM guess_distribution ORDER BY target, attempts").fetchall()
+            wrong_guesses = conn.execute(
+                "SELECT target, guess FROM (SELECT target, guess, ROW_NUMBER() OVER "
+                "(PARTITION BY target ORDER BY count DESC, guess) AS position FROM wrong_guesses) "
+                "WHERE position <= ?", (TOP_WRONG_GUESSES,)).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        countries = {}
+        for target, games, wins, attempts, wrong, wrong_distance in stats:
+            countries[target] = {
+                'games': games,
+                'wins': wins,
+                'win_rate': round(wins / games, 3) if games else None,
+                'average_guesses': round(attempts / wins, 2) if wins else None,
+                'average_miss_km': round(wrong_distance / wrong) if wrong else None,
+                'guess_distribution': {},
+                'common_wrong_guesses': [],
+            }
+        distribution = {}
+        for target, attempts, wins in distributions:
+            countries[target]['guess_distribution'][str(attempts)] = wins
+            distribution[attempts] = distribution.get(attempts, 0) + wins
+        for target, guess in wrong_guesses:
+            countries[target]['common_wrong_guesses'].append(names[guess])
+
+        # Countries that left the data files keep their history under their name
+        hardest = sorted((target for target, stats in countries.items() if stats['wins'] >= HARDEST_MIN_WINS),
+                         key=lambda target: countries[target]['average_guesses'], reverse=True)
+        summary = {
+            'games': sum(stats['games'] for stats in countries.values()),
+            'wins': sum(stats['wins'] for stats in countries.values()),
+            'guess_distribution': {str(k): distribution[k] for k in sorted(distribution)},
+            'hardest': [names[target] for target in hardest[:10]],
+            'countries': {names[target]: countries[target] for target in sorted(countries, key=names.get)},
+        }
+        self._summary = (time.monotonic(), summary)
+        return summary
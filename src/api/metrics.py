@@ -0,0 +1,213 @@
+"""Low-overhead counters and fixed-bucket histograms, exported in Prometheus text format.
+
+Each process keeps its values in a flat array of float64 slots. When a metrics
+directory is configured (METRICS_DIR), that array is a shared memory map in
+metrics_<pid>.bin with a JSON sidecar naming the slots, and rendering sums the
+files of every worker process. When a worker exits, mark_process_dead() (called
+from gunicorn's child_exit hook) folds its values into totals.json and removes its
+files, so counters neither vanish nor go backwards when a pid is reused. Without
+a directory, metrics are per-process.
+"""
+import glob
+import json
+import mmap
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from functools import wraps
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CAPACITY = 8192  # float64 slots per process
+TOTALS_FILE = 'totals.json'  # values of exited workers, written by mark_process_dead
+
+
+def _label_text(labels):
+    return ",".join(f'{k}="{v}"' for k, v in labels)
+
+
+def _size(kind, buckets):
+    return 1 if kind == 'counter' else len(buckets) + 2
+
+
+def _read_process(layout_path, buckets):
+    """[(key, values)] of one worker's files, or None if they are unreadable or use other buckets."""
+    try:
+        with open(layout_path) as f:
+            layout = json.load(f)
+        values = array('d')
+        with open(layout_path[:-5] + '.bin', 'rb') as f:
+            values.frombytes(f.read())
+    except (OSError, ValueError):
+        return None
+    if tuple(layout['buckets']) != tuple(buckets):
+        return None
+    return [((kind, name, tuple(tuple(p) for p in labels)), list(values[slot:slot + _size(kind, buckets)]))
+            for kind, name, labels, slot in layout['series']]
+
+
+def _read_totals(directory, buckets):
+    try:
+        with open(os.path.join(directory, TOTALS_FILE)) as f:
+            totals = json.load(f)
+    except (OSError, ValueError):
+        return []
+    if tuple(totals['buckets']) != tuple(buckets):
+        return []
+    return [((kind, name, tuple(tuple(p) for p in labels)), values) for kind, name, labels, values in totals['series']]
+
+
+def _add(totals, series):
+    for key, values in series:
+        current = totals.setdefault(key, [0.0] * len(values))
+        for i, v in enumerate(values):
+            current[i] += v
+
+
+def mark_process_dead(directory, pid, buckets=DEFAULT_BUCKETS):
+    """Fold the values of exited worker pid into the directory's totals and remove its files.
+
+    Meant for gunicorn's child_exit hook, which runs in the master, so there is one writer.
+    """
+    layout_path = os.path.join(directory, f"metrics_{pid}.json")
+    series = _read_process(layout_path, buckets)
+    if series:
+        totals = {}
+        _add(totals, _read_totals(directory, buckets))
+        _add(totals, series)
+        tmp = os.path.join(directory, f"{TOTALS_FILE}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump({'buckets': buckets, 'series': [[kind, name, [list(p) for p in labels], values]
+                                                      for (kind, name, labels), values in totals.items()]}, f)
+        os.replace(tmp, os.path.join(directory, TOTALS_FILE))
+    for path in (layout_path, layout_path[:-5] + '.bin'):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def clear_directory(directory):
+    """Remove every worker file and the totals, e.g. when a new server starts."""
+    for path in glob.glob(os.path.join(directory, 'metrics_*')) + glob.glob(os.path.join(directory, TOTALS_FILE + '*')):
+        os.remove(path)
+
+
+class Metrics:
+
+    def __init__(self, directory=None, buckets=DEFAULT_BUCKETS, prefix='energy_game_'):
+        self.directory = directory
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._open()
+        if hasattr(os, 'register_at_fork'):
+            # Forked workers must not share the parent's slots
+            os.register_at_fork(after_in_child=self._open)
+
+    def _open(self):
+        self._lock = threading.Lock()
+        self._slots = {}  # (kind, name, labels) -> first slot
+        self._next = 0
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._path = os.path.join(self.directory, f"metrics_{os.getpid()}.bin")
+            with open(self._path, 'wb') as f:
+                f.truncate(CAPACITY * 8)
+            with open(self._path, 'r+b') as f:
+                self._buffer = mmap.mmap(f.fileno(), CAPACITY * 8)
+        else:
+            self._path = None
+            self._buffer = bytearray(CAPACITY * 8)
+        self._values = memoryview(self._buffer).cast('d')
+
+    def _slot(self, kind, name, labels, size):
+        key = (kind, name, labels)
+        slot = self._slots.get(key)
+        if slot is None:
+            with self._lock:
+                slot = self._slots.get(key)
+                if slot is None:
+                    if self._next + size > CAPACITY:
+                        return None
+                    slot = self._slots[key] = self._next
+                    self._next += size
+                    self._write_layout()
+        return slot
+
+    def _write_layout(self):
+        if self._path is None:
+            return
+        layout = [[kind, name, [list(p) for p in labels], slot] for (kind, name, labels), slot in self._slots.items()]
+        tmp = f"{self._path}.json.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'buckets': self.buckets, 'series': layout}, f)
+        os.replace(tmp, f"{self._path[:-4]}.json")
+
+    def inc(self, name, labels=(), value=1.0):
+        """Add value to counter name; labels is a tuple of (key, value) pairs."""
+        slot = self._slot('counter', name, labels, 1)
+        if slot is not None:
+            with self._lock:
+                self._values[slot] += value
+
+    def observe(self, name, seconds, labels=()):
+        """Record one observation in histogram name."""
+        slot = self._slot('histogram', name, labels, len(self.buckets) + 2)
+        if slot is not None:
+            with self._lock:
+                self._values[slot + bisect_left(self.buckets, seconds)] += 1
+                self._values[slot + len(self.buckets) + 1] += seconds
+
+    def timed(self, function_name):
+        """Decorator recording the wrapped call's duration in function_seconds{function=...}."""
+        labels = (('function', function_name),)
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe('function_seconds', time.perf_counter() - start, labels)
+            return wrapper
+        return decorator
+
+    def _collect(self):
+        """{(kind, name, labels): [values]} summed over every process sharing the directory."""
+        if self._path is None:
+            with self._lock:
+                return {key: list(self._values[slot:slot + self._size(key[0])]) for key, slot in self._slots.items()}
+        totals = {}
+        _add(totals, _read_totals(self.directory, self.buckets))
+        for layout_path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+            _add(totals, _read_process(layout_path, self.buckets) or [])
+        return totals
+
+    def _size(self, kind):
+        return _size(kind, self.buckets)
+
+    def render(self):
+        """All metrics in Prometheus text exposition format."""
+        lines = []
+        by_name = {}
+        for (kind, name, labels), values in sorted(self._collect().items()):
+            by_name.setdefault((kind, name), []).append((labels, values))
+        for (kind, name), series in by_name.items():
+            full = self.prefix + name
+            lines.append(f"# TYPE {full} {kind}")
+            for labels, values in series:
+                text = _label_text(labels)
+                if kind == 'counter':
+                    lines.append(f"{full}{{{text}}} {values[0]:g}" if text else f"{full} {values[0]:g}")
+                    continue
+                sep = "," if text else ""
+                cumulative = 0.0
+                for bound, count in zip(self.buckets + ('+Inf',), values):
+                    cumulative += count
+                    lines.append(f'{full}_bucket{{{text}{sep}le="{bound}"}} {cumulative:g}')
+                lines.append(f"{full}_sum{{{text}}} {values[-1]:g}" if text else f"{full}_sum {values[-1]:g}")
+                lines.append(f"{full}_count{{{text}}} {cumulative:g}" if text else f"{full}_count {cumulative:g}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,85 @@
+"""Pre-encoded JSON responses served with strong ETags, Cache-Control and gzip.
+
+Payloads that only change on deploy (the country list, suggestions for a given
+prefix) are encoded once, with a gzip variant when they are large enough to
+benefit. Conditional requests whose If-None-Match matches get a bodyless 304.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict, namedtuple
+
+GZIP_MIN_BYTES = 1024  # smaller bodies are not worth compressing
+
+EncodedResponse = namedtuple('EncodedResponse', ['body', 'gzipped', 'etag', 'cache_control'])
+
+
+def encode_json(payload, cache_control, gzip_min_bytes=GZIP_MIN_BYTES):
+    """EncodedResponse for payload, byte-identical to Flask's jsonify output."""
+    body = (json.dumps(payload, separators=(',', ':'), sort_keys=True) + "\n").encode('utf-8')
+    # mtime=0 keeps the gzip bytes (and so their ETag) identical across workers
+    gzipped = gzip.compress(body, compresslevel=9, mtime=0) if len(body) >= gzip_min_bytes else None
+    return EncodedResponse(body, gzipped, hashlib.sha256(body).hexdigest()[:32], cache_control)
+
+
+def make_response(encoded, request, response_class, cache_control=None):
+    """Response for encoded: 304 on a matching If-None-Match, gzip when the client accepts it.
+
+    cache_control overrides the encoded value, for bodies whose freshness changes over time.
+    """
+    use_gzip = encoded.gzipped is not None and 'gzip' in request.accept_encodings
+    # Each representation needs its own strong ETag
+    etag = f"{encoded.etag}-gzip" if use_gzip else encoded.etag
+    if request.if_none_match.contains_weak(etag):
+        response = response_class(status=304)
+    else:
+        response = response_class(encoded.gzipped if use_gzip else encoded.body, mimetype='application/json')
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control or encoded.cache_control
+    if encoded.gzipped is not None:
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+class ResponseCache:
+    """LRU of EncodedResponse keyed by whatever determines the payload."""
+
+    def __init__(self, max_entries=4096, on_stat=None):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+        self.on_stat = on_stat  # optional callback(stat_name), e.g. to feed metrics
+
+    def _count(self, stat):
+        self.stats[stat] += 1
+        if self.on_stat is not None:
+            self.on_stat(stat)
+
+    def get(self, key, build, cache_control):
+        """Cached encoding for key, calling build() for the payload on a miss."""
+        with self._lock:
+            encoded = self._entries.get(key)
+            if encoded is not None:
+                self._entries.move_to_end(key)
+        if encoded is not None:
+            self._count('hits')
+            return encoded
+        self._count('misses')
+        # Encoding happens outside the lock; a racing miss just encodes the same bytes twice
+        encoded = encode_json(build(), cache_control)
+        with self._lock:
+            self._entries[key] = encoded
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return encoded
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
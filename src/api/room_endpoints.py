@@ -0,0 +1,134 @@
+import json
+from urllib.parse import parse_qs
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+try:
+    from ..game.rooms import RoomError  # imported as src.api.room_endpoints
+    from ..utils.asgi_bridge import send_stream
+except ImportError:
+    from game.rooms import RoomError  # imported as api.room_endpoints, with src/ on the path like app.py
+    from utils.asgi_bridge import send_stream
+
+MAX_NAME_LENGTH = 32
+SSE_HEADERS = {'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+
+def parse_last_seq(value):
+    return int(value) if value.isdigit() else 0
+
+
+def register_room_endpoints(app):
+    """Multiplayer rooms; needs ROOM_MANAGER, GAME_DATA (DataVersions) and DEFAULT_YEAR in app.config.
+
+    A room's target is (data version, registry id), so a round keeps its data across a reload.
+    """
+    bp = Blueprint('rooms', __name__)
+
+    @bp.errorhandler(RoomError)
+    def room_error(e):
+        return jsonify({"message": str(e), "error": True}), e.status
+
+    def read_json(*fields):
+        data = request.get_json(silent=True) or {}
+        values = [data.get(field) for field in fields]
+        if not all(isinstance(value, str) and value.strip() for value in values):
+            raise RoomError(f"Expected JSON with {', '.join(fields)}")
+        return [value.strip() for value in values]
+
+    def player_name():
+        name, = read_json('player')
+        return name[:MAX_NAME_LENGTH]
+
+    @bp.route('/rooms', methods=['POST'])
+    def create_room():
+        player = player_name()
+        data = request.get_json(silent=True) or {}
+        name = str(data.get('name') or f"{player}'s room")[:MAX_NAME_LENGTH]
+        room_id, player_id = current_app.config['ROOM_MANAGER'].create(name, player)
+        return jsonify({"room": room_id, "player_id": player_id}), 201
+
+    @bp.route('/rooms/<room_id>', methods=['GET'])
+    def room_info(room_id):
+        return jsonify(current_app.config['ROOM_MANAGER'].info(room_id))
+
+    @bp.route('/rooms/<room_id>/join', methods=['POST'])
+    def join_room(room_id):
+        player_id = current_app.config['ROOM_MANAGER'].join(room_id, player_name())
+        return jsonify({"room": room_id, "player_id": player_id})
+
+    @bp.route('/rooms/<room_id>/start', methods=['POST'])
+    def start_room(room_id):
+        config = current_app.config
+        player_id, = read_json('player_id')
+        year = config['DEFAULT_YEAR']
+        data = config['GAME_DATA'].current
+        try:
+            round_ = data.round_pool.pick(year, year)
+        except LookupError as e:
+            raise RoomError(str(e))
+        target = (data.version, data.registry.ids[round_.country])
+        # The payload never contains the country name
+        config['ROOM_MANAGER'].start(room_id, player_id, target,
+                                     {"energy_data": round_.payload, "year": round_.year})
+        return jsonify({"message": "Guess the country!", "year": round_.year})
+
+    @bp.route('/rooms/<room_id>/guess', methods=['POST'])
+    def room_guess(room_id):
+        config = current_app.config
+        player_id, guess = read_json('player_id', 'guess')
+        versions = config['GAME_DATA']
+        target = config['ROOM_MANAGER'].target_of(room_id)
+        data = versions.get(target[0]) if target is not None else versions.current
+        if data is None:
+            raise RoomError("The game data was updated, please start a new round", 409)
+        registry = data.registry
+        guess_id = registry.resolve(guess)
+        if guess_id is None:
+            raise RoomError("Invalid country. Please select from the suggestions.")
+        direction, distance, finished = config['ROOM_MANAGER'].guess(room_id, player_id, guess_id,
+                                                                     registry.name(guess_id))
+        if finished:
+            return jsonify({"message": "Correct! You've guessed the country!", "game_over": True})
+        return jsonify({
+            "message": f"Try looking {direction}. Distance: {distance:,.0f} km.",
+            "game_over": False
+        })
+
+    @bp.route('/rooms/<room_id>/events', methods=['GET'])
+    def room_events(room_id):
+        """Server-Sent Events stream of room updates; resumes after the Last-Event-ID header.
+
+        Each open stream holds a thread here; src/asgi.py serves this path with room_events_asgi instead.
+        """
+        last_seq = request.headers.get('Last-Event-ID', request.args.get('after', '0'))
+        stream = current_app.config['ROOM_MANAGER'].subscribe(room_id, parse_last_seq(last_seq))
+        return Response(stream, headers=SSE_HEADERS)
+
+    app.register_blueprint(bp)
+
+
+def room_events_asgi(rooms):
+    """ASGI handler for GET /rooms/<room>/events: the room_events stream, served on the event loop."""
+    encoded_headers = [(k.lower().encode('latin1'), v.encode('latin1')) for k, v in SSE_HEADERS.items()]
+
+    async def respond_json(send, status, body):
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body', 'body': json.dumps(body).encode() + b'\n'})
+
+    async def handler(scope, receive, send):
+        if scope['method'] != 'GET':
+            await respond_json(send, 405, {"message": "Method not allowed", "error": True})
+            return
+        headers = dict(scope.get('headers', []))
+        last_seq = headers.get(b'last-event-id', b'').decode('latin1')
+        if not last_seq:
+            last_seq = parse_qs(scope.get('query_string', b'').decode('latin1')).get('after', ['0'])[0]
+        try:
+            stream = rooms.listen(scope['path'].split('/')[2], parse_last_seq(last_seq))
+        except RoomError as e:
+            await respond_json(send, e.status, {"message": str(e), "error": True})
+            return
+        await send_stream(stream, receive, send, headers=encoded_headers)
+    return handler
@@ -0,0 +1,176 @@
+"""Server-side game sessions keyed by an opaque session id.
+
+Only the id travels in the (signed) cookie. The game itself is stored compactly
+as the target's country index plus a bitmap of guessed country indices.
+"""
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 6 * 60 * 60  # seconds a game survives without activity
+DEFAULT_MAX_SESSIONS = 100000
+
+
+def new_session_id():
+    return secrets.token_urlsafe(16)
+
+
+class GameSession:
+    """One player's round: target country index and the set of guessed indices as a bitmap.
+
+    version is the id of the data version the indices refer to (see utils.data_versions).
+    """
+    __slots__ = ('target', 'guessed', 'guess_count', 'version')
+
+    def __init__(self, target, guessed=0, guess_count=0, version=''):
+        self.target = target
+        self.guessed = guessed
+        self.guess_count = guess_count
+        self.version = version
+
+    def has_guessed(self, index):
+        return bool(self.guessed >> index & 1)
+
+    def add_guess(self, index):
+        self.guessed |= 1 << index
+        self.guess_count += 1
+
+    def guessed_indices(self):
+        return [i for i in range(self.guessed.bit_length()) if self.guessed >> i & 1]
+
+
+class SessionStore:
+    """Interface for session backends. Sessions expire ttl seconds after their last put."""
+
+    def get(self, sid):
+        raise NotImplementedError
+
+    def put(self, sid, game):
+        raise NotImplementedError
+
+    def delete(self, sid):
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """In-process store: an LRU ordered by last write, capped at max_sessions."""
+
+    def __init__(self, ttl=DEFAULT_TTL, max_sessions=DEFAULT_MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # sid -> (expires, GameSession)
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._sessions[sid]
+                return None
+            game = entry[1]
+        return GameSession(game.target, game.guessed, game.guess_count, game.version)
+
+    def put(self, sid, game):
+        now = time.time()
+        with self._lock:
+            self._sessions[sid] = (now + self.ttl, GameSession(game.target, game.guessed, game.guess_count, game.version))
+            self._sessions.move_to_end(sid)
+            # Oldest writes are at the front, so expired and over-cap entries come off there
+            while self._sessions:
+                expires, _ = next(iter(self._sessions.values()))
+                if expires > now and len(self._sessions) <= self.max_sessions:
+                    break
+                self._sessions.popitem(last=False)
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Store in a local SQLite file, shared by every gunicorn worker on the host."""
+
+    PURGE_EVERY = 500  # puts between expiry/cap sweeps
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_sessions=DEFAULT_MAX_SESSIONS):
+        self.path = path
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._local = threading.local()
+        self._puts = 0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "sid TEXT PRIMARY KEY, target INTEGER NOT NULL, guessed BLOB NOT NULL, "
+            "guess_count INTEGER NOT NULL, expires REAL NOT NULL, version TEXT NOT NULL DEFAULT '')"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires)")
+        if 'version' not in [row[1] for row in conn.execute("PRAGMA table_info(sessions)")]:
+            try:
+                conn.execute("ALTER TABLE sessions ADD COLUMN version TEXT NOT NULL DEFAULT ''")
+            except sqlite3.OperationalError:
+                pass  # another worker added it first
+
+    def _conn(self):
+        # One connection per thread, reopened after a fork (gunicorn workers)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, sid):
+        row = self._conn().execute(
+            "SELECT target, guessed, guess_count, version FROM sessions WHERE sid = ? AND expires > ?",
+            (sid, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        return GameSession(row[0], int.from_bytes(row[1], 'little'), row[2], row[3])
+
+    def put(self, sid, game):
+        now = time.time()
+        guessed = game.guessed.to_bytes((game.guessed.bit_length() + 7) // 8, 'little')
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (sid, target, guessed, guess_count, expires, version) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (sid, game.target, guessed, game.guess_count, now + self.ttl, game.version),
+        )
+        self._puts += 1
+        if self._puts % self.PURGE_EVERY == 0:
+            self.purge(now)
+
+    def delete(self, sid):
+        self._conn().execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def purge(self, now=None):
+        """Drop expired sessions, then the least recently written ones above max_sessions."""
+        conn = self._conn()
+        conn.execute("DELETE FROM sessions WHERE expires <= ?", (now or time.time(),))
+        conn.execute(
+            "DELETE FROM sessions WHERE sid IN (SELECT sid FROM sessions ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        )
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def create_session_store(backend, path=None, ttl=DEFAULT_TTL, max_sessions=DEFAULT_MAX_SESSIONS):
+    """Session store for backend 'memory' or 'sqlite' (path required)."""
+    if backend == 'memory':
+        return MemorySessionStore(ttl=ttl, max_sessions=max_sessions)
+    if backend == 'sqlite':
+        return SQLiteSessionStore(path, ttl=ttl, max_sessions=max_sessions)
+    raise ValueError(f"Unknown session backend: {backend!r}")
@@ -1,17 +1,43 @@
 import os
-from flask import Flask, jsonify, request, session  # new import for session management
+from flask import Flask, g, jsonify, request, session  # new import for session management
 from flask_cors import CORS
-import pandas as pd
-import random
-from geopy.geocoders import Nominatim
-from fuzzywuzzy import process
-import numpy as np
-import math  # new import
-from functools import lru_cache  # new import
-import re  # new import for regular expression escaping
-from openai_hint import generate_hint  # New import
-from dotenv import load_dotenv
-load_dotenv()  # Add this near the top of the file, after imports
+import secrets
+import tempfile
+import datetime
+import atexit
+import math
+import threading
+import time
+import traceback
+from collections import namedtuple
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.wsgi import ClosingIterator
+from hints import HintService, StreamLimitError, create_hint_provider, fallback_hint
+from game.geo import CORRECT, GeoEngine
+from game.leaderboard import DEFAULT_SYNC_INTERVAL, PERIODS, Leaderboard
+from game.registry import CountryRegistry
+from game.rooms import DEFAULT_MAX_ROOMS, DEFAULT_ROOM_TTL, RoomManager, encode_event
+from game.similarity import MixSimilarity
+from game.spatial import SpatialIndex
+from game.timeseries import DEFAULT_MIN_COVERAGE, TimeSeriesIndex
+from game.round_pool import ENERGY_COLUMNS, RoundPool, parse_year_range
+from api.admission import DEFAULT_LIMITS, AdmissionControl, create_bucket_store, parse_limits
+from api.daily import DailyChallenges, seconds_until_midnight, utc_today
+from api.events import GUESS, START, WIN, EventLog
+from api.metrics import Metrics
+from api.response_cache import ResponseCache, encode_json, make_response
+from api.room_endpoints import register_room_endpoints
+from api.sessions import DEFAULT_MAX_SESSIONS, DEFAULT_TTL, GameSession, create_session_store, new_session_id
+from utils.data_versions import DEFAULT_KEEP, DataVersions
+from utils.profiler import SamplingProfiler
+from utils.shared_data import SHARED_DATA_ENV, load_shared_data, read_coordinates
+from utils.snapshot import load_energy_data
+from utils.typeahead import SuggestionIndex
+try:
+    from dotenv import load_dotenv
+    load_dotenv()  # Add this near the top of the file, after imports
+except ImportError:  # python-dotenv is optional, it only reads a local .env file
+    pass
 
 DEBUG = False  # disable debug logs in production
 
@@ -36,29 +62,54 @@ CORS(app, resources={
     }
 })
 
+# Request and helper timings for /metrics; set METRICS_DIR to aggregate across gunicorn workers
+METRICS = Metrics(os.environ.get('METRICS_DIR'))
+
+# Opt-in sampling profiler (ENABLE_PROFILER=1 exposes /debug/profile/start and /stop to ADMIN_TOKEN holders)
+PROFILER = SamplingProfiler(float(os.environ.get('PROFILER_INTERVAL', 0.01))) if os.environ.get('ENABLE_PROFILER') == '1' else None
+
 # Simple in-memory storage
 current_game = {
     'country': None,
     'data': None
 }
 
+DEFAULT_YEAR = 2020  # year used by /start_game when none is requested
+
 # Update CSV path handling
 CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'owid-energy-data.csv')
 
-# Load data
-df = pd.read_csv(CSV_PATH)
+# Column-pruned binary snapshot of CSV_PATH, built by scripts/build_snapshot.py
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'owid-energy-data.snapshot')
 
 # Load hardcoded coordinates CSV once at module level
 COORDINATES_CSV = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'coordinates_all_countries.csv')
-if not os.path.exists(COORDINATES_CSV):
-    raise FileNotFoundError(f"File not found: {COORDINATES_CSV}. Please run collect_coordinates.py to generate it.")
-coords_df = pd.read_csv(COORDINATES_CSV)
-COUNTRY_COORDINATES = {row['country']: (float(row['latitude']), float(row['longitude'])) for _, row in coords_df.iterrows() if pd.notna(row['latitude']) and pd.notna(row['longitude'])}
+
+# Everything derived from the data files is one GameData version in DATA (end of this file).
+# WARMUP=sync (default) loads it during import, so with PRELOAD_APP=1 the gunicorn master loads
+# once before forking. WARMUP=background returns from the import at once and loads in a thread;
+# until it is done every route but /ready and /metrics answers 503 with Retry-After.
+WARMUP = os.environ.get('WARMUP', 'sync')
+if WARMUP not in ('sync', 'background'):
+    raise ValueError(f"Unknown WARMUP {WARMUP!r}, expected 'sync' or 'background'")
+
+def retry_later(message):
+    """503 with Retry-After, for requests that will succeed in a moment"""
+    response = jsonify({"message": message, "error": True})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+class DataUpdating(Exception):
+    """The game was started on a data version this worker is still building"""
+
+@app.errorhandler(DataUpdating)
+def data_updating(e):
+    return retry_later("The game data is being updated, please retry.")
 
 # Helper functions
 def get_country_coordinates(country):
     # Only return coordinates for an exact match
-    coords = COUNTRY_COORDINATES.get(country)
+    coords = DATA.current.coordinates.get(country)
     if coords is None:
         debug_print(f"No exact match found for {country}")
         return None
@@ -70,257 +121,299 @@ def get_country_coordinates(country):
         debug_print(f"Error casting coordinates for {country}: {e}")
         return None
 
-def haversine_distance(coord1, coord2):
-    # Coordinates in decimal degrees (lat, lon)
-    lat1, lon1 = coord1
-    lat2, lon2 = coord2
-    # convert decimal degrees to radians 
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    # haversine formula 
-    dlat = lat2 - lat1 
-    dlon = lon2 - lon1 
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a)) 
-    r = 6371 # Radius of Earth in kilometers
-    return c * r
-
-def get_direction_hint(guess_coords, correct_coords):
-    # Validate returned coordinates
-    coord1 = validate_coordinates_from_coords(guess_coords)
-    coord2 = validate_coordinates_from_coords(correct_coords)
-    # Using bearing calculation for precision.
-    bearing = get_bearing(coord1, coord2)
-    cardinal = get_cardinal(bearing)
-    distance = haversine_distance(coord1, coord2)
-    debug_print(f"Bearing: {bearing:.2f}°, Direction: {cardinal}, Distance: {distance:.0f} km")
+@METRICS.timed('get_direction_hint')
+def get_direction_hint(guess_index, target_index, data=None):
+    """Cardinal direction and distance (km) from the guess to the target, by registry id of data (default current)"""
+    cardinal, distance = (data or DATA.current).geo.hint(guess_index, target_index)
+    debug_print(f"Direction: {cardinal}, Distance: {distance:.0f} km")
     return cardinal, distance
 
-def get_best_match(user_input, country_list):
-    match, score = process.extractOne(user_input, country_list)
-    return match if score > 80 else None
-
-def filter_countries(df):
-    exclusions = [
-        "World", "Europe", "Asia", "Africa", "OECD", "G20", "G7",
-        "Non-OECD", "OPEC", "Middle East", "North America", "South America",
-        "Central America", "Ember", "EIA", "EI", "Oceania", "Lower-middle-income countries",
-        "Latin America and Caribbean (Ember)", "Low-income countries", "Palestine", 
-        "Niue", "Antarctica", "High-income countries", "Netherlands Antilles", "Upper-middle-income countries"
-    ]
-    pattern = "|".join([re.escape(exclusion) for exclusion in exclusions])
-    return df[~df['country'].str.contains(pattern, na=False)]
-
-def get_random_country_energy():
-    debug_print("Available columns:", df.columns.tolist())  # Debug print
-    
-    df_year = df[df['year'] == 2020]
-    df_year = filter_countries(df_year)
-    
-    # Update column names to match the CSV file with new values
-    energy_columns = [
-        'country',
-        'electricity_generation',
-        'coal_electricity',
-        'gas_electricity',
-        'oil_electricity',
-        'hydro_electricity',
-        'nuclear_electricity',
-        'solar_electricity',
-        'wind_electricity',
-        'biofuel_electricity',
-        'other_renewable_electricity',  # new column added
-    ]
-    
-    # Check that all required columns exist
-    available_columns = df_year.columns.tolist()
-    for col in energy_columns:
-        if col not in available_columns:
-            debug_print(f"Missing column: {col}")
-    
-    # Drop rows where electricity_generation is 0.000
-    df_year = df_year[df_year['electricity_generation'] != 0.000]
-    df_year = df_year[energy_columns]
-    df_year = df_year.dropna(subset=['electricity_generation'])
-    
-    random_country = random.choice(df_year['country'].dropna().unique())
-    country_data = df_year[df_year['country'] == random_country].iloc[0].to_dict()
-    
-    # Prepare the cleaned data for the frontend with updated column names
-    # Compute Other Renewables = other_renewable_electricity - biofuel_electricity
-    double_val = (
-        (float(country_data['other_renewable_electricity']) if pd.notna(country_data['other_renewable_electricity']) else 0)
-        - (float(country_data['biofuel_electricity']) if pd.notna(country_data['biofuel_electricity']) else 0)
-    )
-    other_renewables = max(0, double_val)
-    
-    cleaned_data = {
-        'country': str(country_data['country']),
-        # Use the original "electricity_generation" from the CSV
-        'electricity_generation': float(country_data['electricity_generation']),
-        'electricity_shares': {
-            'Coal': float(country_data['coal_electricity'] if pd.notna(country_data['coal_electricity']) else 0),
-            'Gas': float(country_data['gas_electricity'] if pd.notna(country_data['gas_electricity']) else 0),
-            'Oil': float(country_data['oil_electricity'] if pd.notna(country_data['oil_electricity']) else 0),
-            'Hydro': float(country_data['hydro_electricity'] if pd.notna(country_data['hydro_electricity']) else 0),
-            'Nuclear': float(country_data['nuclear_electricity'] if pd.notna(country_data['nuclear_electricity']) else 0),
-            'Solar': float(country_data['solar_electricity'] if pd.notna(country_data['solar_electricity']) else 0),
-            'Wind': float(country_data['wind_electricity'] if pd.notna(country_data['wind_electricity']) else 0),
-            'Biofuel': float(country_data['biofuel_electricity'] if pd.notna(country_data['biofuel_electricity']) else 0),
-            'Geothermal': other_renewables,
-        }
-    }
-
+@METRICS.timed('get_random_country_energy')
+def get_random_country_energy(year_from=DEFAULT_YEAR, year_to=DEFAULT_YEAR):
+    """Pick a random country from the precomputed round pool"""
+    round_ = DATA.current.round_pool.pick(year_from, year_to)
+    cleaned_data = dict(round_.payload, country=round_.country)
     return cleaned_data['country'], cleaned_data
 
-@lru_cache(maxsize=1)
 def get_available_countries():
-    """Get filtered list of valid countries"""
-    df_year = df[df['year'] == 2020]
-    df_year = filter_countries(df_year)
-    return sorted(df_year['country'].unique().tolist())
+    """Get filtered list of valid countries (of the current data version)"""
+    return DATA.current.countries
+
+def get_fallback_hint(country):
+    """Hint derived from the country's energy data, used when the AI hint is too slow"""
+    round_ = DATA.current.round_pool.find(country, DEFAULT_YEAR)
+    return fallback_hint(round_.payload if round_ else None)
+
+# Cached AI hints, pre-generated for upcoming rounds.
+# HINT_PROVIDER=openai (default) or stub; HINT_BUDGET is the max seconds /hint waits.
+# HINT_STREAM_MAX caps concurrent /hint/stream responses per process.
+HINT_WARM_AHEAD = int(os.environ.get('HINT_WARM_AHEAD', 2))
+hint_provider = create_hint_provider(os.environ.get('HINT_PROVIDER', 'openai'), float(os.environ.get('HINT_STUB_DELAY', 0)),
+                                     float(os.environ.get('HINT_STUB_TOKEN_DELAY', 0)))
+hint_provider.generate = METRICS.timed('generate_hint')(hint_provider.generate)
+HINTS = HintService(
+    hint_provider,
+    fallback=get_fallback_hint,
+    ttl=int(os.environ.get('HINT_TTL', 24 * 60 * 60)),
+    budget=float(os.environ.get('HINT_BUDGET', 3)),
+    workers=int(os.environ.get('HINT_WORKERS', 4)),
+    max_streams=int(os.environ.get('HINT_STREAM_MAX', 32)),
+    on_stat=lambda stat: METRICS.inc('hint_cache_total', (('result', stat),)),
+)
+
+# Game state lives server-side; the cookie only carries the session id.
+# SESSION_BACKEND=sqlite (default, shared by all gunicorn workers) or memory (single process)
+SESSION_STORE = create_session_store(
+    os.environ.get('SESSION_BACKEND', 'sqlite'),
+    path=os.environ.get('SESSION_DB_PATH', os.path.join(tempfile.gettempdir(), 'energy-game-sessions.sqlite3')),
+    ttl=int(os.environ.get('SESSION_TTL', DEFAULT_TTL)),
+    max_sessions=int(os.environ.get('SESSION_MAX', DEFAULT_MAX_SESSIONS)),
+)
+
+# Gameplay events are buffered in memory and flushed in batches by a background thread
+# to EVENTS_DB_PATH (SQLite, shared by all gunicorn workers); /stats reads the aggregates.
+EVENTS = EventLog(
+    os.environ.get('EVENTS_DB_PATH', os.path.join(tempfile.gettempdir(), 'energy-game-events.sqlite3')),
+    interval=float(os.environ.get('EVENTS_FLUSH_INTERVAL', 2)),
+    on_stat=lambda stat, count: METRICS.inc('events_total', (('result', stat),), count),
+)
+EVENTS.start()
+atexit.register(EVENTS.stop)
+STATS_MAX_AGE = int(os.environ.get('STATS_MAX_AGE', 10))
+
+# Leaderboards: scores live in the SQLite file LEADERBOARD_PATH, shared by every worker on the host.
+# Each worker ranks from memory and picks up other workers' wins every LEADERBOARD_SYNC_INTERVAL seconds.
+# Players are identified by a long-lived id in the session cookie.
+LEADERBOARD_PATH = os.environ.get('LEADERBOARD_PATH', os.path.join(tempfile.gettempdir(), 'energy-game-leaderboard.sqlite3'))
+LEADERBOARD = Leaderboard(LEADERBOARD_PATH,
+                          sync_interval=float(os.environ.get('LEADERBOARD_SYNC_INTERVAL', DEFAULT_SYNC_INTERVAL)))
+MAX_LEADERBOARD = 100
+MAX_NAME_LENGTH = 20
+
+def player_id():
+    """The player's id from the session cookie, created on first use"""
+    if 'player' not in session:
+        session['player'] = new_session_id()
+    return session['player']
+
+# Multiplayer rooms (per process): state changes fan out to players over Server-Sent Events
+# A room's target is (data version, registry id), so a started round survives a data reload
+ROOMS = RoomManager(
+    score=lambda guess_id, target: get_direction_hint(guess_id, target[1], DATA.get(target[0])),
+    correct=CORRECT,
+    ttl=int(os.environ.get('ROOM_TTL', DEFAULT_ROOM_TTL)),
+    max_rooms=int(os.environ.get('ROOM_MAX', DEFAULT_MAX_ROOMS)),
+)
+app.config.update(ROOM_MANAGER=ROOMS, DEFAULT_YEAR=DEFAULT_YEAR)
+register_room_endpoints(app)
+
+def get_game_session():
+    """(session id, GameSession, GameData of the game) for the current request, or (None, None, None)
+    if there is no active game. Raises DataUpdating while this worker builds the game's data version."""
+    sid = session.get('sid')
+    game = SESSION_STORE.get(sid) if sid else None
+    data = DATA.get(game.version) if game is not None else None
+    if game is not None and data is None and DATA.check():
+        # Started on a newer version that another worker already loaded
+        raise DataUpdating()
+    if data is None:
+        METRICS.inc('session_misses_total')
+        return None, None, None
+    return sid, game, data
+
+# Pre-encoded bodies for responses that only change on deploy, served with ETag/304 and gzip
+STATIC_CACHE_CONTROL = f"public, max-age={int(os.environ.get('STATIC_MAX_AGE', 3600))}"
+RESPONSE_CACHE = ResponseCache(on_stat=lambda stat: METRICS.inc('response_cache_total', (('result', stat),)))
 
 @app.route('/debug/countries', methods=['GET'])
 def list_countries():
     """Debug endpoint to view all available countries"""
-    countries = get_available_countries()
-    debug_print("Available countries:", countries)
-    return jsonify({
-        "count": len(countries),
-        "countries": countries
-    })
+    data = DATA.current
+
+    def build():
+        countries = data.countries
+        debug_print("Available countries:", countries)
+        return {
+            "count": len(countries),
+            "countries": countries
+        }
+    encoded = RESPONSE_CACHE.get(('countries', data.version), build, STATIC_CACHE_CONTROL)
+    return make_response(encoded, request, app.response_class)
 
-# Modified get_country_suggestions to use the same filtered list
-def get_country_suggestions(prefix):
+DEFAULT_SUGGESTIONS = 3
+MAX_SUGGESTIONS = 20
+
+@METRICS.timed('get_country_suggestions')
+def get_country_suggestions(prefix, limit=DEFAULT_SUGGESTIONS, fuzzy=True, data=None):
     if not prefix:
         return []
-    valid_countries = get_available_countries()  # Use filtered list
-    matching = [
-        country for country in valid_countries 
-        if country.lower().startswith(prefix.lower())
-    ]
-    return sorted(matching)[:3]
+    return list((data or DATA.current).suggestions.suggest(prefix, limit, fuzzy))
 
 @app.route('/suggestions', methods=['GET'])
 def suggestions():
     prefix = request.args.get('prefix', '')
-    suggestions = get_country_suggestions(prefix)
-    return jsonify(suggestions)
+    # Optional ?limit=N (top-k, capped at MAX_SUGGESTIONS) and ?fuzzy=0 to disable typo tolerance
+    limit = request.args.get('limit', DEFAULT_SUGGESTIONS, type=int)
+    limit = min(max(limit, 1), MAX_SUGGESTIONS)
+    fuzzy = request.args.get('fuzzy', '1') not in ('0', 'false')
+    data = DATA.current
+    encoded = RESPONSE_CACHE.get(('suggestions', data.version, prefix, limit, fuzzy),
+                                 lambda: get_country_suggestions(prefix, limit, fuzzy, data), STATIC_CACHE_CONTROL)
+    return make_response(encoded, request, app.response_class)
+
+def pick_round(data, year, difficulty):
+    """Round for /start_game's ?year= and ?difficulty=. Raises ValueError or LookupError."""
+    year_from, year_to = parse_year_range(year) if year else (DEFAULT_YEAR, DEFAULT_YEAR)
+    if not difficulty:
+        return data.round_pool.pick(year_from, year_to), year_from, year_to
+    if (year_from, year_to) != (DEFAULT_YEAR, DEFAULT_YEAR):
+        raise ValueError(f"Difficulty levels are only available for {DEFAULT_YEAR}")
+    round_ = data.round_pool.find(data.registry.name(data.similarity.pick(difficulty)), DEFAULT_YEAR)
+    return round_, year_from, year_to
 
 # API Endpoints
 @app.route('/start_game', methods=['GET'])
 def start_game():
     debug_print("Start game endpoint called")
-    # Use session to isolate game state per user.
-    session['guesses'] = []
-    # Select and validate a target country.
-    country, country_data = get_random_country_energy()  # existing random selection
-    session['target_country'] = country  # Save target in session
-    # Remove the country from the data to hide actual answer
-    if 'country' in country_data:
-        del country_data['country']
-    debug_print(f"Selected country: {country}")
+    # Optional ?year=2015 or ?year=2000-2010, defaults to DEFAULT_YEAR
+    year = request.args.get('year', '').strip()
+    # Optional ?difficulty=easy|medium|hard: hard targets have many near-identical mixes
+    difficulty = request.args.get('difficulty', '').strip().lower()
+    data = DATA.current
+    try:
+        round_, year_from, year_to = pick_round(data, year, difficulty)
+    except (ValueError, LookupError) as e:
+        return jsonify({"message": str(e), "error": True}), 400
+    # Use a fresh server-side session per game to isolate state per user.
+    old_sid = session.get('sid')
+    if old_sid:
+        SESSION_STORE.delete(old_sid)
+    sid = new_session_id()
+    target = data.registry.ids[round_.country]
+    SESSION_STORE.put(sid, GameSession(target, version=data.version))
+    session['sid'] = sid
+    EVENTS.record(sid, START, data.event_ids[target])
+    # Warm hints for this round and the next ones the pool will hand out
+    HINTS.warm([round_.country] + data.round_pool.upcoming(year_from, year_to, HINT_WARM_AHEAD))
+    debug_print(f"Selected country: {round_.country} ({round_.year})")
+    # energy_data is pre-encoded in the pool and never contains the country name
+    body = '{"energy_data":%s,"message":"Guess the country!","year":%d}\n' % (round_.energy_json, round_.year)
+    return app.response_class(body, mimetype='application/json')
+
+def daily_cache_control():
+    """Daily responses stay fresh until the next midnight UTC"""
+    return f"public, max-age={seconds_until_midnight()}"
+
+@app.route('/daily', methods=['GET'])
+def daily_challenge():
+    return make_response(DATA.current.daily.get().start, request, app.response_class, daily_cache_control())
+
+@app.route('/daily/guess', methods=['GET'])
+def daily_guess():
+    # ?guess=Norway, and optionally ?date= from /daily so a game started before midnight keeps its target
+    today = utc_today()
+    date = request.args.get('date', today.isoformat())
+    if date not in (today.isoformat(), (today - datetime.timedelta(days=1)).isoformat()):
+        return jsonify({"message": "Only today's and yesterday's challenges can be played.", "error": True}), 400
+    data = DATA.current
+    guess_id = data.registry.resolve(request.args.get('guess', ''))
+    if guess_id is None:
+        return jsonify({"message": "Invalid country. Please select from the suggestions.", "error": True}), 400
+    daily = data.daily.get(datetime.date.fromisoformat(date))
+    return make_response(daily.guesses[guess_id], request, app.response_class, daily_cache_control())
+
+# TIMESERIES_MIN_COVERAGE is the share of the requested years a target must have data for
+TIMESERIES_MIN_COVERAGE = float(os.environ.get('TIMESERIES_MIN_COVERAGE', DEFAULT_MIN_COVERAGE))
+
+@app.route('/start_timeseries', methods=['GET'])
+def start_timeseries():
+    """Start a round showing the target's electricity mix over ?years=2000-2022 (optional ?min_coverage=0.8)"""
+    data = DATA.current
+    try:
+        year_from, year_to = parse_year_range(request.args.get('years', '2000-2022'))
+        min_coverage = request.args.get('min_coverage', TIMESERIES_MIN_COVERAGE, type=float)
+        if not 0 <= min_coverage <= 1:
+            raise ValueError("min_coverage must be between 0 and 1")
+        target = data.timeseries.pick(year_from, year_to, min_coverage)
+    except (ValueError, LookupError) as e:
+        return jsonify({"message": str(e), "error": True}), 400
+    old_sid = session.get('sid')
+    if old_sid:
+        SESSION_STORE.delete(old_sid)
+    sid = new_session_id()
+    SESSION_STORE.put(sid, GameSession(target, version=data.version))
+    session['sid'] = sid
+    EVENTS.record(sid, START, data.event_ids[target])
+    HINTS.warm([data.registry.name(target)])
     return jsonify({
-        "energy_data": country_data,
-        "message": "Guess the country!"
+        "energy_data": data.timeseries.payload(target, year_from, year_to),
+        "message": "Guess the country from its energy trend!",
+        "year_from": year_from,
+        "year_to": year_to
     })
 
 def is_valid_country(country):
-    """Check if country is in the filtered list"""
+    """Check if country is a playable country or one of its aliases"""
     if not country:
         return False
-    valid_countries = get_available_countries()  # Use same filtered list
-    return country in valid_countries
-
-# NEW: Coordinate validation helper
-def validate_coordinates(country: str):
-    coords = get_country_coordinates(country)
-    if coords is None:
-        raise ValueError(f"Coordinates not found for {country}")
-    lat, lon = coords
-    assert -90 <= lat <= 90, f"Invalid latitude for {country}"
-    assert -180 <= lon <= 180, f"Invalid longitude for {country}"
-    return (lat, lon)
-
-# NEW: Bearing calculation helper
-def get_bearing(coord1, coord2):
-    lat1, lon1 = map(math.radians, coord1)
-    lat2, lon2 = map(math.radians, coord2)
-    delta_lon = lon2 - lon1
-    x = math.sin(delta_lon) * math.cos(lat2)
-    y = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(delta_lon)
-    bearing = math.degrees(math.atan2(x, y))
-    return (bearing + 360) % 360
-
-def get_cardinal(bearing_degrees):
-    directions = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
-    return directions[round(bearing_degrees / 45) % 8]
-
-# Helper to ensure coordinates are tuples from validate_coordinates if already valid.
-def validate_coordinates_from_coords(coords):
-    if coords is None:
-        return (0, 0)
-    lat, lon = coords
-    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
-        raise ValueError("Coordinate out of bounds.")
-    return (lat, lon)
+    return country in DATA.current.registry
 
 @app.route('/guess', methods=['POST'])
 def guess():
     try:
         debug_print("Guess endpoint called")
-        correct_country = session.get('target_country')
-        if not correct_country:
+        sid, game, game_data = get_game_session()
+        if game is None:
             return jsonify({
                 "message": "No active game session. Please start a new game.",
                 "error": True
             }), 400
+        # Names resolve against the data version the game started on
+        registry = game_data.registry
+        correct_country = registry.name(game.target)
         data = request.get_json()
         if not data or 'guess' not in data:
             return jsonify({
                 "message": "Invalid guess format",
-                "error": True,
-                "target": correct_country
+                "error": True
             }), 400
-        user_guess = data['guess']
-        if 'guesses' not in session:
-            session['guesses'] = []
-        if any(user_guess.lower() == g.lower() for g in session['guesses']):
+        guess_id = registry.resolve(data['guess'])
+        if guess_id is None:
             return jsonify({
-                "message": "Country already guessed. Please select a new country.",
-                "error": True,
-                "target": correct_country
+                "message": "Invalid country. Please select from the suggestions.",
+                "error": True
             }), 400
-        session['guesses'].append(user_guess)
-        session.modified = True
-        if not is_valid_country(user_guess):
+        if game.has_guessed(guess_id):
             return jsonify({
-                "message": "Invalid country. Please select from the suggestions.",
-                "error": True,
-                "target": correct_country
+                "message": "Country already guessed. Please select a new country.",
+                "error": True
             }), 400
-        
-        guess_coords = get_country_coordinates(user_guess)
-        correct_coords = get_country_coordinates(correct_country)
-        if guess_coords and correct_coords:
-            hint, distance = get_direction_hint(guess_coords, correct_coords)
-            if hint == "Correct":
-                return jsonify({
-                    "message": "Correct! You've guessed the country!",
-                    "target": correct_country,
-                    "game_over": True
-                })
-            else:
-                return jsonify({
-                    "message": f"Try looking {hint}. Distance: {distance:,.0f} km.",
-                    "target": correct_country,
-                    "game_over": False
-                })
-        else:
+        game.add_guess(guess_id)
+        SESSION_STORE.put(sid, game)
+
+        # Every registry country has coordinates, and the geo tables are indexed by registry id
+        hint, distance = get_direction_hint(guess_id, game.target, game_data)
+        EVENTS.record(sid, WIN if hint == CORRECT else GUESS, game_data.event_ids[game.target],
+                      game_data.event_ids[guess_id], game.guess_count, 0.0 if hint == CORRECT else distance)
+        if hint == CORRECT:
+            # The target is only revealed here: any earlier response naming it would make wins free
+            points = LEADERBOARD.record_win(player_id(), game.guess_count)
             return jsonify({
-                "message": "Unable to determine direction. Please try another country.",
+                "message": "Correct! You've guessed the country!",
                 "target": correct_country,
-                "game_over": False
+                "game_over": True,
+                "points": points
             })
+        else:
+            # rank 1 means no other country is closer to the target than this guess
+            return jsonify({
+                "message": f"Try looking {hint}. Distance: {distance:,.0f} km.",
+                "game_over": False,
+                "rank": game_data.spatial.rank(guess_id, game.target),
+                "proximity_percentile": round(game_data.spatial.proximity_percentile(guess_id, game.target), 1)
+            })
+    except DataUpdating:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -333,22 +426,311 @@ def guess():
 
 @app.route('/hint', methods=['GET'])
 def hint():
-    guess = request.args.get('guess', '').strip()
-    correct_country = session.get('target_country')
-    if not correct_country:
+    _, game, data = get_game_session()
+    if game is None:
         return jsonify({"message": "No active game session."}), 400
-    if not guess:
-        guess = f"Provide a hint on {correct_country}"
-    debug_print(f"Using prompt: {guess}")
-    ai_hint = generate_hint(guess, correct_country)
+    correct_country = data.registry.name(game.target)
+    # The hint only depends on the target, so it is served from HINTS' cache when possible
+    ai_hint = HINTS.get(correct_country)
     debug_print(f"Generated hint: {ai_hint}")
     return jsonify({"message": ai_hint})
 
+@app.route('/hint/stream', methods=['GET'])
+def hint_stream():
+    """/hint as Server-Sent Events: token events while the provider generates, then done (or fallback)"""
+    _, game, data = get_game_session()
+    if game is None:
+        return jsonify({"message": "No active game session."}), 400
+    try:
+        stream = HINTS.stream(data.registry.name(game.target))
+    except StreamLimitError:
+        return retry_later("Too many hint streams, please retry.")
+
+    def events():
+        for seq, (kind, text) in enumerate(stream, 1):
+            yield encode_event(seq, kind, {"text": text})
+
+    # The server closes the response when the client goes away, which closes the stream and aborts the provider call
+    return app.response_class(ClosingIterator(events(), stream.close), mimetype='text/event-stream',
+                              headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+MAX_NEIGHBOUR_HINTS = 5
+
+@app.route('/hint/neighbours', methods=['GET'])
+def neighbours_hint():
+    """Hint tier naming the countries closest to the target (?k=3, at most MAX_NEIGHBOUR_HINTS)"""
+    _, game, data = get_game_session()
+    if game is None:
+        return jsonify({"message": "No active game session."}), 400
+    k = min(max(request.args.get('k', 3, type=int), 1), MAX_NEIGHBOUR_HINTS)
+    neighbours = [data.registry.name(i) for i, _ in data.spatial.nearest(game.target, k)]
+    listed = neighbours[0] if len(neighbours) == 1 else f"{', '.join(neighbours[:-1])} and {neighbours[-1]}"
+    return jsonify({"message": f"Its nearest neighbours include {listed}.", "neighbours": neighbours})
+
+MAX_SIMILAR_HINTS = 5
+
+@app.route('/hint/similar', methods=['GET'])
+def similar_hint():
+    """Hint tier naming the countries whose DEFAULT_YEAR mix is closest to the target's (?k=3)"""
+    _, game, data = get_game_session()
+    if game is None:
+        return jsonify({"message": "No active game session."}), 400
+    k = min(max(request.args.get('k', 3, type=int), 1), MAX_SIMILAR_HINTS)
+    similar = [data.registry.name(i) for i, _ in data.similarity.most_similar(game.target, k)]
+    if not similar:
+        return jsonify({"message": "No similar energy mixes are known for this country.", "similar": []})
+    listed = similar[0] if len(similar) == 1 else f"{', '.join(similar[:-1])} and {similar[-1]}"
+    return jsonify({"message": f"Its energy mix is most similar to {listed}.", "similar": similar})
+
+@app.route('/leaderboard', methods=['GET'])
+def leaderboard():
+    """Top players of ?period=daily|weekly|alltime (default daily), ?limit=50, and the caller's own rank"""
+    period = request.args.get('period', 'daily')
+    if period not in PERIODS:
+        return jsonify({"message": f"Unknown period, expected one of {', '.join(PERIODS)}", "error": True}), 400
+    limit = min(max(request.args.get('limit', 50, type=int), 1), MAX_LEADERBOARD)
+    top = [{"rank": rank, "name": name, "score": score} for rank, _, name, score in LEADERBOARD.top(period, limit)]
+    player = session.get('player')
+    mine = LEADERBOARD.rank(period, player) if player else None
+    return jsonify({
+        "period": period,
+        "players": LEADERBOARD.size(period),
+        "top": top,
+        "you": {"rank": mine[0], "score": mine[1], "name": LEADERBOARD.display_name(player)} if mine else None
+    })
+
+@app.route('/leaderboard/name', methods=['POST'])
+def leaderboard_name():
+    """Set the caller's display name with {"name": "..."}"""
+    data = request.get_json(silent=True) or {}
+    name = str(data.get('name', '')).strip()
+    if not name or len(name) > MAX_NAME_LENGTH:
+        return jsonify({"message": f"Names are 1 to {MAX_NAME_LENGTH} characters long.", "error": True}), 400
+    LEADERBOARD.set_name(player_id(), name)
+    return jsonify({"message": "Name saved.", "name": name})
+
+stats_response = (None, None)  # (summary, EncodedResponse)
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Per-country difficulty and guess distributions from the event aggregates, at most STATS_MAX_AGE seconds old"""
+    global stats_response
+    summary = EVENTS.summary(max_age=STATS_MAX_AGE)
+    # Encoded once per summary: the same object is returned until it is recomputed
+    if stats_response[0] is not summary:
+        stats_response = (summary, encode_json(summary, f"public, max-age={STATS_MAX_AGE}"))
+    return make_response(stats_response[1], request, app.response_class)
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint"""
+    return app.response_class(METRICS.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/debug/profile/<action>', methods=['POST'])
+def profile(action):
+    """Start or stop the sampling profiler of the worker that serves the request; stop returns collapsed stacks.
+    Admins only, like the /admin routes: stacks name internal modules and sampling slows the worker down"""
+    if PROFILER is None or action not in ('start', 'stop') or not is_admin():
+        return jsonify({"message": "Not found", "error": True}), 404
+    if action == 'start':
+        PROFILER.reset()
+        PROFILER.start()
+        return jsonify({"message": "Profiler started"})
+    PROFILER.stop()
+    return app.response_class(PROFILER.collapsed(), mimetype='text/plain')
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once the game data is loaded, 503 while it is loading or if loading failed"""
+    data = DATA.current
+    if data is None:
+        return jsonify({"ready": False, "error": repr(DATA.error) if DATA.error else None}), 503
+    return jsonify({"ready": True, "version": data.version, "source": data.load_report.source,
+                    "load_seconds": round(data.load_report.seconds, 3)})
+
+# Everything the game routes read, built from one version of the data files. Routes take
+# DATA.current once per request; games keep the version they started on (see get_game_session).
+GameData = namedtuple('GameData', ['version', 'frame', 'coordinates', 'load_report', 'registry', 'countries', 'geo',
+                                   'spatial', 'round_pool', 'suggestions', 'similarity', 'daily', 'timeseries',
+                                   'event_ids'])
+
+def build_game_data(version, previous=None):
+    """Load the energy data and coordinates and build every index the game routes read.
+    Parts whose inputs did not change since previous are reused instead of rebuilt."""
+    # Data published by the gunicorn master (SHARED_DATA=1, see gunicorn.conf.py) is mapped, not loaded;
+    # it is what the master loaded at start-up, so reloads read the files
+    shared_data_dir = os.environ.get(SHARED_DATA_ENV)
+    if shared_data_dir and previous is None:
+        df, coordinates, load_report = load_shared_data(shared_data_dir)
+    else:
+        # Load data (snapshot when it matches the CSV, otherwise the CSV itself)
+        df, load_report = load_energy_data(CSV_PATH, SNAPSHOT_DIR, ENERGY_COLUMNS)
+        if not os.path.exists(COORDINATES_CSV):
+            raise FileNotFoundError(f"File not found: {COORDINATES_CSV}. Please run collect_coordinates.py to generate it.")
+        coordinates = read_coordinates(COORDINATES_CSV)
+    print(f"Loaded energy data from {load_report.source} in {load_report.seconds * 1000:.0f} ms "
+          f"({load_report.frame_bytes / 2**20:.1f} MB frame, RSS +{load_report.rss_delta_bytes / 2**20:.1f} MB)")
+    # Playable countries with integer ids; names and aliases resolve in O(1)
+    registry = CountryRegistry.from_frame(df, coordinates, DEFAULT_YEAR)
+    countries = list(registry.names)
+    if previous is not None and previous.countries == countries and previous.coordinates == coordinates:
+        # Same countries at the same places: the geometry and the typeahead are unchanged
+        geo, spatial, suggestions = previous.geo, previous.spatial, previous.suggestions
+    else:
+        # All-pairs distance/direction tables shared by every guess path, indexed by registry id
+        geo = GeoEngine(coordinates, names=registry.names)
+        # Ball tree over the same ids for nearest-neighbour hints and proximity ranks
+        spatial = SpatialIndex(geo.lat, geo.lon)
+        # Typeahead over the same filtered list: prefix hits first, n-gram fuzzy fallback
+        suggestions = SuggestionIndex(countries)
+    # Every playable (country, year) round, so /start_game is a random index; rows that did not
+    # change since the previous version keep their encoded payload
+    round_pool = RoundPool.from_frame(df, allowed=countries, previous=previous.round_pool if previous else None)
+    # Energy-mix similarity of the DEFAULT_YEAR rounds: difficulty tiers and the similar-mix hint
+    similarity = MixSimilarity.from_frame(df, registry.names, DEFAULT_YEAR)
+    # Daily challenge: same target for everyone per UTC date, every response pre-encoded; a reload keeps
+    # today's and yesterday's targets
+    daily = DailyChallenges(registry, round_pool, lambda target: geo.score(range(len(geo)), target), CORRECT,
+                            DEFAULT_YEAR, previous=previous.daily if previous else None)
+    # Multi-year trends: rows sorted by (country id, year) so any range is a zero-copy slice
+    timeseries = TimeSeriesIndex(df, registry.names)
+    # Registry id -> event log country id, which stays the same when a reload renumbers the registry
+    event_ids = EVENTS.country_ids(countries)
+    return GameData(version, df, coordinates, load_report, registry, countries, geo, spatial, round_pool,
+                    suggestions, similarity, daily, timeseries, event_ids)
+
+# Hot reload: DATA_WATCH_INTERVAL seconds between checks of the data files (0 turns watching off;
+# POST /admin/reload still works). A change is built in the background and swapped in atomically.
+# DATA_KEEP versions stay in memory for games started before a reload, at most SESSION_TTL seconds.
+DATA = DataVersions(
+    build_game_data,
+    [CSV_PATH, COORDINATES_CSV],
+    keep=int(os.environ.get('DATA_KEEP', DEFAULT_KEEP)),
+    retain=int(os.environ.get('SESSION_TTL', DEFAULT_TTL)),
+    on_stat=lambda result: METRICS.inc('data_reloads_total', (('result', result),)),
+)
+app.config['GAME_DATA'] = DATA
+DATA_WATCH_INTERVAL = float(os.environ.get('DATA_WATCH_INTERVAL', 30))
+
+def warm_up():
+    """Load the first data version and start watching the files. In the background thread a
+    failure is kept in DATA.error for /ready instead of raised."""
+    try:
+        DATA.load()
+    except Exception:
+        if WARMUP != 'background':
+            raise
+        traceback.print_exc()
+        return
+    if DATA_WATCH_INTERVAL > 0:
+        DATA.start(DATA_WATCH_INTERVAL)
+
+def start_warm_up():
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+atexit.register(DATA.stop)
+if WARMUP == 'background':
+    start_warm_up()
+    if hasattr(os, 'register_at_fork'):
+        # A worker forked from a master that was still loading would otherwise never become ready
+        os.register_at_fork(after_in_child=lambda: DATA.current is not None or start_warm_up())
+else:
+    warm_up()
+
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')  # enables the /admin routes and /debug/profile
+
+def is_admin():
+    header = request.headers.get('Authorization', '')
+    return bool(ADMIN_TOKEN) and secrets.compare_digest(header.encode(), f"Bearer {ADMIN_TOKEN}".encode())
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """Rebuild the game data of the worker that serves the request; ?wait=1 returns once it is swapped in"""
+    if not is_admin():
+        return jsonify({"message": "Not found", "error": True}), 404
+    DATA.reload()
+    if request.args.get('wait') == '1':
+        DATA.wait()
+        return jsonify(DATA.status())
+    return jsonify(DATA.status()), 202
+
+@app.route('/admin/data', methods=['GET'])
+def admin_data():
+    """Loaded data versions of the worker that serves the request"""
+    if not is_admin():
+        return jsonify({"message": "Not found", "error": True}), 404
+    return jsonify(DATA.status())
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+# Routes that work before the data is loaded (CORS preflights are answered by flask-cors)
+READY_EXEMPT_ENDPOINTS = {'ready', 'metrics', 'static', 'admin_data'}
+
+@app.before_request
+def require_data():
+    if DATA.current is not None or request.method == 'OPTIONS' or request.endpoint in READY_EXEMPT_ENDPOINTS:
+        return None
+    return retry_later("The game is starting up, please retry.")
+
+# Admission control: token buckets per client IP and route, plus a cap on
+# concurrent /hint calls. RATE_LIMIT_BACKEND=sqlite shares the buckets across gunicorn workers.
+# RATE_LIMITS overrides limits ('/hint=0.2:5,...' as rate per second:burst), SUGGESTIONS_DEBOUNCE is
+# the minimum seconds between /suggestions requests of one client, ADMISSION=0 turns it all off.
+# PROXY_COUNT defaults to Heroku's router on a dyno (DYNO is set there), or every client would share its IP.
+PROXY_COUNT = int(os.environ.get('PROXY_COUNT', 1 if 'DYNO' in os.environ else 0))
+if PROXY_COUNT:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_COUNT)
+ADMISSION = AdmissionControl(
+    create_bucket_store(
+        os.environ.get('RATE_LIMIT_BACKEND', 'memory'),
+        path=os.environ.get('RATE_LIMIT_DB_PATH', os.path.join(tempfile.gettempdir(), 'energy-game-limits.sqlite3')),
+    ),
+    limits=dict(DEFAULT_LIMITS, **parse_limits(os.environ.get('RATE_LIMITS', ''))),
+    debounce=float(os.environ.get('SUGGESTIONS_DEBOUNCE', 0)),
+    max_upstream=int(os.environ.get('UPSTREAM_CONCURRENCY', 16)),
+    on_stat=lambda stat, route: METRICS.inc('admission_total', (('route', route), ('result', stat))),
+) if os.environ.get('ADMISSION', '1') != '0' else None
+
+@app.before_request
+def admit_request():
+    if ADMISSION is None or request.method == 'OPTIONS' or request.url_rule is None:
+        return None
+    route = request.url_rule.rule
+    # Keyed by IP (the real one, behind ProxyFix): a session cookie changes on every /start_game and
+    # can be dropped or forged by the client, so it would hand out a fresh bucket at will
+    decision = ADMISSION.check(route, request.remote_addr)
+    if decision is None:
+        g.admitted_route = route
+        return None
+    # Retry-After only has whole seconds; retry_after in the body is exact, for debounced keystrokes
+    response = jsonify({"message": decision.reason, "error": True, "retry_after": round(decision.retry_after, 3)})
+    response.headers['Retry-After'] = str(max(1, math.ceil(decision.retry_after)))
+    return response, decision.status
+
+@app.teardown_request
+def release_admission(exc=None):
+    route = g.pop('admitted_route', None)
+    if route is not None:
+        ADMISSION.release(route)
+
+@app.after_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    start = g.get('request_start')
+    if start is not None:
+        METRICS.observe('request_seconds', time.perf_counter() - start, (('route', route),))
+    if response.status_code >= 500:
+        METRICS.inc('errors_total', (('route', route),))
+    return response
+
 @app.after_request
 def after_request(response):
-    response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
-    response.headers.add('Access-Control-Allow-Methods', 'GET,POST,OPTIONS')
+    # setdefault: never duplicate headers that are already on the response
+    response.headers.setdefault('Access-Control-Allow-Origin', '*')
+    response.headers.setdefault('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+    response.headers.setdefault('Access-Control-Allow-Methods', 'GET,POST,OPTIONS')
     return response
 
 if __name__ == '__main__':
@@ -0,0 +1,40 @@
+"""ASGI entry point for the async serving mode.
+
+    uvicorn --app-dir src asgi:app --workers 1
+    gunicorn --pythonpath src -k uvicorn.workers.UvicornWorker -w 1 asgi:app   # the Procfile
+
+The Flask app is served through a small WSGI bridge that never runs it on the
+event loop. Cheap endpoints (/start_game, /guess, /suggestions, ...) run in a pool
+of APP_THREADS threads, so they never queue behind slow requests, and a SQLite
+lock wait in one of them does not stall the loop. Upstream-bound endpoints (/hint,
+which may call OpenAI) run in a second pool, each with its own concurrency limit.
+When a limit stays saturated for UPSTREAM_QUEUE_TIMEOUT seconds, the request gets
+a 503.
+
+/hint/stream is streamed chunk by chunk from the pool. When the client
+disconnects, the Flask response is closed, which aborts the upstream hint request.
+Room event streams (/rooms/<id>/events) are served on the event loop, from a queue
+per listener: an idle listener holds no thread, so one process can keep thousands
+of rooms' streams open.
+
+Rooms live in one process's memory: serve them with a single worker (--workers 1).
+"""
+import os
+
+from api.room_endpoints import room_events_asgi
+from app import app as flask_app
+from utils.asgi_bridge import WSGIBridge
+
+# path -> max concurrent requests; paths not listed run in the APP_THREADS pool
+UPSTREAM_LIMITS = {
+    '/hint': int(os.environ.get('HINT_CONCURRENCY', 16)),
+    '/hint/stream': int(os.environ.get('HINT_STREAM_MAX', 32)),
+}
+STREAMING_PATHS = ('/hint/stream',)
+UPSTREAM_QUEUE_TIMEOUT = float(os.environ.get('UPSTREAM_QUEUE_TIMEOUT', 10))
+
+APP_THREADS = int(os.environ.get('APP_THREADS', 8))
+
+app = WSGIBridge(flask_app, UPSTREAM_LIMITS, queue_timeout=UPSTREAM_QUEUE_TIMEOUT, streaming=STREAMING_PATHS,
+                 app_threads=APP_THREADS,
+                 handlers={'/rooms/*/events': room_events_asgi(flask_app.config['ROOM_MANAGER'])})
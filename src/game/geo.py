@@ -0,0 +1,97 @@
+"""Great-circle distances and bearings between every pair of countries, precomputed."""
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+DIRECTIONS = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
+CORRECT = "Correct"
+
+
+def haversine_distance(coord1, coord2):
+    """Scalar haversine distance in km between two (lat, lon) pairs in decimal degrees."""
+    lat1, lon1, lat2, lon2 = map(math.radians, [coord1[0], coord1[1], coord2[0], coord2[1]])
+    a = math.sin((lat2 - lat1) / 2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2)**2
+    return 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a)) * EARTH_RADIUS_KM
+
+
+def get_bearing(coord1, coord2):
+    """Scalar initial bearing in degrees [0, 360) from coord1 to coord2."""
+    lat1, lon1 = map(math.radians, coord1)
+    lat2, lon2 = map(math.radians, coord2)
+    delta_lon = lon2 - lon1
+    x = math.sin(delta_lon) * math.cos(lat2)
+    y = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(delta_lon)
+    return (math.degrees(math.atan2(x, y)) + 360) % 360
+
+
+def get_cardinal(bearing_degrees):
+    return DIRECTIONS[round(bearing_degrees / 45) % 8]
+
+
+def distance_matrix(lat, lon):
+    """All-pairs haversine distance in km; lat/lon are 1-D arrays in decimal degrees."""
+    phi = np.radians(lat)[:, None]
+    lam = np.radians(lon)[:, None]
+    a = np.sin((phi.T - phi) / 2)**2 + np.cos(phi) * np.cos(phi.T) * np.sin((lam.T - lam) / 2)**2
+    a = np.clip(a, 0.0, 1.0)
+    return 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)) * EARTH_RADIUS_KM
+
+
+def bearing_matrix(lat, lon):
+    """All-pairs initial bearing in degrees [0, 360); entry [i, j] is from i towards j."""
+    phi = np.radians(lat)[:, None]
+    lam = np.radians(lon)[:, None]
+    delta = lam.T - lam
+    x = np.sin(delta) * np.cos(phi.T)
+    y = np.cos(phi) * np.sin(phi.T) - np.sin(phi) * np.cos(phi.T) * np.cos(delta)
+    return (np.degrees(np.arctan2(x, y)) + 360) % 360
+
+
+class GeoEngine:
+    """Distance and direction lookups between countries by integer index.
+
+    Every country in coordinates gets an index; the N x N distance and cardinal
+    tables are built once so a guess is two array reads. The diagonal (guessing
+    the target itself) reads as CORRECT. Pass names to fix the index order, e.g.
+    to match CountryRegistry ids; every name needs coordinates.
+    """
+
+    def __init__(self, coordinates, names=None):
+        self.names = list(names) if names is not None else sorted(coordinates)
+        missing = [name for name in self.names if name not in coordinates]
+        if missing:
+            raise ValueError(f"No coordinates for {', '.join(missing)}")
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.lat = np.array([coordinates[name][0] for name in self.names], dtype=np.float64)
+        self.lon = np.array([coordinates[name][1] for name in self.names], dtype=np.float64)
+        bad = (np.abs(self.lat) > 90) | (np.abs(self.lon) > 180) | np.isnan(self.lat) | np.isnan(self.lon)
+        if bad.any():
+            raise ValueError(f"Coordinate out of bounds for {self.names[int(np.argmax(bad))]}")
+
+        self.distances = distance_matrix(self.lat, self.lon).astype(np.float32)
+        bearings = bearing_matrix(self.lat, self.lon)
+        self.bearings = bearings.astype(np.float32)
+        codes = (np.round(bearings / 45) % 8).astype(np.uint8)
+        np.fill_diagonal(codes, len(DIRECTIONS))
+        self.cardinals = codes
+        self.labels = np.array(DIRECTIONS + [CORRECT], dtype=object)
+
+    def __len__(self):
+        return len(self.names)
+
+    def index_of(self, name):
+        return self.index.get(name)
+
+    def coordinates(self, index):
+        return float(self.lat[index]), float(self.lon[index])
+
+    def hint(self, guess_index, target_index):
+        """(cardinal, distance_km) from the guess towards the target."""
+        return self.labels[self.cardinals[guess_index, target_index]], float(self.distances[guess_index, target_index])
+
+    def score(self, guess_indices, target_index):
+        """Batch version of hint: (cardinals, distances_km) for a list of guesses against one target."""
+        guess_indices = np.asarray(guess_indices, dtype=np.intp)
+        cardinals = self.labels[self.cardinals[guess_indices, target_index]].tolist()
+        return cardinals, self.distances[guess_indices, target_index]
@@ -0,0 +1,364 @@
+"""Daily, weekly and all-time leaderboards with logarithmic score updates and rank queries.
+
+Each board keeps its entries in a RankedList: a sorted list split into chunks
+of at most 2 * LOAD keys, plus a Fenwick tree over the chunk lengths. Finding a
+key is a bisect over the chunk maxima and one inside the chunk, and its rank is
+the Fenwick prefix sum of the chunks before it plus its offset in the chunk.
+Updating a score removes the old key and inserts the new one. Top-k reads walk
+the first chunks.
+
+Scores are kept in a SQLite file that every gunicorn worker writes, one row per
+(period, player) with a sequence number from a shared counter. Each worker
+holds the boards in memory and catches up by reading the rows whose sequence
+number is above the last one it applied, so all workers rank the same scores.
+Startup reads the current rows into an int64 array: loading a million players
+is one numpy sort rather than a million inserts.
+"""
+import datetime
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, insort
+
+import numpy as np
+
+PERIODS = ('daily', 'weekly', 'alltime')
+LOAD = 512
+MAX_POINTS = 100
+POINTS_PER_GUESS = 10
+MIN_POINTS = 10
+DEFAULT_SYNC_INTERVAL = 1.0
+SEQ_BITS = 32  # updates across all workers; scores up to 2**31 still fit an int64 entry
+SEQ_MASK = (1 << SEQ_BITS) - 1
+
+
+def points_for(attempts):
+    """Points for a win after attempts guesses: 100 on the first guess, 10 fewer per extra guess, at least 10."""
+    return max(MIN_POINTS, MAX_POINTS - POINTS_PER_GUESS * (attempts - 1))
+
+
+def period_key(period, now):
+    """Key of the period containing unix time now, e.g. '2024-05-01' or '2024-W18'."""
+    if period == 'alltime':
+        return 'alltime'
+    date = datetime.datetime.fromtimestamp(now, datetime.timezone.utc).date()
+    if period == 'daily':
+        return date.isoformat()
+    if period == 'weekly':
+        year, week, _ = date.isocalendar()
+        return f"{year}-W{week:02d}"
+    raise ValueError(f"Unknown period {period!r}, expected one of {', '.join(PERIODS)}")
+
+
+class RankedList:
+    """Sorted list of comparable keys with O(log n) add, remove and index (rank)."""
+
+    def __init__(self, keys=()):
+        """keys must already be sorted."""
+        keys = list(keys)
+        self._chunks = [keys[i:i + LOAD] for i in range(0, len(keys), LOAD)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._len = len(keys)
+        self._rebuild()
+
+    def __len__(self):
+        return self._len
+
+    def _rebuild(self):
+        # Fenwick tree (1-based) over chunk lengths
+        tree = [0] * (len(self._chunks) + 1)
+        for i, chunk in enumerate(self._chunks, 1):
+            tree[i] += len(chunk)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _update(self, chunk_index, delta):
+        i = chunk_index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _before(self, chunk_index):
+        """Number of keys in the chunks before chunk_index."""
+        total, i = 0, chunk_index
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def add(self, key):
+        if not self._chunks:
+            self._chunks.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            self._rebuild()
+            return
+        c = min(bisect_left(self._maxes, key), len(self._chunks) - 1)
+        chunk = self._chunks[c]
+        insort(chunk, key)
+        self._maxes[c] = chunk[-1]
+        self._len += 1
+        if len(chunk) > 2 * LOAD:
+            self._chunks[c:c + 1] = [chunk[:LOAD], chunk[LOAD:]]
+            self._maxes[c:c + 1] = [chunk[LOAD - 1], chunk[-1]]
+            self._rebuild()
+        else:
+            self._update(c, 1)
+
+    def remove(self, key):
+        """Remove key; raises ValueError if it is not present."""
+        c = bisect_left(self._maxes, key)
+        if c == len(self._chunks):
+            raise ValueError(f"{key!r} not in list")
+        chunk = self._chunks[c]
+        i = bisect_left(chunk, key)
+        if i == len(chunk) or chunk[i] != key:
+            raise ValueError(f"{key!r} not in list")
+        del chunk[i]
+        self._len -= 1
+        if chunk:
+            self._maxes[c] = chunk[-1]
+            self._update(c, -1)
+        else:
+            del self._chunks[c], self._maxes[c]
+            self._rebuild()
+
+    def index(self, key):
+        """0-based position of key; raises ValueError if it is not present."""
+        c = bisect_left(self._maxes, key)
+        if c < len(self._chunks):
+            chunk = self._chunks[c]
+            i = bisect_left(chunk, key)
+            if i < len(chunk) and chunk[i] == key:
+                return self._before(c) + i
+        raise ValueError(f"{key!r} not in list")
+
+    def head(self, k):
+        """The k smallest keys."""
+        found = []
+        for chunk in self._chunks:
+            if len(found) >= k:
+                break
+            found.extend(chunk[:k - len(found)])
+        return found
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield from chunk
+
+
+class Board:
+    """One period's scores, ranked by score and then by who got there first.
+
+    Entries are single ints, (-score << SEQ_BITS) | seq, where seq numbers the
+    updates: they sort like (-score, seq) but compare much faster than tuples.
+    """
+
+    def __init__(self, key, players=(), keys=()):
+        """players and their entry keys (an int array or list), e.g. from a snapshot."""
+        self.key = key
+        keys = np.asarray(keys, dtype=np.int64)
+        self.keys = dict(zip(players, keys.tolist()))  # player -> entry key
+        self.players = dict(zip(keys.tolist(), players))  # entry key -> player
+        self.entries = RankedList(np.sort(keys).tolist())
+        self._seq = int((keys & SEQ_MASK).max()) if len(keys) else 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, player, points):
+        """Add points to player's score. Returns the new score."""
+        old = self.keys.get(player)
+        score = points - (old >> SEQ_BITS) if old is not None else points
+        self.set(player, score, self._seq + 1)
+        return score
+
+    def set(self, player, score, seq):
+        """Set player's score as of update seq."""
+        old = self.keys.pop(player, None)
+        if old is not None:
+            self.entries.remove(old)
+            del self.players[old]
+        self._seq = max(self._seq, seq)
+        key = (-score << SEQ_BITS) | seq
+        self.keys[player] = key
+        self.players[key] = player
+        self.entries.add(key)
+
+    def rank(self, player):
+        """(1-based rank, score) of player, or None."""
+        key = self.keys.get(player)
+        if key is None:
+            return None
+        return self.entries.index(key) + 1, -(key >> SEQ_BITS)
+
+    def top(self, k):
+        """[(rank, player, score)] of the first k players."""
+        return [(i, self.players[key], -(key >> SEQ_BITS)) for i, key in enumerate(self.entries.head(k), 1)]
+
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS leaderboard_seq (id INTEGER PRIMARY KEY CHECK (id = 0), value INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO leaderboard_seq VALUES (0, 0)",
+    "CREATE TABLE IF NOT EXISTS scores ("
+    "period TEXT NOT NULL, key TEXT NOT NULL, player TEXT NOT NULL, score INTEGER NOT NULL, seq INTEGER NOT NULL, "
+    "PRIMARY KEY (period, player)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS scores_seq ON scores (seq)",
+    "CREATE TABLE IF NOT EXISTS names (player TEXT PRIMARY KEY, name TEXT NOT NULL, seq INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS names_seq ON names (seq)",
+)
+
+
+class Leaderboard:
+    """The three period boards plus display names, stored in a SQLite file shared by every worker; thread-safe.
+
+    Writes go to SQLite first. Reads use the in-memory boards, brought up to date
+    at most every sync_interval seconds. A win or a name change is also applied to
+    this worker's boards as it is written, so the player sees it at once, without
+    a full sync on the win path: the ranks around it may lag other workers' wins
+    by up to sync_interval.
+    """
+
+    def __init__(self, path, clock=time.time, sync_interval=DEFAULT_SYNC_INTERVAL):
+        self.path = path
+        self.clock = clock
+        self.sync_interval = sync_interval
+        self.boards = {}
+        self.names = {}  # player -> display name
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._seq = 0  # last update applied to the boards
+        self._synced = float('-inf')  # time.monotonic() of the last sync
+        conn = self._conn()
+        for statement in SCHEMA:
+            conn.execute(statement)
+        self._load()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # Another thread may have held the lock at fork time (gunicorn preload_app)
+        self._lock = threading.Lock()
+
+    def _conn(self):
+        # One connection per thread, reopened after a fork (gunicorn workers)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _load(self):
+        """Read the boards of the current periods in bulk; rows of a day or week that is over are dropped."""
+        conn = self._conn()
+        now = self.clock()
+        with self._lock:
+            self._seq = conn.execute("SELECT value FROM leaderboard_seq").fetchone()[0]
+            for period in PERIODS:
+                key = period_key(period, now)
+                conn.execute("DELETE FROM scores WHERE period = ? AND key < ?", (period, key))
+                # Entry keys are computed by SQLite: one int per row is much faster to fetch than two
+                rows = conn.execute(
+                    "SELECT player, (-score << ?) | seq FROM scores WHERE period = ? AND key = ? AND seq <= ?",
+                    (SEQ_BITS, period, key, self._seq)).fetchall()
+                players, keys = zip(*rows) if rows else ((), ())
+                self.boards[period] = Board(key, players, keys)
+            self.names = dict(conn.execute("SELECT player, name FROM names WHERE seq <= ?", (self._seq,)))
+            self._synced = time.monotonic()
+
+    def _write(self, statements, read=None):
+        """Run statements, each (sql, params) given the next update number, in one transaction.
+
+        Returns (update number, rows of the read query (sql, params) run after them, or None).
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("UPDATE leaderboard_seq SET value = value + 1")
+            seq = conn.execute("SELECT value FROM leaderboard_seq").fetchone()[0]
+            for sql, params in statements:
+                conn.execute(sql, params + (seq,))
+            rows = conn.execute(*read).fetchall() if read is not None else None
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return seq, rows
+
+    def sync(self, force=False):
+        """Apply the updates other workers (and this one) wrote since the last sync."""
+        if not force and time.monotonic() - self._synced < self.sync_interval:
+            return
+        conn = self._conn()
+        with self._lock:
+            now = self.clock()
+            rows = conn.execute("SELECT period, key, player, score, seq FROM scores WHERE seq > ? ORDER BY seq",
+                                (self._seq,)).fetchall()
+            names = conn.execute("SELECT player, name, seq FROM names WHERE seq > ?", (self._seq,)).fetchall()
+            for period, key, player, score, seq in rows:
+                board = self._board(period, now)
+                if board.key == key:
+                    board.set(player, score, seq)
+                self._seq = max(self._seq, seq)
+            for player, name, seq in names:
+                self.names[player] = name
+                self._seq = max(self._seq, seq)
+            self._synced = time.monotonic()
+
+    def _board(self, period, now):
+        # Caller holds self._lock; a new day or week starts an empty board
+        key = period_key(period, now)
+        board = self.boards.get(period)
+        if board is None or board.key != key:
+            board = self.boards[period] = Board(key)
+        return board
+
+    def record_win(self, player, attempts):
+        """Add the points for a win after attempts guesses to every period. Returns the points."""
+        points = points_for(attempts)
+        now = self.clock()
+        # A row left over from a day or week that is over restarts from these points
+        seq, rows = self._write([(
+            "INSERT INTO scores (period, key, player, score, seq) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (period, player) DO UPDATE SET "
+            "score = CASE WHEN key = excluded.key THEN score + excluded.score ELSE excluded.score END, "
+            "key = excluded.key, seq = excluded.seq",
+            (period, period_key(period, now), player, points),
+        ) for period in PERIODS], read=("SELECT period, key, score FROM scores WHERE player = ?", (player,)))
+        # The totals come from SQLite, as another worker may have recorded this player's last win. self._seq
+        # stays put, so the next sync still applies the updates before this one; applying it again is harmless.
+        with self._lock:
+            for period, key, score in rows:
+                board = self._board(period, now)
+                if board.key == key:
+                    board.set(player, score, seq)
+        return points
+
+    def set_name(self, player, name):
+        self._write([("INSERT OR REPLACE INTO names (player, name, seq) VALUES (?, ?, ?)", (player, name))])
+        with self._lock:
+            self.names[player] = name
+
+    def display_name(self, player):
+        return self.names.get(player) or f"player-{player[:6]}"
+
+    def rank(self, period, player):
+        self.sync()
+        with self._lock:
+            return self._board(period, self.clock()).rank(player)
+
+    def top(self, period, k):
+        self.sync()
+        with self._lock:
+            board = self._board(period, self.clock())
+            return [(rank, player, self.display_name(player), score) for rank, player, score in board.top(k)]
+
+    def size(self, period):
+        self.sync()
+        with self._lock:
+            return len(self._board(period, self.clock()))
@@ -0,0 +1,118 @@
+"""Canonical list of playable countries with integer ids and O(1) name resolution.
+
+The registry is built once at startup. Each playable country gets an id (its
+position in the sorted name list), and the registry joins the country's OWID
+row positions, its coordinates, and a set of normalized aliases to that id.
+Everything after name resolution passes ids around instead of strings.
+"""
+import re
+import unicodedata
+
+# OWID aggregates matched by exact name; source-specific regions are caught by AGGREGATE_SUFFIX
+AGGREGATES = frozenset([
+    "World", "Europe", "Asia", "Africa", "Oceania", "North America", "South America",
+    "Central America", "Middle East", "OECD", "Non-OECD", "OPEC", "Non-OPEC", "G20", "G7",
+    "European Union (27)", "High-income countries", "Upper-middle-income countries",
+    "Lower-middle-income countries", "Low-income countries", "Latin America and Caribbean",
+    "Antarctica", "Netherlands Antilles", "USSR", "Czechoslovakia", "Yugoslavia",
+    # Not aggregates, but left out of the game on purpose
+    "Palestine", "Niue",
+])
+AGGREGATE_SUFFIX = re.compile(r"\((EI|EIA|Ember|BP|Shift|27)\)$")
+
+# Common short or former names, added only when the target is playable
+COMMON_ALIASES = {
+    "USA": "United States", "US": "United States", "United States of America": "United States",
+    "America": "United States", "UK": "United Kingdom", "Britain": "United Kingdom",
+    "Great Britain": "United Kingdom", "UAE": "United Arab Emirates", "DRC": "Democratic Republic of Congo",
+    "DR Congo": "Democratic Republic of Congo", "Congo-Kinshasa": "Democratic Republic of Congo",
+    "Republic of the Congo": "Congo", "Congo-Brazzaville": "Congo", "Ivory Coast": "Cote d'Ivoire",
+    "Czech Republic": "Czechia", "Burma": "Myanmar", "Swaziland": "Eswatini", "Macedonia": "North Macedonia",
+    "Timor-Leste": "East Timor", "Holland": "Netherlands", "Korea": "South Korea",
+    "Republic of Korea": "South Korea", "Cape Verde": "Cabo Verde", "Russian Federation": "Russia",
+    "Turkiye": "Turkey", "Vatican City": "Vatican", "Micronesia": "Micronesia (country)",
+}
+
+
+def normalize(name):
+    """Case-folded, accent-stripped, punctuation-free form of a country name."""
+    text = unicodedata.normalize('NFKD', name)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = text.casefold().replace("&", " and ")
+    text = re.sub(r"[.'\u2019]", "", text)  # U.S.A. -> usa, Cote d'Ivoire -> cote divoire
+    return " ".join(re.sub(r"[^\w]+", " ", text).split())
+
+
+def derived_aliases(name):
+    """Normalized variants of name: without a parenthetical, a leading 'the', or with 'st'/'saint' swapped."""
+    key = normalize(name)
+    variants = {key, normalize(re.sub(r"\s*\([^)]*\)", "", name))}
+    for variant in list(variants):
+        if variant.startswith("the "):
+            variants.add(variant[4:])
+        if re.match(r"(saint|st) ", variant):
+            rest = variant.split(" ", 1)[1]
+            variants.update({f"saint {rest}", f"st {rest}"})
+    return variants
+
+
+def is_aggregate(name):
+    return name in AGGREGATES or bool(AGGREGATE_SUFFIX.search(name))
+
+
+class CountryRegistry:
+    """Playable countries by id; names and aliases resolve through hash maps.
+
+    coordinates maps name -> (lat, lon); rows maps name -> positions of the
+    country's rows in the energy frame.
+    """
+
+    def __init__(self, names, coordinates=None, rows=None):
+        self.names = tuple(sorted(set(names)))
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        coordinates = coordinates or {}
+        self.coordinates = [coordinates.get(name) for name in self.names]
+        rows = rows or {}
+        self.rows = [rows.get(name, ()) for name in self.names]
+
+        # Exact normalized names win over derived or common aliases; ambiguous aliases are dropped
+        self.aliases = {normalize(name): i for i, name in enumerate(self.names)}
+        candidates = {}
+        for i, name in enumerate(self.names):
+            for alias in derived_aliases(name):
+                candidates.setdefault(alias, set()).add(i)
+        for alias, target in COMMON_ALIASES.items():
+            if target in self.ids:
+                candidates.setdefault(normalize(alias), set()).add(self.ids[target])
+        for alias, ids in candidates.items():
+            if alias not in self.aliases and len(ids) == 1:
+                self.aliases[alias] = ids.pop()
+
+    @classmethod
+    def from_frame(cls, df, coordinates, year):
+        """Registry of the non-aggregate countries with data in year that have coordinates."""
+        in_year = df.loc[df['year'] == year, 'country'].unique()
+        names = [str(name) for name in in_year if not is_aggregate(str(name))]
+        missing = sorted(name for name in names if name not in coordinates)
+        if missing:
+            print(f"Skipping countries without coordinates: {', '.join(missing)}")
+        rows = {str(name): positions for name, positions in df.groupby('country', observed=True).indices.items()}
+        return cls([name for name in names if name in coordinates], coordinates, rows)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return self.resolve(name) is not None
+
+    def resolve(self, name):
+        """Id for a canonical name or any alias of it, else None."""
+        if not isinstance(name, str):
+            return None
+        country_id = self.ids.get(name)
+        if country_id is None:
+            country_id = self.aliases.get(normalize(name))
+        return country_id
+
+    def name(self, country_id):
+        return self.names[country_id]
@@ -0,0 +1,360 @@
+"""Multiplayer rooms built on GameModel (room lifecycle) and GameState (per-player progress).
+
+Rooms live in one process, spread over shards that each have their own lock, so
+unrelated rooms never contend. Every state change is serialized once into a
+Server-Sent Events frame and appended to the room's event log, and every
+subscriber writes those same bytes, so the fan-out cost doesn't grow with
+per-player serialization. Rooms idle for longer than ttl are evicted, and their
+subscribers are told the room closed.
+
+listen() is the subscription of the ASGI server: each listener has an
+asyncio.Queue that publishing feeds through loop.call_soon_threadsafe, so an
+idle listener costs a queue, not a thread. subscribe() is the same stream for
+WSGI servers, blocking a thread on the room's condition. A subscriber whose
+position has left the EVENT_LOG_SIZE ring gets one 'resync' event with the
+whole room state instead of the events it missed.
+"""
+import asyncio
+import json
+import secrets
+import threading
+import time
+from collections import deque
+
+from .state import GameState
+
+try:
+    from ..api.models import GameModel  # imported as src.game.rooms
+except ImportError:
+    from api.models import GameModel  # imported as game.rooms, with src/ on the path like app.py
+
+DEFAULT_ROOM_TTL = 30 * 60  # seconds without activity before a room is evicted
+DEFAULT_MAX_ROOMS = 10000
+MAX_PLAYERS = 16
+EVENT_LOG_SIZE = 256
+MAX_LISTENERS = 64  # open event streams per room
+KEEPALIVE = b": keepalive\n\n"
+SWEEP_EVERY = 256  # room creations between idle sweeps
+
+
+class RoomError(Exception):
+    """A room operation that is not allowed; status is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def encode_event(seq, event, data):
+    """One SSE frame; the id lets reconnecting clients resume with Last-Event-ID."""
+    payload = json.dumps(data, separators=(',', ':'))
+    return f"id: {seq}\nevent: {event}\ndata: {payload}\n\n".encode('utf-8')
+
+
+class Listener:
+    """One listen() stream: frames queued on its event loop, and whether some were lost to a full queue."""
+    __slots__ = ('loop', 'queue', 'lost')
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(EVENT_LOG_SIZE)
+        self.lost = False
+
+    def offer(self, item):
+        # Runs on self.loop; a listener too slow to keep up resyncs instead of queueing without bound
+        if self.queue.full():
+            self.lost = True
+        else:
+            self.queue.put_nowait(item)
+
+
+class Room:
+    __slots__ = ('id', 'model', 'state', 'names', 'guessed', 'target', 'public', 'winner', 'seq', 'events',
+                 'condition', 'listeners', 'last_active', 'closed')
+
+    def __init__(self, room_id, name, lock):
+        self.id = room_id
+        self.model = GameModel(name, [])
+        self.state = GameState()
+        self.names = {}  # player id -> display name
+        self.guessed = {}  # player id -> bitmap of guessed country ids
+        self.target = None
+        self.public = {}  # the round's public data, for resync events
+        self.winner = None
+        self.seq = 0
+        self.events = deque(maxlen=EVENT_LOG_SIZE)  # (seq, encoded frame)
+        self.condition = threading.Condition(lock)
+        self.listeners = set()
+        self.last_active = time.monotonic()
+        self.closed = False
+
+    def info(self):
+        info = self.model.get_game_info()
+        info.update(room=self.id, progress={self.names[pid]: p['progress'] for pid, p in self.state.players.items()},
+                    winner=self.winner)
+        return info
+
+    def since(self, seen):
+        """(last seq, frames) a subscriber that has seen up to seq seen still needs; caller holds the lock.
+
+        When events after seen have left the ring, that is one 'resync' frame with the current state.
+        """
+        if not self.events or self.events[-1][0] <= seen:
+            return seen, []
+        if self.events[0][0] > seen + 1:
+            return self.seq, [encode_event(self.seq, 'resync', dict(self.info(), **self.public))]
+        return self.seq, [frame for seq, frame in self.events if seq > seen]
+
+
+class _Shard:
+    __slots__ = ('lock', 'rooms')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rooms = {}
+
+
+class RoomManager:
+    """Thread-safe room registry. score(guess_id, target) returns (cardinal, distance_km); the
+    target is whatever start() was given, the manager only hands it back to score."""
+
+    def __init__(self, score, correct, ttl=DEFAULT_ROOM_TTL, max_rooms=DEFAULT_MAX_ROOMS, shards=64):
+        self.score = score
+        self.correct = correct
+        self.ttl = ttl
+        self.max_rooms = max_rooms
+        self._shards = [_Shard() for _ in range(shards)]
+        self._count = 0
+        self._count_lock = threading.Lock()
+        self._created = 0
+
+    def _shard(self, room_id):
+        return self._shards[hash(room_id) % len(self._shards)]
+
+    def _room(self, shard, room_id):
+        # Caller holds shard.lock
+        room = shard.rooms.get(room_id)
+        if room is None or room.closed:
+            raise RoomError("Room not found", 404)
+        return room
+
+    def _publish(self, room, event, data):
+        # Caller holds the room's shard lock
+        room.seq += 1
+        frame = encode_event(room.seq, event, data)
+        room.events.append((room.seq, frame))
+        room.last_active = time.monotonic()
+        room.condition.notify_all()
+        for listener in room.listeners:
+            try:
+                listener.loop.call_soon_threadsafe(listener.offer, (room.seq, frame, event == 'closed'))
+            except RuntimeError:
+                pass  # its loop is closed: the server is shutting down
+
+    def __len__(self):
+        return self._count
+
+    def create(self, name, player):
+        """New room with player in it. Returns (room id, player id)."""
+        with self._count_lock:
+            self._created += 1
+            sweep = self._created % SWEEP_EVERY == 0 or self._count >= self.max_rooms
+        if sweep:
+            self.evict_idle()
+        with self._count_lock:
+            if self._count >= self.max_rooms:
+                raise RoomError("Too many rooms, try again later", 503)
+            self._count += 1
+        room_id = secrets.token_urlsafe(6)
+        shard = self._shard(room_id)
+        with shard.lock:
+            room = shard.rooms[room_id] = Room(room_id, name, shard.lock)
+            player_id = self._add_player(room, player)
+        return room_id, player_id
+
+    def _add_player(self, room, player):
+        if len(room.names) >= MAX_PLAYERS:
+            raise RoomError("Room is full")
+        if room.model.state != "waiting":
+            raise RoomError("Game already started")
+        if player in room.model.players:
+            raise RoomError("Name already taken in this room")
+        player_id = secrets.token_urlsafe(12)
+        room.names[player_id] = player
+        room.guessed[player_id] = 0
+        room.model.players.append(player)
+        room.state.add_player(player_id)
+        self._publish(room, 'joined', room.info())
+        return player_id
+
+    def join(self, room_id, player):
+        shard = self._shard(room_id)
+        with shard.lock:
+            return self._add_player(self._room(shard, room_id), player)
+
+    def info(self, room_id):
+        shard = self._shard(room_id)
+        with shard.lock:
+            return self._room(shard, room_id).info()
+
+    def start(self, room_id, player_id, target, public_data):
+        """Start the shared round on target; public_data (never the target's name) goes to every player."""
+        shard = self._shard(room_id)
+        with shard.lock:
+            room = self._room(shard, room_id)
+            if player_id not in room.names:
+                raise RoomError("Not a player in this room", 403)
+            if not room.model.start_game():
+                raise RoomError("Game already started")
+            room.state.start_game()
+            room.target = target
+            room.public = public_data
+            self._publish(room, 'started', dict(room.info(), **public_data))
+
+    def guess(self, room_id, player_id, guess_id, guess_name):
+        """Score a guess and broadcast it. Returns (cardinal, distance_km, finished)."""
+        shard = self._shard(room_id)
+        with shard.lock:
+            room = self._room(shard, room_id)
+            if player_id not in room.names:
+                raise RoomError("Not a player in this room", 403)
+            if room.model.state != "in_progress":
+                raise RoomError("Game is not in progress")
+            if room.guessed[player_id] >> guess_id & 1:
+                raise RoomError("Country already guessed. Please select a new country.")
+            room.guessed[player_id] |= 1 << guess_id
+            room.state.update_progress(player_id, room.state.players[player_id]['progress'] + 1)
+            cardinal, distance = self.score(guess_id, room.target)
+            finished = cardinal == self.correct
+            player = room.names[player_id]
+            self._publish(room, 'guess', {'player': player, 'guess': guess_name, 'direction': cardinal,
+                                          'distance_km': round(distance), 'correct': finished})
+            if finished:
+                room.model.end_game()
+                room.state.end_game()
+                room.winner = player
+                self._publish(room, 'finished', room.info())
+            return cardinal, distance, finished
+
+    def listeners(self, room_id):
+        """Number of listen() streams open on room_id."""
+        shard = self._shard(room_id)
+        with shard.lock:
+            return len(self._room(shard, room_id).listeners)
+
+    def target_of(self, room_id):
+        shard = self._shard(room_id)
+        with shard.lock:
+            return self._room(shard, room_id).target
+
+    def subscribe(self, room_id, last_seq=0, keepalive=15.0, max_duration=300.0):
+        """Generator of SSE frames for room_id after last_seq, ending when the room closes or after max_duration.
+
+        Raises RoomError right away (not on first iteration) for an unknown room.
+        """
+        shard = self._shard(room_id)
+        with shard.lock:
+            room = self._room(shard, room_id)
+
+        def stream():
+            seen = last_seq
+            deadline = time.monotonic() + max_duration
+            while True:
+                with room.condition:
+                    if not room.events or room.events[-1][0] <= seen:
+                        if room.closed:
+                            return
+                        room.condition.wait(keepalive)
+                    seen, frames = room.since(seen)
+                    closed = room.closed
+                if frames:
+                    yield b"".join(frames)
+                elif closed:
+                    return
+                else:
+                    yield KEEPALIVE
+                if closed or time.monotonic() >= deadline:
+                    return
+        return stream()
+
+    def listen(self, room_id, last_seq=0, keepalive=15.0, max_duration=300.0):
+        """Async generator of SSE frames for room_id after last_seq; like subscribe(), without holding a thread.
+
+        Call it on the event loop that iterates the stream. Raises RoomError right
+        away for an unknown room or one with MAX_LISTENERS streams open.
+        """
+        loop = asyncio.get_running_loop()
+        listener = Listener(loop)
+        shard = self._shard(room_id)
+        with shard.lock:
+            room = self._room(shard, room_id)
+            if len(room.listeners) >= MAX_LISTENERS:
+                raise RoomError("Too many listeners in this room", 429)
+        seen = last_seq
+
+        def resync():
+            nonlocal seen
+            with shard.lock:
+                # Everything queued so far is dropped; what it held is in the resync frame or the ring
+                while not listener.queue.empty():
+                    listener.queue.get_nowait()
+                listener.lost = False
+                seen, frames = room.since(-1)
+                return frames, room.closed
+
+        async def stream():
+            nonlocal seen
+            deadline = loop.time() + max_duration
+            # Registered on the first iteration, so a stream that is never started does not leak its
+            # listener; under the lock, so every later event reaches the queue and none is also in the backlog
+            with shard.lock:
+                seen, backlog = room.since(seen)
+                room.listeners.add(listener)
+                closed = room.closed
+            try:
+                if backlog:
+                    yield b"".join(backlog)
+                if closed:
+                    return
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        return
+                    try:
+                        items = [await asyncio.wait_for(listener.queue.get(), min(keepalive, remaining))]
+                    except asyncio.TimeoutError:
+                        if loop.time() < deadline:
+                            yield KEEPALIVE
+                        continue
+                    while not listener.queue.empty():
+                        items.append(listener.queue.get_nowait())
+                    if listener.lost:
+                        frames, closed = resync()
+                    else:
+                        frames = [frame for seq, frame, _ in items if seq > seen]
+                        seen = max(seen, items[-1][0])
+                        closed = items[-1][2]
+                    if frames:
+                        yield b"".join(frames)
+                    if closed:
+                        return
+            finally:
+                with shard.lock:
+                    room.listeners.discard(listener)
+        return stream()
+
+    def evict_idle(self, now=None):
+        """Close and drop rooms idle for more than ttl seconds. Returns the number evicted."""
+        cutoff = (time.monotonic() if now is None else now) - self.ttl
+        evicted = 0
+        for shard in self._shards:
+            with shard.lock:
+                idle = [room for room in shard.rooms.values() if room.last_active < cutoff]
+                for room in idle:
+                    self._publish(room, 'closed', {'room': room.id, 'reason': 'idle'})
+                    room.closed = True
+                    del shard.rooms[room.id]
+            evicted += len(idle)
+        with self._count_lock:
+            self._count -= evicted
+        return evicted
@@ -0,0 +1,184 @@
+"""Precomputed pool of playable rounds, one entry per eligible (country, year)."""
+import json
+import random
+from collections import deque, namedtuple
+
+import numpy as np
+
+# Columns of the OWID energy dataset the game reads (besides country/year)
+ENERGY_COLUMNS = [
+    'electricity_generation',
+    'coal_electricity',
+    'gas_electricity',
+    'oil_electricity',
+    'hydro_electricity',
+    'nuclear_electricity',
+    'solar_electricity',
+    'wind_electricity',
+    'biofuel_electricity',
+    'other_renewable_electricity',
+]
+
+# Label shown to players -> source column (Geothermal is derived, see electricity_shares)
+SHARE_COLUMNS = {
+    'Coal': 'coal_electricity',
+    'Gas': 'gas_electricity',
+    'Oil': 'oil_electricity',
+    'Hydro': 'hydro_electricity',
+    'Nuclear': 'nuclear_electricity',
+    'Solar': 'solar_electricity',
+    'Wind': 'wind_electricity',
+    'Biofuel': 'biofuel_electricity',
+}
+SHARE_LABELS = list(SHARE_COLUMNS) + ['Geothermal']
+
+Round = namedtuple('Round', ['country', 'year', 'payload', 'energy_json'])
+
+
+def column_values(frame, column):
+    """Column as a float64 array with NaN for missing values.
+
+    float32 columns (from the binary snapshot) are widened through their shortest
+    decimal repr, so payloads show the same numbers as the CSV.
+    """
+    values = frame[column].to_numpy()
+    if values.dtype == np.float32:
+        return values.astype(str).astype(np.float64)
+    return values.astype(np.float64)
+
+
+def electricity_shares(frame):
+    """Vectorized electricity_shares for every row of frame, as {label: float64 array}.
+
+    Missing values count as 0 and Geothermal is other_renewable_electricity minus
+    biofuel_electricity, floored at 0.
+    """
+    shares = {
+        label: np.nan_to_num(column_values(frame, column), nan=0.0)
+        for label, column in SHARE_COLUMNS.items()
+    }
+    other = np.nan_to_num(column_values(frame, 'other_renewable_electricity'), nan=0.0)
+    shares['Geothermal'] = np.maximum(0.0, other - shares['Biofuel'])
+    return shares
+
+
+def parse_year_range(value):
+    """Parse a 'year' query value: '2015' or '2000-2010'. Returns (year_from, year_to)."""
+    parts = str(value).strip().split('-')
+    if len(parts) not in (1, 2) or not all(p.strip().isdigit() for p in parts):
+        raise ValueError(f"Invalid year or year range: {value!r}")
+    year_from = int(parts[0])
+    year_to = int(parts[-1])
+    if year_from > year_to:
+        raise ValueError(f"Invalid year range: {value!r}")
+    return year_from, year_to
+
+
+class RoundPool:
+    """Compact table of every playable round, sorted by (year, country).
+
+    Built once per data version; picking a round is a random index into the
+    contiguous block of rows for the requested year range.
+    """
+
+    def __init__(self, countries, years, payloads, energy_json=None, fingerprints=None):
+        """energy_json (entries may be None) and fingerprints are per row, in the order of countries."""
+        order = sorted(range(len(years)), key=lambda i: (years[i], countries[i]))
+        self.countries = [countries[i] for i in order]
+        self.years = np.asarray([years[i] for i in order], dtype=np.int16)
+        self.payloads = [payloads[i] for i in order]
+        # Pre-encoded energy_data JSON, keys sorted like jsonify does
+        energy_json = [energy_json[i] for i in order] if energy_json is not None else [None] * len(order)
+        self.energy_json = [encoded if encoded is not None else json.dumps(p, sort_keys=True, separators=(',', ':'))
+                            for p, encoded in zip(self.payloads, energy_json)]
+        # Raw values of each row, so a rebuild from changed data can reuse the rows that did not change
+        self.fingerprints = [fingerprints[i] for i in order] if fingerprints is not None else None
+        self._index = {key: i for i, key in enumerate(zip(self.countries, self.years.tolist()))}
+        self._upcoming = {}  # (lo, hi) -> deque of pre-drawn row indices
+        self.reused = 0
+
+    @classmethod
+    def from_frame(cls, df, allowed=None, previous=None):
+        """Build the pool from the OWID frame.
+
+        A row is eligible when electricity_generation is present and non-zero and,
+        if allowed is given, its country is in allowed (the playable country list).
+        Rows whose values are the same as in the previous pool reuse its payloads,
+        so only new and changed rows are converted and encoded.
+        """
+        frame = df[['country', 'year'] + ENERGY_COLUMNS]
+        generation = frame['electricity_generation']
+        mask = generation.notna() & (generation != 0)
+        if allowed is not None:
+            mask &= frame['country'].isin(list(allowed))
+        frame = frame[mask]
+
+        countries = [str(c) for c in frame['country']]
+        years = frame['year'].to_numpy(dtype=np.int64).tolist()
+        raw = np.ascontiguousarray(frame[ENERGY_COLUMNS].to_numpy(dtype=np.float32))
+        fingerprints = [row.tobytes() for row in raw]
+        payloads, energy_json = [None] * len(countries), [None] * len(countries)
+        if previous is not None and previous.fingerprints is not None:
+            for i, key in enumerate(zip(countries, years)):
+                j = previous._index.get(key)
+                if j is not None and previous.fingerprints[j] == fingerprints[i]:
+                    payloads[i], energy_json[i] = previous.payloads[j], previous.energy_json[j]
+        fresh = [i for i, payload in enumerate(payloads) if payload is None]
+
+        rows = frame.iloc[fresh]
+        shares = electricity_shares(rows)
+        generation = column_values(rows, 'electricity_generation')
+        for k, i in enumerate(fresh):
+            payloads[i] = {
+                'electricity_generation': float(generation[k]),
+                'electricity_shares': {label: float(shares[label][k]) for label in SHARE_LABELS},
+            }
+        pool = cls(countries, years, payloads, energy_json, fingerprints)
+        pool.reused = len(countries) - len(fresh)
+        return pool
+
+    def __len__(self):
+        return len(self.countries)
+
+    def available_years(self):
+        return sorted(set(self.years.tolist()))
+
+    def bounds(self, year_from=None, year_to=None):
+        """Row range [lo, hi) covering year_from..year_to (inclusive, open-ended if None)."""
+        lo = 0 if year_from is None else int(np.searchsorted(self.years, year_from, side='left'))
+        hi = len(self.years) if year_to is None else int(np.searchsorted(self.years, year_to, side='right'))
+        return lo, max(lo, hi)
+
+    def get(self, index):
+        return Round(self.countries[index], int(self.years[index]), self.payloads[index], self.energy_json[index])
+
+    def pick(self, year_from=None, year_to=None, rng=random):
+        """Pick a random round within the year range. Raises LookupError if it is empty."""
+        lo, hi = self.bounds(year_from, year_to)
+        if lo == hi:
+            raise LookupError(f"No countries available for years {year_from}-{year_to}")
+        queue = self._upcoming.get((lo, hi))
+        if queue:
+            try:
+                return self.get(queue.popleft())
+            except IndexError:
+                pass
+        return self.get(lo + rng.randrange(hi - lo))
+
+    def upcoming(self, year_from=None, year_to=None, n=4, rng=random):
+        """Countries of the next n picks for this year range, drawn ahead of time.
+
+        Lets callers prepare for rounds (e.g. warm hints) before they are played.
+        """
+        lo, hi = self.bounds(year_from, year_to)
+        if lo == hi or n <= 0:
+            return []
+        queue = self._upcoming.setdefault((lo, hi), deque())
+        while len(queue) < n:
+            queue.append(lo + rng.randrange(hi - lo))
+        return [self.countries[i] for i in list(queue)[:n]]
+
+    def find(self, country, year):
+        """Round for a given country and year, or None."""
+        index = self._index.get((country, year))
+        return None if index is None else self.get(index)
@@ -0,0 +1,79 @@
+"""Energy-mix similarity between countries, for difficulty levels and decoy hints.
+
+Every playable country's electricity_shares (Coal, Gas, ..., Geothermal, in TWh)
+are normalized to shares of its total and then to a unit vector, so one matrix
+product gives the all-pairs cosine similarity. From
+it, computed once at startup: the most similar countries of each country, how
+many near-duplicate mixes each country has, and difficulty tiers. A hard target
+is one whose mix looks like many others.
+"""
+import random
+
+import numpy as np
+
+from .round_pool import SHARE_LABELS, electricity_shares
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+NEAR_DUPLICATE = 0.98  # cosine similarity above which two mixes count as near-identical
+TOP_K = 10
+
+
+class MixSimilarity:
+
+    def __init__(self, shares, near_duplicate=NEAR_DUPLICATE, top_k=TOP_K):
+        """shares is an (n_countries, n_labels) array in id order; all-zero rows are left out."""
+        shares = np.nan_to_num(np.asarray(shares, dtype=np.float64), nan=0.0)
+        totals = shares.sum(axis=1)
+        self.valid = totals > 0
+        self.shares = np.divide(shares, totals[:, None], out=np.zeros_like(shares), where=self.valid[:, None])
+        norms = np.linalg.norm(self.shares, axis=1)
+        self.vectors = np.divide(self.shares, norms[:, None], out=np.zeros_like(shares), where=self.valid[:, None])
+        similarity = self.vectors @ self.vectors.T
+        # Self-matches and countries without data never count as similar
+        similarity[~self.valid, :] = -1.0
+        similarity[:, ~self.valid] = -1.0
+        np.fill_diagonal(similarity, -1.0)
+        self.similarity = similarity.astype(np.float32)
+
+        k = min(top_k, max(len(shares) - 1, 0))
+        self.top = np.argsort(-similarity, axis=1, kind='stable')[:, :k]
+        self.near_duplicates = (similarity >= near_duplicate).sum(axis=1)
+        top_mean = np.zeros(len(shares))
+        if k:
+            top_mean = np.take_along_axis(similarity, self.top[:, :5], axis=1).mean(axis=1)
+
+        # Tiers are thirds of the valid countries ordered by near-duplicates, ties broken by top-5 similarity
+        ranked = [int(i) for i in np.lexsort((top_mean, self.near_duplicates)) if self.valid[i]]
+        thirds = np.array_split(np.array(ranked, dtype=np.int64), len(DIFFICULTIES))
+        self.tiers = {level: tuple(ids.tolist()) for level, ids in zip(DIFFICULTIES, thirds)}
+        self.difficulty = {i: level for level, ids in self.tiers.items() for i in ids}
+
+    @classmethod
+    def from_frame(cls, df, names, year, **kwargs):
+        """Similarity of the countries in names (id order) from their rows in year.
+
+        Rows are eligible under the same rule as RoundPool, so every tiered country has a round in year.
+        """
+        generation = df['electricity_generation']
+        frame = df[(df['year'] == year) & generation.notna() & (generation != 0)]
+        frame = frame[frame['country'].isin(list(names))]
+        shares = electricity_shares(frame)
+        matrix = np.zeros((len(names), len(SHARE_LABELS)))
+        ids = {name: i for i, name in enumerate(names)}
+        rows = [ids[str(country)] for country in frame['country']]
+        matrix[rows] = np.column_stack([shares[label] for label in SHARE_LABELS])
+        return cls(matrix, **kwargs)
+
+    def most_similar(self, country_id, k=3):
+        """[(id, cosine similarity)] of the k countries whose mix is closest to country_id's."""
+        return [(int(i), float(self.similarity[country_id, i])) for i in self.top[country_id, :k]
+                if self.similarity[country_id, i] > -1]
+
+    def pick(self, difficulty, rng=random):
+        """Random country id of a difficulty tier. Raises ValueError for an unknown tier, LookupError if empty."""
+        if difficulty not in self.tiers:
+            raise ValueError(f"Unknown difficulty {difficulty!r}, expected one of {', '.join(DIFFICULTIES)}")
+        tier = self.tiers[difficulty]
+        if not tier:
+            raise LookupError(f"No countries available for difficulty {difficulty}")
+        return rng.choice(tier)
@@ -0,0 +1,168 @@
+"""Ball tree over countries on the unit sphere for nearest-neighbour and radius queries.
+
+Points are unit vectors, so the straight-line (chord) distance between two of
+them grows monotonically with the great-circle distance. Queries run in chord
+space and convert to km at the edges. Nodes store their point count, so counting
+the points inside a radius adds whole subtrees without visiting their points.
+"""
+import heapq
+import math
+
+import numpy as np
+
+from .geo import EARTH_RADIUS_KM
+
+
+def unit_vectors(lat, lon):
+    """(n, 3) unit vectors for latitude/longitude arrays in decimal degrees."""
+    phi = np.radians(np.asarray(lat, dtype=np.float64))
+    lam = np.radians(np.asarray(lon, dtype=np.float64))
+    return np.column_stack([np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)])
+
+
+def km_to_chord(km):
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def chord_to_km(chord):
+    return 2 * np.arcsin(np.clip(np.asarray(chord) / 2, 0.0, 1.0)) * EARTH_RADIUS_KM
+
+
+class BallTree:
+    """Static ball tree; every node is a contiguous slice of order with a center and radius."""
+
+    def __init__(self, points, leaf_size=8):
+        self.points = np.asarray(points, dtype=np.float64)
+        self.leaf_size = leaf_size
+        self.order = np.arange(len(self.points))
+        self.start, self.end, self.left, self.right, self.radius = [], [], [], [], []
+        self.centers = []
+        if len(self.points):
+            self._build(0, len(self.points))
+        self.centers = np.array(self.centers).reshape(-1, self.points.shape[1])
+        # Points in tree order, so a leaf is a contiguous slice
+        self.ordered = self.points[self.order]
+        self.order_list = self.order.tolist()
+
+    def _build(self, start, end):
+        node = len(self.start)
+        members = self.points[self.order[start:end]]
+        center = members.mean(axis=0)
+        self.start.append(start)
+        self.end.append(end)
+        self.centers.append(center)
+        self.radius.append(float(np.sqrt(((members - center) ** 2).sum(axis=1)).max()))
+        self.left.append(-1)
+        self.right.append(-1)
+        if end - start > self.leaf_size:
+            # Split at the median of the dimension with the widest spread
+            axis = int(np.argmax(members.max(axis=0) - members.min(axis=0)))
+            self.order[start:end] = self.order[start:end][np.argsort(members[:, axis], kind='stable')]
+            middle = (start + end) // 2
+            self.left[node] = self._build(start, middle)
+            self.right[node] = self._build(middle, end)
+        return node
+
+    def _gaps(self, point):
+        """Distance from point to every node center, in one vector operation."""
+        return np.sqrt(((self.centers - point) ** 2).sum(axis=1)).tolist()
+
+    def _leaf_distances(self, node, point):
+        return np.sqrt(((self.ordered[self.start[node]:self.end[node]] - point) ** 2).sum(axis=1)).tolist()
+
+    def query(self, point, k):
+        """(distances, indices) of the k points nearest to point, closest first."""
+        point = np.asarray(point, dtype=np.float64)
+        gaps = self._gaps(point)
+        radius, left, right = self.radius, self.left, self.right
+        best = []  # max-heap of (-distance, index)
+        stack = [0] if len(self.points) else []
+        while stack:
+            node = stack.pop()
+            if len(best) == k and gaps[node] - radius[node] >= -best[0][0]:
+                continue
+            if left[node] < 0:
+                start = self.start[node]
+                for offset, d in enumerate(self._leaf_distances(node, point)):
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, self.order_list[start + offset]))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, self.order_list[start + offset]))
+                continue
+            # Push the nearer child last so it is visited first and the k-th distance shrinks sooner
+            a, b = left[node], right[node]
+            if gaps[a] - radius[a] < gaps[b] - radius[b]:
+                a, b = b, a
+            stack.extend((a, b))
+        best.sort(key=lambda item: (-item[0], item[1]))
+        return np.array([-d for d, _ in best]), np.array([i for _, i in best], dtype=np.intp)
+
+    def query_radius(self, point, r):
+        """Indices of points strictly closer than r to point."""
+        point = np.asarray(point, dtype=np.float64)
+        gaps = self._gaps(point)
+        found = []
+        stack = [0] if len(self.points) else []
+        while stack:
+            node = stack.pop()
+            if gaps[node] - self.radius[node] >= r:
+                continue
+            if self.left[node] < 0:
+                start = self.start[node]
+                found.extend(self.order_list[start + offset]
+                             for offset, d in enumerate(self._leaf_distances(node, point)) if d < r)
+            else:
+                stack.extend((self.left[node], self.right[node]))
+        return sorted(found)
+
+    def count_radius(self, point, r):
+        """Number of points strictly closer than r to point."""
+        point = np.asarray(point, dtype=np.float64)
+        gaps = self._gaps(point)
+        count = 0
+        stack = [0] if len(self.points) else []
+        while stack:
+            node = stack.pop()
+            gap, radius = gaps[node], self.radius[node]
+            if gap - radius >= r:
+                continue
+            if gap + radius < r:
+                count += self.end[node] - self.start[node]  # whole ball inside the radius
+            elif self.left[node] < 0:
+                count += sum(d < r for d in self._leaf_distances(node, point))
+            else:
+                stack.extend((self.left[node], self.right[node]))
+        return count
+
+
+class SpatialIndex:
+    """Country-level proximity queries by index (the GeoEngine / registry ids)."""
+
+    def __init__(self, lat, lon):
+        self.vectors = unit_vectors(lat, lon)
+        self.tree = BallTree(self.vectors)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def nearest(self, index, k):
+        """[(index, km)] of the k countries closest to index, excluding itself."""
+        chords, found = self.tree.query(self.vectors[index], k + 1)
+        return [(int(i), float(km)) for i, km in zip(found, chord_to_km(chords)) if i != index][:k]
+
+    def within(self, index, km):
+        """Indices of the other countries less than km away from index."""
+        return [i for i in self.tree.query_radius(self.vectors[index], km_to_chord(km)) if i != index]
+
+    def rank(self, guess, target):
+        """1 if guess is the closest country to target, 2 if one other country is closer, and so on."""
+        chord = float(np.sqrt(((self.vectors[guess] - self.vectors[target]) ** 2).sum()))
+        # The count includes the target itself, at distance 0
+        return self.tree.count_radius(self.vectors[target], chord)
+
+    def proximity_percentile(self, guess, target):
+        """Share of the other countries (0-100) that are farther from target than guess."""
+        others = len(self) - 2
+        if others <= 0:
+            return 100.0
+        return 100.0 * (others - (self.rank(guess, target) - 1)) / others
@@ -0,0 +1,94 @@
+"""Per-country multi-year electricity mix, stored as contiguous blocks for zero-copy range slices.
+
+Rows of the playable countries are sorted by (country id, year) into one
+float64 matrix (generation plus one column per share label). offsets[c] and
+offsets[c + 1] delimit country c's block, so a year range of one country is a
+searchsorted within the block followed by a slice: a view, not a copy. A dense
+country x year presence table with prefix sums answers "which countries have
+enough data in this range" with one vector operation.
+"""
+import random
+from functools import lru_cache
+
+import numpy as np
+
+from .round_pool import SHARE_LABELS, column_values, electricity_shares
+
+SERIES_COLUMNS = ['electricity_generation'] + SHARE_LABELS
+MAX_SPAN = 60  # years per series
+DEFAULT_MIN_COVERAGE = 0.8
+
+
+class TimeSeriesIndex:
+
+    def __init__(self, frame, names):
+        """frame is the OWID energy frame; names are the playable countries in id order."""
+        ids = {name: i for i, name in enumerate(names)}
+        countries = frame['country'].astype(str).map(ids)
+        mask = countries.notna().to_numpy()
+        country_ids = countries.to_numpy()[mask].astype(np.int64)
+        years = frame['year'].to_numpy()[mask].astype(np.int64)
+        subset = frame[mask]
+
+        shares = electricity_shares(subset)
+        values = np.column_stack([column_values(subset, 'electricity_generation')] +
+                                 [shares[label] for label in SHARE_LABELS])
+        order = np.lexsort((years, country_ids))
+        self.names = list(names)
+        self.years = np.ascontiguousarray(years[order].astype(np.int16))
+        self.values = np.ascontiguousarray(values[order])
+        # Shares of a year without generation data are meaningless (all zero)
+        self.values[np.isnan(self.values[:, 0]), 1:] = np.nan
+        self.offsets = np.searchsorted(country_ids[order], np.arange(len(names) + 1)).astype(np.int64)
+
+        # presence[c, y - first_year] is True when country c has generation data for year y
+        self.first_year = int(self.years.min()) if len(self.years) else 0
+        self.last_year = int(self.years.max()) if len(self.years) else -1
+        presence = np.zeros((len(names), self.last_year - self.first_year + 1), dtype=np.int32)
+        has_data = ~np.isnan(self.values[:, 0])
+        rows = np.repeat(np.arange(len(names)), np.diff(self.offsets))
+        presence[rows[has_data], self.years[has_data] - self.first_year] = 1
+        self._present_before = np.zeros((len(names), presence.shape[1] + 1), dtype=np.int32)
+        np.cumsum(presence, axis=1, out=self._present_before[:, 1:])
+        self.eligible = lru_cache(maxsize=256)(self._eligible)
+
+    def series(self, country_id, year_from, year_to):
+        """(years, values) views of country_id's rows within [year_from, year_to]."""
+        start, end = self.offsets[country_id], self.offsets[country_id + 1]
+        block = self.years[start:end]
+        lo = start + int(np.searchsorted(block, year_from, side='left'))
+        hi = start + int(np.searchsorted(block, year_to, side='right'))
+        return self.years[lo:hi], self.values[lo:hi]
+
+    def coverage(self, year_from, year_to):
+        """Share of the years in [year_from, year_to] with data, for every country (float array)."""
+        lo = min(max(year_from - self.first_year, 0), self._present_before.shape[1] - 1)
+        hi = min(max(year_to - self.first_year + 1, 0), self._present_before.shape[1] - 1)
+        present = self._present_before[:, hi] - self._present_before[:, lo]
+        return present / float(year_to - year_from + 1)
+
+    def _eligible(self, year_from, year_to, min_coverage):
+        return tuple(np.flatnonzero(self.coverage(year_from, year_to) >= min_coverage).tolist())
+
+    def pick(self, year_from, year_to, min_coverage=DEFAULT_MIN_COVERAGE, rng=random):
+        """Random country id with at least min_coverage of the range covered. Raises LookupError."""
+        if year_to - year_from + 1 > MAX_SPAN:
+            raise ValueError(f"Year ranges are limited to {MAX_SPAN} years")
+        candidates = self.eligible(year_from, year_to, min_coverage)
+        if not candidates:
+            raise LookupError(f"No country has {min_coverage:.0%} of the years {year_from}-{year_to}")
+        return rng.choice(candidates)
+
+    def payload(self, country_id, year_from, year_to):
+        """JSON-ready trend for one country: every year of the range, a list per series,
+        None for years without data (with no row at all, or a row without generation)."""
+        years, values = self.series(country_id, year_from, year_to)
+        # Rows go to their year's position in the full range; years without a row stay NaN
+        dense = np.full((year_to - year_from + 1, values.shape[1]), np.nan)
+        dense[years.astype(np.int64) - year_from] = values
+        columns = [[None if np.isnan(v) else v for v in column] for column in dense.T.tolist()]
+        return {
+            'years': list(range(year_from, year_to + 1)),
+            'electricity_generation': columns[0],
+            'electricity_shares': dict(zip(SHARE_LABELS, columns[1:])),
+        }
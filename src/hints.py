@@ -0,0 +1,278 @@
+"""Cached, pre-warmed AI hints with a latency budget.
+
+Hints depend only on the target country (and the prompt template), so they are
+cached per (country, template). Concurrent misses for the same key share one
+in-flight provider call, a small thread pool warms hints ahead of time, and a
+request that would wait longer than the budget gets a deterministic hint built
+from the energy data instead.
+
+HintService.stream forwards tokens as the provider produces them, for at most
+max_streams concurrent streams. Closing the returned HintStream (the WSGI
+server does this when the client disconnects) closes the provider's generator,
+which aborts the upstream request.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+
+class HintProvider:
+    """Source of hint text. template identifies the prompt, so changing it invalidates cached hints."""
+    template = ""
+
+    def generate(self, country):
+        raise NotImplementedError
+
+    def stream(self, country):
+        """Generator of text chunks; closing it must abort the upstream call. Defaults to one chunk."""
+        yield self.generate(country)
+
+
+class OpenAIHintProvider(HintProvider):
+
+    def __init__(self):
+        import openai_hint  # imported lazily so tests and stub mode don't need openai
+        self._request_hint = openai_hint.request_hint
+        self._stream_hint = openai_hint.stream_hint
+        self.template = openai_hint.HINT_PROMPT
+
+    def generate(self, country):
+        return self._request_hint(country)
+
+    def stream(self, country):
+        return self._stream_hint(country)
+
+
+class StubHintProvider(HintProvider):
+    """Offline provider for tests and local runs; delay simulates upstream latency.
+
+    stream() yields the same text word by word, token_delay seconds apart, and
+    records in cancelled how many streams were closed before their last token.
+    """
+    template = "stub"
+
+    def __init__(self, delay=0.0, token_delay=0.0):
+        self.delay = delay
+        self.token_delay = token_delay
+        self.calls = 0
+        self.cancelled = 0
+
+    def text(self, country):
+        return f"This is a stub hint about a country that is not {country[::-1]}."
+
+    def generate(self, country):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return self.text(country)
+
+    def stream(self, country):
+        self.calls += 1
+        words = self.text(country).split(' ')
+        finished = False
+        try:
+            for i, word in enumerate(words):
+                if self.token_delay:
+                    time.sleep(self.token_delay)
+                yield word if i == 0 else ' ' + word
+            finished = True
+        finally:
+            if not finished:
+                self.cancelled += 1
+
+
+def create_hint_provider(name, stub_delay=0.0, stub_token_delay=0.0):
+    if name == 'openai':
+        return OpenAIHintProvider()
+    if name == 'stub':
+        return StubHintProvider(delay=stub_delay, token_delay=stub_token_delay)
+    raise ValueError(f"Unknown hint provider: {name!r}")
+
+
+def fallback_hint(payload):
+    """Deterministic hint from a round payload (electricity_generation and electricity_shares)."""
+    if not payload:
+        return "Look closely at the energy mix: which source dominates?"
+    generation = payload['electricity_generation']
+    shares = payload['electricity_shares']
+    source = max(shares, key=shares.get)
+    percent = 100 * shares[source] / generation if generation else 0
+    return (f"This country gets most of its electricity from {source} "
+            f"(about {percent:.0f}% of {generation:,.0f} TWh generated).")
+
+
+class StreamLimitError(Exception):
+    """Raised by HintService.stream when max_streams streams are already open."""
+
+
+class HintStream:
+    """Iterable of (kind, text) for one streamed hint: ('token', chunk)... then ('done', full text).
+
+    A provider error ends the stream with ('fallback', hint). close() is idempotent,
+    releases the stream slot and closes the provider generator if still running.
+    """
+
+    def __init__(self, service, key):
+        self._service = service
+        self._key = key
+        self._source = None
+        self._closed = False
+        self.finished = False
+
+    def __iter__(self):
+        service, country = self._service, self._key[0]
+        try:
+            text = service.cached(country)
+            if text is not None:
+                yield 'token', text
+                yield 'done', text
+                self.finished = True
+                return
+            chunks = []
+            try:
+                self._source = service.provider.stream(country)
+                for chunk in self._source:
+                    chunks.append(chunk)
+                    yield 'token', chunk
+            except Exception as e:
+                print(f"Hint provider error: {e}")
+                service._count('errors')
+                self.finished = True
+                yield 'fallback', service.fallback(country)
+                return
+            text = ''.join(chunks).strip()
+            service._store(self._key, text)
+            self.finished = True
+            yield 'done', text
+        finally:
+            self.close()
+
+    def close(self):
+        with self._service._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._service._streams -= 1
+        if not self.finished:
+            self._service._count('cancelled')
+        if self._source is not None:
+            try:
+                self._source.close()
+            except ValueError:
+                pass  # closed from another thread while it runs; it stops at its next chunk
+
+
+class HintService:
+    """TTL/LRU hint cache in front of a provider, with coalesced misses and a latency budget."""
+
+    def __init__(self, provider, fallback, ttl=24 * 60 * 60, max_entries=1024, budget=3.0, workers=4,
+                 max_streams=32, on_stat=None):
+        self.provider = provider
+        self.fallback = fallback
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.budget = budget
+        self.max_pending = workers * 4
+        self.max_streams = max_streams
+        self._streams = 0  # open HintStreams
+        self._cache = OrderedDict()  # (country, template) -> (expires, text)
+        self._inflight = {}  # (country, template) -> Future shared by concurrent misses
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hint')
+        self.stats = {'hits': 0, 'misses': 0, 'fallbacks': 0, 'errors': 0, 'streams': 0, 'cancelled': 0,
+                      'rejected': 0}
+        self.on_stat = on_stat  # optional callback(stat_name), e.g. to feed metrics
+
+    def _count(self, stat):
+        self.stats[stat] += 1
+        if self.on_stat is not None:
+            self.on_stat(stat)
+
+    def _key(self, country):
+        return country, self.provider.template
+
+    def _lookup(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry[1]
+
+    def _store(self, key, text):
+        with self._lock:
+            self._cache[key] = (time.time() + self.ttl, text)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _call(self, key):
+        try:
+            text = self.provider.generate(key[0])
+            self._store(key, text)
+            return text
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _submit(self, key):
+        # Caller holds self._lock
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._pool.submit(self._call, key)
+            self._inflight[key] = future
+        return future
+
+    def cached(self, country):
+        with self._lock:
+            return self._lookup(self._key(country))
+
+    def get(self, country, budget=None):
+        """Hint text for country, waiting at most budget seconds for the provider."""
+        key = self._key(country)
+        with self._lock:
+            text = self._lookup(key)
+            if text is not None:
+                self._count('hits')
+                return text
+            self._count('misses')
+            future = self._submit(key)
+        try:
+            return future.result(timeout=self.budget if budget is None else budget)
+        except FutureTimeoutError:
+            # The call keeps running and fills the cache for the next request
+            self._count('fallbacks')
+        except Exception as e:
+            print(f"Hint provider error: {e}")
+            self._count('errors')
+        return self.fallback(country)
+
+    def stream(self, country):
+        """HintStream for country. Raises StreamLimitError when max_streams streams are open.
+
+        Cached hints are replayed as a single token; a completed stream fills the cache.
+        """
+        with self._lock:
+            if self._streams >= self.max_streams:
+                self._count('rejected')
+                raise StreamLimitError(f"{self.max_streams} hint streams already open")
+            self._streams += 1
+            self._count('streams')
+        return HintStream(self, self._key(country))
+
+    def warm(self, countries):
+        """Start generating hints for countries that are neither cached nor in flight."""
+        with self._lock:
+            for country in countries:
+                key = self._key(country)
+                if len(self._inflight) >= self.max_pending:
+                    break
+                if key not in self._inflight and self._lookup(key) is None:
+                    self._submit(key)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
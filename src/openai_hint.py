@@ -1,5 +1,7 @@
+import json
 import os
 import openai
+import requests
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,25 +11,72 @@ if api_key:
 else:
     print("Warning: OPENAI_API_KEY not found in environment variables")
 
+HINT_PROMPT = "Generate a hint about {country} without revealing its name directly. Focus on its energy production or geographic location."
+STREAM_TIMEOUT = (5, 30)  # connect, and read between tokens, in seconds
+
+def hint_request(correct_country: str) -> dict:
+    """
+    ChatCompletion parameters shared by the blocking and the streaming call.
+    """
+    return dict(
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": "You are a hint generator for an energy game."},
+            {"role": "user", "content": HINT_PROMPT.format(country=correct_country)},
+        ],
+        temperature=0.7,
+        max_tokens=50,
+        n=1,
+    )
+
+def request_hint(correct_country: str) -> str:
+    """
+    Asks the OpenAI ChatCompletion API for a hint. Raises on any failure.
+    """
+    if not openai.api_key:
+        raise RuntimeError("API key not configured. Please check environment variables.")
+    response = openai.ChatCompletion.create(**hint_request(correct_country))
+    return response.choices[0].message.content.strip()
+
+def stream_hint(correct_country: str):
+    """
+    Yields hint tokens from a streaming ChatCompletion as they arrive. Raises on any failure.
+
+    The request is made with requests rather than the openai client so that closing
+    this generator closes the HTTP connection, which aborts the upstream completion.
+    """
+    if not openai.api_key:
+        raise RuntimeError("API key not configured. Please check environment variables.")
+    response = requests.post(
+        f"{openai.api_base}/chat/completions",
+        headers={"Authorization": f"Bearer {openai.api_key}"},
+        json=dict(hint_request(correct_country), stream=True),
+        stream=True,
+        timeout=STREAM_TIMEOUT,
+    )
+    try:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line.startswith(b"data: "):
+                continue
+            data = line[len(b"data: "):]
+            if data == b"[DONE]":
+                break
+            content = json.loads(data)["choices"][0].get("delta", {}).get("content")
+            if content:
+                yield content
+    finally:
+        response.close()
+
 def generate_hint(guess: str, correct_country: str) -> str:
     """
     Generates a hint using the OpenAI ChatCompletion API.
     """
     if not openai.api_key:
         return "API key not configured. Please check environment variables."
-    
+
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a hint generator for an energy game."},
-                {"role": "user", "content": f"Generate a hint about {correct_country} without revealing its name directly. Focus on its energy production or geographic location."},
-            ],
-            temperature=0.7,
-            max_tokens=50,
-            n=1,
-        )
-        return response.choices[0].message.content.strip()
+        return request_hint(correct_country)
     except Exception as e:
         print(f"OpenAI API error: {str(e)}")
         return "Unable to generate hint at this time."
@@ -0,0 +1,257 @@
+"""Minimal ASGI server adapter for a WSGI app with per-path concurrency limits.
+
+The WSGI app never runs on the event loop: limited paths run in a pool sized by
+their limits, every other path in a separate pool, so a request blocked on a lock
+or on SQLite cannot stall the other connections (SSE streams included). Limited
+paths may be fnmatch patterns (/rooms/*/events). Streaming paths send each
+body chunk as soon as the WSGI app yields it, and stop the app (closing its
+iterable after the current chunk) when the client disconnects.
+
+Paths given as handlers are served by an ASGI callable on the loop instead of
+the WSGI app, for streams that wait on events rather than on a thread.
+"""
+import asyncio
+import sys
+import threading
+from fnmatch import fnmatchcase
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI http scope and its fully read body."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1').upper().replace('-', '_')
+        value = value.decode('latin1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'CONTENT_LENGTH':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            key = f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def run_wsgi(wsgi_app, environ):
+    """Call wsgi_app and collect (status, headers, body)."""
+    response = {}
+    chunks = []
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(k.lower().encode('latin1'), v.encode('latin1')) for k, v in headers]
+        return chunks.append
+
+    iterable = wsgi_app(environ, start_response)
+    try:
+        for chunk in iterable:
+            chunks.append(chunk)
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+    return response['status'], response['headers'], b''.join(chunks)
+
+
+def stream_wsgi(wsgi_app, environ, emit, cancelled):
+    """Call wsgi_app, passing ('start', (status, headers)), ('body', chunk)... and ('end', None) to emit.
+
+    Checked after every chunk, a set cancelled event stops the iteration. The
+    iterable is always closed, in this thread, so generators can clean up.
+    """
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(k.lower().encode('latin1'), v.encode('latin1')) for k, v in headers]
+        return lambda chunk: emit(('body', chunk))
+
+    try:
+        iterable = wsgi_app(environ, start_response)
+        try:
+            emit(('start', (response['status'], response['headers'])))
+            for chunk in iterable:
+                if chunk:
+                    emit(('body', chunk))
+                if cancelled.is_set():
+                    break
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+    finally:
+        emit(('end', None))
+
+
+async def send_stream(chunks, receive, send, status=200, headers=()):
+    """Send the async iterator chunks as a streamed response until it ends or the client disconnects.
+
+    chunks is closed either way (aclose), so its cleanup runs before this returns.
+    """
+    await send({'type': 'http.response.start', 'status': status, 'headers': list(headers)})
+    disconnect = asyncio.ensure_future(_disconnected(receive))
+    try:
+        while True:
+            chunk = asyncio.ensure_future(chunks.__anext__())
+            await asyncio.wait({chunk, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+            if not chunk.done():
+                # The cancellation ends the iterator inside its pending await, running its cleanup
+                chunk.cancel()
+                await asyncio.wait({chunk})
+                return
+            try:
+                await send({'type': 'http.response.body', 'body': chunk.result(), 'more_body': True})
+            except StopAsyncIteration:
+                await send({'type': 'http.response.body', 'body': b''})
+                return
+    finally:
+        disconnect.cancel()
+        await chunks.aclose()
+
+
+async def _disconnected(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+class WSGIBridge:
+    """ASGI app serving a WSGI app from thread pools: one for the rate-limited upstream-bound
+    paths, and one of app_threads threads for every other path. handlers maps paths
+    (or patterns) to ASGI callables that serve them on the loop instead."""
+
+    def __init__(self, wsgi_app, upstream_limits, queue_timeout=10.0, streaming=(), app_threads=8, handlers=None):
+        self.wsgi_app = wsgi_app
+        self.handlers = dict(handlers or {})
+        self.upstream_limits = dict(upstream_limits)
+        self.queue_timeout = queue_timeout
+        self.streaming = tuple(streaming)
+        self._semaphores = None
+        self._pool = ThreadPoolExecutor(max_workers=max(sum(self.upstream_limits.values()), 1),
+                                        thread_name_prefix='upstream')
+        # Cheap routes get their own threads, so they never queue behind slow upstream calls
+        self._app_pool = ThreadPoolExecutor(max_workers=app_threads, thread_name_prefix='wsgi')
+
+    def _semaphore(self, path):
+        # Created lazily so they bind to the server's running loop
+        if self._semaphores is None:
+            self._semaphores = {p: asyncio.Semaphore(n) for p, n in self.upstream_limits.items()}
+        return self._semaphores.get(self._match(path, self.upstream_limits))
+
+    @staticmethod
+    def _match(path, patterns):
+        if path in patterns:
+            return path
+        return next((p for p in patterns if '*' in p and fnmatchcase(path, p)), None)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        handler = self._match(scope['path'], self.handlers)
+        if handler is not None:
+            await self.handlers[handler](scope, receive, send)
+            return
+
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        environ = build_environ(scope, body)
+
+        loop = asyncio.get_event_loop()
+        semaphore = self._semaphore(scope['path'])
+        if semaphore is None:
+            status, headers, body = await loop.run_in_executor(self._app_pool, run_wsgi, self.wsgi_app, environ)
+        else:
+            try:
+                await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                await self._send(send, 503, [(b'content-type', b'application/json'), (b'retry-after', b'1')],
+                                 b'{"error":true,"message":"Server busy, please retry."}\n')
+                return
+            if self._match(scope['path'], self.streaming) is not None:
+                await self._stream(environ, receive, send, semaphore)
+                return
+            try:
+                status, headers, body = await loop.run_in_executor(self._pool, run_wsgi, self.wsgi_app, environ)
+            finally:
+                semaphore.release()
+        await self._send(send, status, headers, body)
+
+    async def _stream(self, environ, receive, send, semaphore):
+        """Run the app in the pool and forward its chunks until it ends or the client disconnects."""
+        loop = asyncio.get_event_loop()
+        queue = asyncio.Queue()
+        cancelled = threading.Event()
+        task = loop.run_in_executor(self._pool, stream_wsgi, self.wsgi_app, environ,
+                                    lambda item: loop.call_soon_threadsafe(queue.put_nowait, item), cancelled)
+        task.add_done_callback(lambda done: self._stream_done(done, semaphore))
+        disconnect = asyncio.ensure_future(_disconnected(receive))
+        started = False
+        try:
+            while True:
+                item = asyncio.ensure_future(queue.get())
+                await asyncio.wait({item, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+                if not item.done():
+                    item.cancel()
+                    return
+                kind, value = item.result()
+                if kind == 'start':
+                    started = True
+                    await send({'type': 'http.response.start', 'status': value[0], 'headers': value[1]})
+                elif kind == 'body':
+                    await send({'type': 'http.response.body', 'body': value, 'more_body': True})
+                else:
+                    if started:
+                        await send({'type': 'http.response.body', 'body': b''})
+                    else:
+                        await self._send(send, 500, [(b'content-type', b'text/plain')], b'Internal Server Error\n')
+                    return
+        finally:
+            cancelled.set()
+            disconnect.cancel()
+
+    @staticmethod
+    def _stream_done(task, semaphore):
+        # The slot is held until the app has stopped, which after a disconnect is at its next chunk
+        semaphore.release()
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Streaming response failed: {task.exception()!r}", file=sys.stderr)
+
+    async def _send(self, send, status, headers, body):
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self._pool.shutdown(wait=False)
+                self._app_pool.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
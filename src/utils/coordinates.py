@@ -0,0 +1,33 @@
+"""Reading and writing the country coordinates CSV.
+
+Kept apart from utils.geocoding so the web app can read the file without
+importing any geocoding code.
+"""
+import csv
+import os
+
+CSV_COLUMNS = ['country', 'latitude', 'longitude']
+
+
+def read_coordinates_csv(path):
+    """{country: (lat, lon) or None} from a coordinates CSV; {} when the file doesn't exist."""
+    if not os.path.exists(path):
+        return {}
+    coordinates = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            lat, lon = row.get('latitude'), row.get('longitude')
+            coordinates[row['country']] = (float(lat), float(lon)) if lat and lon else None
+    return coordinates
+
+
+def write_coordinates_csv(path, coordinates):
+    """Write {country: (lat, lon) or None} sorted by country, replacing path atomically."""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for country in sorted(coordinates):
+            coords = coordinates[country]
+            writer.writerow([country, *(coords if coords else ('', ''))])
+    os.replace(tmp, path)
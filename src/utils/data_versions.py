@@ -0,0 +1,209 @@
+"""Versioned game data, rebuilt in the background when its source files change.
+
+A version is everything the routes derive from the data files, built by a
+build(version, previous) callable. Its id is a hash of the files' content, so
+every gunicorn worker gives the same data the same id. A daemon thread polls
+the files' size and mtime (or reload() is called, e.g. from an admin endpoint).
+When they change, the new version is built in a background thread from the
+files and the previous version, so unchanged parts can be reused. It waits until
+the files stop changing first, so a file that is still being written is not read
+half-way (replacing it with an atomic rename avoids the wait). It is then
+swapped in with one reference assignment: a request that already holds the old
+version finishes on it. The last few versions stay available through get(), so
+games started on an old version keep resolving against it until they end.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .snapshot import file_sha256
+
+DEFAULT_KEEP = 3  # versions kept in memory, the current one included
+DEFAULT_RETAIN = 6 * 60 * 60  # seconds a replaced version stays available (the session TTL)
+DEFAULT_SETTLE = 1.0  # seconds the files must stay unchanged before a rebuild reads them
+
+
+def files_signature(paths):
+    """(size, mtime) of every path, None for a missing one: cheap to poll."""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            signature.append(None)
+        else:
+            signature.append((stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def content_version(paths):
+    """Short hash of the content of paths (missing files included as such)."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update((file_sha256(path) if os.path.exists(path) else 'missing').encode())
+    return digest.hexdigest()[:12]
+
+
+class DataVersions:
+    """The current data version plus recent ones, keyed by version id.
+
+    build(version, previous) returns the new data, where previous is the current
+    data or None; it must not modify previous. on_stat(stat) is called with
+    'loaded', 'unchanged' or 'failed' after every build attempt.
+    """
+
+    def __init__(self, build, paths, keep=DEFAULT_KEEP, retain=DEFAULT_RETAIN, settle=DEFAULT_SETTLE,
+                 clock=time.time, on_stat=None):
+        self.build = build
+        self.paths = list(paths)
+        self.keep = keep
+        self.retain = retain
+        self.settle = settle
+        self.clock = clock
+        self.on_stat = on_stat
+        self.current = None
+        self.version = None
+        self.error = None  # exception of the last failed build
+        self.loaded_at = None
+        self.build_seconds = None
+        self._versions = OrderedDict()  # version -> (data, replaced at or None), oldest first
+        self._signature = None
+        self._lock = threading.Lock()
+        self._building = None  # thread of the running background build
+        self._stop = threading.Event()
+        self._watcher = None
+        self._interval = None
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # Threads do not survive a fork (gunicorn preload_app): restart the watcher in the worker
+        self._lock, self._stop, self._building, self._watcher = threading.Lock(), threading.Event(), None, None
+        if self._interval is not None:
+            self.start(self._interval)
+
+    def get(self, version):
+        """Data of version if it is still kept, else None."""
+        entry = self._versions.get(version)
+        return entry[0] if entry is not None else None
+
+    def versions(self):
+        return list(self._versions)
+
+    def load(self):
+        """Build from the files now, in the calling thread. Returns the version id; raises on failure."""
+        signature = files_signature(self.paths)
+        version = content_version(self.paths)
+        if version != self.version:
+            self._install(version, signature)
+        self._signature = signature
+        return version
+
+    def _install(self, version, signature):
+        start = time.perf_counter()
+        try:
+            data = self.build(version, self.current)
+        except Exception as e:
+            self.error = e
+            self._count('failed')
+            raise
+        now = self.clock()
+        with self._lock:
+            if self.version is not None:
+                self._versions[self.version] = (self.current, now)
+            self._versions[version] = (data, None)
+            self._versions.move_to_end(version)
+            # Swap: requests read self.current once, so they see either the old data or the new
+            self.current, self.version, self._signature = data, version, signature
+            self.error, self.loaded_at, self.build_seconds = None, now, time.perf_counter() - start
+            self._evict(now)
+        self._count('loaded')
+
+    def _evict(self, now):
+        # Caller holds self._lock; the current version is last and never evicted
+        for version, (_, replaced) in list(self._versions.items())[:-1]:
+            if len(self._versions) > self.keep or now - replaced > self.retain:
+                del self._versions[version]
+
+    def _count(self, stat):
+        if self.on_stat is not None:
+            self.on_stat(stat)
+
+    def check(self):
+        """Start a background rebuild if the files changed. Returns True while a rebuild is running."""
+        with self._lock:
+            if self._building is not None and self._building.is_alive():
+                return True
+            signature = files_signature(self.paths)
+            if signature == self._signature:
+                return False
+            self._building = threading.Thread(target=self._rebuild, args=(signature,), name='data-rebuild',
+                                              daemon=True)
+            self._building.start()
+        return True
+
+    def reload(self):
+        """check() even if the files look unchanged (the rebuild is skipped when their content is the same)."""
+        with self._lock:
+            self._signature = None
+        return self.check()
+
+    def wait(self, timeout=None):
+        """Block until the running background rebuild, if any, is done."""
+        building = self._building
+        if building is not None:
+            building.join(timeout)
+
+    def _settled(self, signature):
+        # Signature of the files once it stayed the same for self.settle seconds
+        while True:
+            time.sleep(self.settle)
+            latest = files_signature(self.paths)
+            if latest == signature:
+                return signature
+            signature = latest
+
+    def _rebuild(self, signature):
+        try:
+            if self.settle:
+                signature = self._settled(signature)
+            version = content_version(self.paths)
+            if version == self.version:
+                self._signature = signature
+                self._count('unchanged')
+                return
+            self._install(version, signature)
+            print(f"Data version {version} loaded in {self.build_seconds * 1000:.0f} ms")
+        except Exception as e:
+            # Keep serving the current version; the next change of the files retries
+            self._signature = signature
+            print(f"Data reload failed, still serving version {self.version}: {e!r}")
+
+    def start(self, interval):
+        """Poll the files every interval seconds from a daemon thread."""
+        self._interval = interval
+
+        def run():
+            while not self._stop.wait(interval):
+                self.check()
+        self._watcher = threading.Thread(target=run, name='data-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        self._interval = None
+        if self._watcher is not None:
+            self._watcher.join()
+        self.wait()
+
+    def status(self):
+        return {
+            'version': self.version,
+            'versions': self.versions(),
+            'reloading': self._building is not None and self._building.is_alive(),
+            'loaded_at': self.loaded_at,
+            'build_seconds': None if self.build_seconds is None else round(self.build_seconds, 3),
+            'error': repr(self.error) if self.error else None,
+        }
@@ -0,0 +1,159 @@
+"""Incremental, rate-limited geocoding of country names.
+
+Lookups go through a pluggable geocoder (Nominatim, or a local fixture for
+offline runs), run in a small thread pool behind one global rate limiter, and
+land in a JSON cache on disk that is saved after every batch, so an interrupted
+run resumes where it stopped.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .coordinates import CSV_COLUMNS, read_coordinates_csv, write_coordinates_csv  # noqa: F401
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class Geocoder:
+    """Backend turning a place name into (latitude, longitude), or None when it is unknown."""
+    name = ""
+
+    def geocode(self, query):
+        raise NotImplementedError
+
+
+class NominatimGeocoder(Geocoder):
+    name = "nominatim"
+
+    def __init__(self, user_agent="energy_game", timeout=10):
+        from geopy.geocoders import Nominatim  # imported lazily so fixture runs don't need geopy
+        self._geolocator = Nominatim(user_agent=user_agent, timeout=timeout)
+
+    def geocode(self, query):
+        location = self._geolocator.geocode(query)
+        return (location.latitude, location.longitude) if location else None
+
+
+class FixtureGeocoder(Geocoder):
+    """Offline backend reading a country,latitude,longitude CSV (e.g. a previous output file)."""
+    name = "fixture"
+
+    def __init__(self, path):
+        self.coordinates = {country: coords for country, coords in read_coordinates_csv(path).items() if coords}
+        self.calls = 0
+
+    def geocode(self, query):
+        self.calls += 1
+        return self.coordinates.get(query)
+
+
+def create_geocoder(name, fixture=None):
+    if name == 'nominatim':
+        return NominatimGeocoder()
+    if name == 'fixture':
+        if not fixture:
+            raise ValueError("The fixture geocoder needs a fixture CSV")
+        return FixtureGeocoder(fixture)
+    raise ValueError(f"Unknown geocoder: {name!r}")
+
+
+class GeocodeCache:
+    """Persistent {backend: {query: [lat, lon] or null}}; null records a lookup that found nothing."""
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self._entries = json.load(f)
+
+    def get(self, backend, query, default=None):
+        with self._lock:
+            value = self._entries.get(backend, {}).get(query, default)
+        return tuple(value) if isinstance(value, list) else value
+
+    def __contains__(self, key):
+        backend, query = key
+        with self._lock:
+            return query in self._entries.get(backend, {})
+
+    def set(self, backend, query, coords):
+        with self._lock:
+            self._entries.setdefault(backend, {})[query] = list(coords) if coords else None
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self._entries, indent=1, sort_keys=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+
+def lookup(geocoder, query, limiter, retries=3, backoff=0.5):
+    """(lat, lon) or None; raises the last error once every attempt failed."""
+    for attempt in range(retries):
+        limiter.acquire()
+        try:
+            return geocoder.geocode(query)
+        except Exception as e:
+            print(f"Error geocoding {query} on attempt {attempt + 1}: {e}")
+            if attempt == retries - 1:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+def geocode_missing(queries, geocoder, cache, workers=2, rate=1.0, retries=3, batch_size=20, on_batch=None):
+    """Geocode the queries the cache has no answer for, in batches.
+
+    After each batch the cache is saved and on_batch(results) is called with
+    {query: coords} for every query so far, so callers can checkpoint their
+    output too. Queries whose lookups kept failing are left out of the cache
+    and retried on the next run. Returns the results of this run.
+    """
+    pending = [q for q in queries if (geocoder.name, q) not in cache]
+    limiter = RateLimiter(rate)
+    results = {}
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='geocode')
+    try:
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            futures = [(q, pool.submit(lookup, geocoder, q, limiter, retries)) for q in batch]
+            for query, future in futures:
+                try:
+                    coords = future.result()
+                except Exception:
+                    continue
+                cache.set(geocoder.name, query, coords)
+                results[query] = coords
+                print(f"Found {query}: {coords[0]}, {coords[1]}" if coords else f"Warning: Coordinates not found for {query}")
+            cache.save()
+            if on_batch is not None:
+                on_batch(results)
+    except KeyboardInterrupt:
+        # Keep whatever the interrupted batch already found
+        cache.save()
+        raise
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
@@ -0,0 +1,69 @@
+"""Energy and coordinate arrays loaded once by the gunicorn master and mapped by every worker.
+
+With SHARED_DATA=1, gunicorn.conf.py calls publish_shared_data() in the master
+before any worker is forked. It writes the data as .npy files to a fresh
+directory on tmpfs (/dev/shm where available) and exports the path in
+SHARED_DATA_DIR. Workers then load_shared_data() with mmap_mode='r', so every
+worker reads the same physical pages instead of parsing and holding its own
+copy. The layout is the snapshot format (see utils.snapshot), with country names
+dictionary-encoded as int16 codes, plus:
+
+    coordinates.npy   float64 array of shape (n, 2), latitude and longitude (NaN = unknown)
+    coordinates.json  country names of the coordinates.npy rows
+"""
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from .coordinates import read_coordinates_csv
+from .snapshot import LoadReport, current_rss, load_energy_data, load_snapshot, write_snapshot_files
+
+SHARED_DATA_ENV = 'SHARED_DATA_DIR'
+
+
+def shared_memory_root():
+    """tmpfs directory for published data, or the temp directory where there is none."""
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+
+def read_coordinates(path):
+    """{country: (lat, lon)} for the countries with known coordinates in a coordinates CSV."""
+    return {country: coords for country, coords in read_coordinates_csv(path).items() if coords}
+
+
+def publish_shared_data(csv_path, snapshot_dir, coordinates_csv, columns, root=None):
+    """Write the energy data and coordinates to a new directory under root and return its path."""
+    frame, report = load_energy_data(csv_path, snapshot_dir, columns)
+    coordinates = read_coordinates_csv(coordinates_csv)
+    directory = tempfile.mkdtemp(prefix='energy-game-', dir=root or shared_memory_root())
+    write_snapshot_files(frame, directory, columns, source_hash=None)
+    names = sorted(coordinates)
+    table = np.array([coordinates[name] or (np.nan, np.nan) for name in names], dtype=np.float64).reshape(-1, 2)
+    np.save(os.path.join(directory, 'coordinates.npy'), table)
+    with open(os.path.join(directory, 'coordinates.json'), 'w') as f:
+        json.dump(names, f)
+    return directory
+
+
+def load_shared_data(directory):
+    """Map published data read-only. Returns (frame, {country: (lat, lon)}, LoadReport)."""
+    start = time.perf_counter()
+    rss_before = current_rss()
+    frame = load_snapshot(directory)
+    table = np.load(os.path.join(directory, 'coordinates.npy'), mmap_mode='r')
+    with open(os.path.join(directory, 'coordinates.json')) as f:
+        names = json.load(f)
+    located = ~np.isnan(table).any(axis=1)
+    coordinates = {name: (float(lat), float(lon)) for name, (lat, lon), ok in zip(names, table, located) if ok}
+    report = LoadReport(
+        source='shared',
+        seconds=time.perf_counter() - start,
+        frame_bytes=int(frame.memory_usage(deep=True).sum()),
+        rss_delta_bytes=current_rss() - rss_before,
+    )
+    return frame, coordinates, report
@@ -0,0 +1,165 @@
+"""Column-pruned binary snapshot of the OWID energy CSV.
+
+The snapshot is a directory of .npy files that load with mmap_mode='r':
+
+    meta.json        source CSV sha256, size and mtime, row count, column names, country categories
+    values.npy       float32 array of shape (n_numeric_columns, n_rows)
+    year.npy         int16 years
+    country.npy      int16 dictionary codes into meta['categories'] (-1 = missing)
+
+Numeric columns are stored as one block so the DataFrame built from it is a
+zero-copy view of the mapped file.
+
+pandas is imported on first load rather than with this module, so importing the
+app does not pay for it before the data is actually read (see WARMUP in app.py).
+"""
+import hashlib
+import json
+import os
+import resource
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+
+LoadReport = namedtuple('LoadReport', ['source', 'seconds', 'frame_bytes', 'rss_delta_bytes'])
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_stamp(path):
+    """(size, mtime in ns) of path: a cheap check that a file is unchanged before hashing it."""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def snapshot_matches(meta, csv_path):
+    """Whether meta was built from the CSV at csv_path: same size and mtime, else the same sha256."""
+    if [meta.get('source_size'), meta.get('source_mtime_ns')] == list(file_stamp(csv_path)):
+        return True
+    return meta['source_sha256'] == file_sha256(csv_path)
+
+
+def current_rss():
+    """Resident set size of this process in bytes (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def read_energy_csv(csv_path, columns):
+    """Read only country, year and the given numeric columns, with compact dtypes."""
+    import pandas as pd
+    dtypes = {column: np.float32 for column in columns}
+    dtypes['country'] = 'category'
+    frame = pd.read_csv(csv_path, usecols=['country', 'year'] + list(columns), dtype=dtypes)
+    frame['year'] = frame['year'].astype(np.int16)
+    return frame
+
+
+def write_snapshot_files(frame, directory, columns, source_hash, source_stamp=(None, None)):
+    """Write frame's country, year and columns into an existing directory in snapshot format. Returns meta."""
+    countries = frame['country'].astype('category').cat
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'source_sha256': source_hash,
+        'source_size': source_stamp[0],
+        'source_mtime_ns': source_stamp[1],
+        'rows': len(frame),
+        'columns': list(columns),
+        'categories': [str(c) for c in countries.categories],
+    }
+    values = np.ascontiguousarray(frame[list(columns)].to_numpy(dtype=np.float32).T)
+    np.save(os.path.join(directory, 'values.npy'), values)
+    np.save(os.path.join(directory, 'year.npy'), frame['year'].to_numpy(dtype=np.int16))
+    np.save(os.path.join(directory, 'country.npy'), np.asarray(countries.codes).astype(np.int16))
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    return meta
+
+
+def build_snapshot(csv_path, snapshot_dir, columns):
+    """Write a snapshot of csv_path to snapshot_dir, replacing any existing one. Returns meta."""
+    # Stamped before reading: a CSV that changes during the build fails the stamp check and gets hashed
+    source_stamp = file_stamp(csv_path)
+    source_hash = file_sha256(csv_path)
+    frame = read_energy_csv(csv_path, columns)
+
+    parent = os.path.dirname(os.path.abspath(snapshot_dir))
+    tmp_dir = tempfile.mkdtemp(prefix='.snapshot-', dir=parent)
+    try:
+        meta = write_snapshot_files(frame, tmp_dir, columns, source_hash, source_stamp)
+        # Swap the finished directory in so readers never see a half-written snapshot
+        if os.path.isdir(snapshot_dir):
+            shutil.rmtree(snapshot_dir)
+        os.rename(tmp_dir, snapshot_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return meta
+
+
+def read_snapshot_meta(snapshot_dir):
+    try:
+        with open(os.path.join(snapshot_dir, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('version') == SNAPSHOT_VERSION else None
+
+
+def load_snapshot(snapshot_dir, meta=None):
+    """Memory-map a snapshot and wrap it in a DataFrame without copying the numeric block."""
+    meta = meta or read_snapshot_meta(snapshot_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No usable snapshot in {snapshot_dir}")
+    values = np.load(os.path.join(snapshot_dir, 'values.npy'), mmap_mode='r')
+    years = np.load(os.path.join(snapshot_dir, 'year.npy'), mmap_mode='r')
+    codes = np.load(os.path.join(snapshot_dir, 'country.npy'), mmap_mode='r')
+    return frame_from_arrays(values, years, codes, meta['columns'], meta['categories'])
+
+
+def frame_from_arrays(values, years, codes, columns, categories):
+    import pandas as pd
+    frame = pd.DataFrame(values.T, columns=columns, copy=False)
+    frame.insert(0, 'year', years)
+    frame.insert(0, 'country', pd.Categorical.from_codes(codes, categories))
+    return frame
+
+
+def load_energy_data(csv_path, snapshot_dir, columns):
+    """Load the energy frame from a fresh snapshot, falling back to the CSV.
+
+    The snapshot is used when it was built from the CSV (or the CSV is absent).
+    That is a stat() when the CSV's size and mtime are the ones recorded at build
+    time; the CSV is only hashed when they differ. Returns (frame, LoadReport).
+    """
+    start = time.perf_counter()
+    rss_before = current_rss()
+    meta = read_snapshot_meta(snapshot_dir)
+    usable = meta is not None and set(columns) <= set(meta['columns'])
+    if usable and os.path.exists(csv_path):
+        usable = snapshot_matches(meta, csv_path)
+    if usable:
+        frame, source = load_snapshot(snapshot_dir, meta), 'snapshot'
+    else:
+        frame, source = read_energy_csv(csv_path, columns), 'csv'
+    report = LoadReport(
+        source=source,
+        seconds=time.perf_counter() - start,
+        frame_bytes=int(frame.memory_usage(deep=True).sum()),
+        rss_delta_bytes=current_rss() - rss_before,
+    )
+    return frame, report
@@ -0,0 +1,74 @@
+"""Prefix and typo-tolerant lookup over a fixed list of names."""
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+
+
+def fold(text):
+    return text.strip().casefold()
+
+
+def ngrams(text, n=3):
+    """Character n-grams of text padded with one space on each side."""
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))}
+
+
+class SuggestionIndex:
+    """Typeahead index built once over names.
+
+    Exact prefix hits come from a sorted list of folded keys searched with
+    bisect. When nothing starts with the query, candidates sharing n-grams with
+    it are ranked by Dice similarity. Results for hot queries are memoized in a
+    bounded LRU.
+    """
+
+    def __init__(self, names, n=3, min_score=0.3, cache_size=2048):
+        self.names = sorted(set(names))
+        self.n = n
+        self.min_score = min_score
+        order = sorted(range(len(self.names)), key=lambda i: fold(self.names[i]))
+        self.keys = [fold(self.names[i]) for i in order]
+        self.key_names = [self.names[i] for i in order]
+
+        self.gram_counts = []
+        self.postings = defaultdict(list)
+        for i, name in enumerate(self.names):
+            grams = ngrams(fold(name), n)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.postings[gram].append(i)
+
+        self.suggest = lru_cache(maxsize=cache_size)(self._suggest)
+
+    def prefix_matches(self, query, limit):
+        """Names whose folded form starts with query, alphabetically."""
+        key = fold(query)
+        if not key:
+            return []
+        lo = bisect_left(self.keys, key)
+        hi = bisect_left(self.keys, key + '\U0010ffff', lo)
+        return sorted(self.key_names[lo:hi])[:limit]
+
+    def fuzzy_matches(self, query, limit):
+        """Names ranked by n-gram Dice similarity to query (best first)."""
+        grams = ngrams(fold(query), self.n)
+        shared = defaultdict(int)
+        for gram in grams:
+            for i in self.postings.get(gram, ()):
+                shared[i] += 1
+        scored = []
+        for i, count in shared.items():
+            score = 2 * count / (len(grams) + self.gram_counts[i])
+            if score >= self.min_score:
+                scored.append((-score, self.names[i]))
+        scored.sort()
+        return [name for _, name in scored[:limit]]
+
+    def _suggest(self, query, limit=3, fuzzy=True):
+        if not fold(query):
+            return ()
+        matches = self.prefix_matches(query, limit)
+        if not matches and fuzzy:
+            matches = self.fuzzy_matches(query, limit)
+        return tuple(matches)
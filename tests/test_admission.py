@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+from src.api.admission import AdmissionControl, Limit, MemoryBucketStore, SQLiteBucketStore, parse_limits
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class BucketStoreTests:
+    """Shared cases for both backends; subclasses set self.store."""
+
+    def test_burst_then_refill(self):
+        limit = Limit(rate=2, burst=3)
+        self.assertEqual([self.store.take('a', limit, 10.0) for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(self.store.take('a', limit, 10.0), 0.5)
+        self.assertEqual(self.store.take('a', limit, 10.5), 0.0)
+        self.assertEqual(self.store.take('b', limit, 10.5), 0.0)
+
+    def test_refill_is_capped_at_burst(self):
+        limit = Limit(rate=1, burst=2)
+        self.store.take('a', limit, 0.0)
+        self.assertEqual([self.store.take('a', limit, 100.0) for _ in range(2)], [0.0, 0.0])
+        self.assertGreater(self.store.take('a', limit, 100.0), 0)
+
+
+class TestMemoryBucketStore(BucketStoreTests, unittest.TestCase):
+
+    def setUp(self):
+        self.store = MemoryBucketStore()
+
+    def test_least_recent_buckets_are_dropped(self):
+        store = MemoryBucketStore(max_buckets=4, shards=1)
+        for i in range(10):
+            store.take(f"client{i}", Limit(1, 1), 0.0)
+        self.assertEqual(len(store), 4)
+
+
+class TestSQLiteBucketStore(BucketStoreTests, unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+        self.store = SQLiteBucketStore(self.path)
+
+    def test_buckets_are_shared_between_stores(self):
+        other = SQLiteBucketStore(self.path)  # like a second gunicorn worker
+        limit = Limit(rate=1, burst=2)
+        self.assertEqual(self.store.take('a', limit, 0.0), 0.0)
+        self.assertEqual(other.take('a', limit, 0.0), 0.0)
+        self.assertGreater(self.store.take('a', limit, 0.0), 0)
+
+
+class TestAdmissionControl(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        limits = {'/hint': Limit(1, 2), '/hint/stream': Limit(1, 2), '/suggestions': Limit(100, 100)}
+        self.admission = AdmissionControl(MemoryBucketStore(), limits, debounce=0.25, max_upstream=1,
+                                          clock=self.clock)
+
+    def test_rate_limit_is_per_client_and_shared_by_route_group(self):
+        self.assertIsNone(self.admission.check('/hint/stream', 'ann'))
+        self.assertIsNone(self.admission.check('/hint', 'bob'))
+        self.admission.release('/hint')
+        self.assertIsNone(self.admission.check('/hint', 'ann'))
+        self.admission.release('/hint')
+        decision = self.admission.check('/hint/stream', 'ann')
+        self.assertEqual(decision.status, 429)
+        self.assertAlmostEqual(decision.retry_after, 1.0)
+        self.assertIsNone(self.admission.check('/guess', 'ann'))  # no limit configured
+
+    def test_upstream_concurrency_cap(self):
+        self.assertIsNone(self.admission.check('/hint', 'ann'))
+        self.assertEqual(self.admission.check('/hint', 'bob').status, 503)
+        self.admission.release('/hint')
+        self.assertIsNone(self.admission.check('/hint', 'bob'))
+        self.assertEqual(self.admission.stats['busy'], 1)
+
+    def test_suggestions_debounce(self):
+        self.assertIsNone(self.admission.check('/suggestions', 'ann'))
+        decision = self.admission.check('/suggestions', 'ann')
+        self.assertEqual(decision.status, 429)
+        self.assertAlmostEqual(decision.retry_after, 0.25)
+        self.assertIsNone(self.admission.check('/suggestions', 'bob'))
+        self.clock.now += 0.25
+        self.assertIsNone(self.admission.check('/suggestions', 'ann'))
+        self.assertEqual(self.admission.stats['debounced'], 1)
+
+    def test_parse_limits(self):
+        self.assertEqual(parse_limits(' /hint=0.5:3, /guess=10 ,'), {'/hint': Limit(0.5, 3), '/guess': Limit(10, 1)})
+        for spec in ('/hint=fast', '/hint=0:5', '/hint=-1', '/hint=1:0.5', '/hint=nan'):
+            with self.subTest(spec=spec), self.assertRaises(ValueError):
+                parse_limits(spec)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks.common import ROOT_DIR, SRC_DIR
+from src.utils.snapshot import read_snapshot_meta
+
+ENERGY_CSV = os.path.join(ROOT_DIR, 'data', 'owid-energy-data.csv')
+ENERGY_SNAPSHOT = os.path.join(ROOT_DIR, 'data', 'owid-energy-data.snapshot')
+ADMIN_TOKEN = 'test-token'
+
+
+def import_app():
+    """src/app.py with the shipped defaults on a Heroku dyno, throwaway stores, offline hints and the profiler on."""
+    tmp = tempfile.mkdtemp(prefix='energy-game-app-')
+    env = {
+        'SESSION_DB_PATH': os.path.join(tmp, 'sessions.sqlite3'),
+        'EVENTS_DB_PATH': os.path.join(tmp, 'events.sqlite3'),
+        'LEADERBOARD_PATH': os.path.join(tmp, 'leaderboard.sqlite3'),
+        'HINT_PROVIDER': 'stub',
+        'HINT_WARM_AHEAD': '0',
+        'DATA_WATCH_INTERVAL': '0',
+        'ENABLE_PROFILER': '1',
+        'ADMIN_TOKEN': ADMIN_TOKEN,
+        'DYNO': 'web.1',
+    }
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    # The app reads its settings at import; the test process keeps its own environment
+    with mock.patch.dict(os.environ, env):
+        import app
+    return app
+
+
+@unittest.skipUnless(os.path.exists(ENERGY_CSV) or read_snapshot_meta(ENERGY_SNAPSHOT) is not None,
+                     "needs data/owid-energy-data.csv or its snapshot")
+class TestApp(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = import_app()
+
+    def setUp(self):
+        self.client = self.app.app.test_client()
+
+    def test_profiler_is_for_admins_only(self):
+        for headers in ({}, {'Authorization': 'Bearer wrong'}):
+            with self.subTest(headers=headers):
+                self.assertEqual(self.client.post('/debug/profile/start', headers=headers).status_code, 404)
+                self.assertFalse(self.app.PROFILER.running)
+        admin = {'Authorization': f"Bearer {ADMIN_TOKEN}"}
+        self.assertEqual(self.client.post('/debug/profile/start', headers=admin).status_code, 200)
+        self.assertEqual(self.client.post('/debug/profile/stop').status_code, 404)
+        response = self.client.post('/debug/profile/stop', headers=admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/plain')
+
+    def test_clients_behind_the_router_get_their_own_buckets(self):
+        burst = int(self.app.ADMISSION.limits['/start_game'].burst)
+        first = {'X-Forwarded-For': '203.0.113.7'}
+        statuses = [self.client.get('/start_game', headers=first).status_code for _ in range(burst + 1)]
+        self.assertEqual(statuses[:burst], [200] * burst)
+        self.assertEqual(statuses[-1], 429)
+        second = {'X-Forwarded-For': '198.51.100.4'}
+        self.assertEqual(self.client.get('/start_game', headers=second).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
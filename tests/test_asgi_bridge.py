@@ -0,0 +1,180 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+
+from src.api.room_endpoints import room_events_asgi
+from src.game.rooms import RoomManager
+from src.utils.asgi_bridge import WSGIBridge
+
+
+def wsgi_app(environ, start_response):
+    if environ['PATH_INFO'] == '/slow':
+        time.sleep(0.2)
+    body = json.dumps({
+        'path': environ['PATH_INFO'],
+        'query': environ['QUERY_STRING'],
+        'body': environ['wsgi.input'].read().decode(),
+        'thread': threading.current_thread().name,
+        'cookie': environ.get('HTTP_COOKIE'),
+    }).encode()
+    start_response('200 OK', [('Content-Type', 'application/json'), ('Set-Cookie', 'a=1')])
+    return [body]
+
+
+def streaming_app(environ, start_response):
+    state = environ['test.state']
+    start_response('200 OK', [('Content-Type', 'text/event-stream')])
+
+    def chunks():
+        try:
+            for i in range(50):
+                time.sleep(0.01)
+                yield f"data: {i}\n\n".encode()
+            state['finished'] = True
+        finally:
+            state['closed'] = True
+    return chunks()
+
+
+async def call(app, path, body=b'', query=b''):
+    scope = {'type': 'http', 'method': 'POST', 'path': path, 'query_string': query,
+             'headers': [(b'cookie', b'sid=1'), (b'content-type', b'application/json')]}
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent
+
+
+class TestWSGIBridge(unittest.TestCase):
+
+    def test_request_round_trip(self):
+        app = WSGIBridge(wsgi_app, {'/slow': 1})
+        sent = asyncio.run(call(app, '/fast', b'{"guess": "x"}', b'prefix=ge'))
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn((b'set-cookie', b'a=1'), sent[0]['headers'])
+        payload = json.loads(sent[1]['body'])
+        self.assertEqual(payload['query'], 'prefix=ge')
+        self.assertEqual(payload['body'], '{"guess": "x"}')
+        self.assertEqual(payload['cookie'], 'sid=1')
+        self.assertTrue(payload['thread'].startswith('wsgi'))
+
+    def test_blocking_request_does_not_stall_the_loop(self):
+        app = WSGIBridge(wsgi_app, {})
+        finished = []
+
+        async def timed(path):
+            sent = await call(app, path)
+            finished.append(path)
+            return sent
+
+        async def scenario():
+            return await asyncio.gather(timed('/slow'), timed('/fast'))
+
+        slow, fast = asyncio.run(scenario())
+        self.assertEqual((slow[0]['status'], fast[0]['status']), (200, 200))
+        self.assertEqual(finished, ['/fast', '/slow'])
+
+    def test_limited_path_runs_in_pool_and_sheds_load(self):
+        app = WSGIBridge(wsgi_app, {'/slow': 1}, queue_timeout=0.05)
+
+        async def scenario():
+            return await asyncio.gather(call(app, '/slow'), call(app, '/slow'), call(app, '/fast'))
+
+        slow, rejected, fast = asyncio.run(scenario())
+        self.assertEqual(slow[0]['status'], 200)
+        self.assertTrue(json.loads(slow[1]['body'])['thread'].startswith('upstream'))
+        self.assertEqual(rejected[0]['status'], 503)
+        self.assertEqual(fast[0]['status'], 200)
+
+
+async def stream_call(app, path, disconnect_after=None, headers=()):
+    """Like call, but the client stays connected until disconnect_after messages were sent."""
+    disconnect = asyncio.Event()
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+        if len(sent) == disconnect_after:
+            disconnect.set()
+
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'', 'headers': list(headers)}
+    await app(scope, receive, send)
+    await asyncio.sleep(0.1)  # let the app notice the disconnect
+    return sent
+
+
+class TestStreaming(unittest.TestCase):
+
+    def make_app(self, state):
+        def wrapped(environ, start_response):
+            environ['test.state'] = state
+            return streaming_app(environ, start_response)
+        return WSGIBridge(wrapped, {'/rooms/*/events': 1}, streaming=('/rooms/*/events',))
+
+    def test_chunks_are_forwarded_until_the_end(self):
+        state = {}
+        sent = asyncio.run(stream_call(self.make_app(state), '/rooms/abc/events'))
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertEqual(len(sent), 52)
+        self.assertEqual(sent[1], {'type': 'http.response.body', 'body': b"data: 0\n\n", 'more_body': True})
+        self.assertEqual(sent[-1], {'type': 'http.response.body', 'body': b''})
+        self.assertTrue(state['finished'])
+
+    def test_disconnect_closes_the_app(self):
+        state = {}
+        sent = asyncio.run(stream_call(self.make_app(state), '/rooms/abc/events', disconnect_after=4))
+        self.assertLess(len(sent), 52)
+        self.assertTrue(state['closed'])
+        self.assertNotIn('finished', state)
+
+
+class TestRoomEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.rooms = RoomManager(lambda guess_id, target: ("N", 100.0), "Correct")
+        self.room_id, self.host = self.rooms.create("room", "ann")
+        self.app = WSGIBridge(wsgi_app, {}, handlers={'/rooms/*/events': room_events_asgi(self.rooms)})
+
+    def test_stream_is_served_on_the_loop_until_disconnect(self):
+        async def scenario():
+            call = asyncio.ensure_future(stream_call(self.app, f"/rooms/{self.room_id}/events", disconnect_after=3))
+            await asyncio.sleep(0.05)
+            self.assertEqual(self.rooms.listeners(self.room_id), 1)
+            self.rooms.join(self.room_id, "bob")
+            return await call
+
+        sent = asyncio.run(scenario())
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'), sent[0]['headers'])
+        self.assertTrue(sent[1]['body'].startswith(b"id: 1\nevent: joined"))
+        self.assertTrue(sent[2]['body'].startswith(b"id: 2\nevent: joined"))
+        self.assertEqual(self.rooms.listeners(self.room_id), 0)
+
+    def test_resumes_after_last_event_id_and_rejects_unknown_rooms(self):
+        self.rooms.join(self.room_id, "bob")
+        sent = asyncio.run(stream_call(self.app, f"/rooms/{self.room_id}/events", disconnect_after=2,
+                                       headers=[(b'last-event-id', b'1')]))
+        self.assertTrue(sent[1]['body'].startswith(b"id: 2\nevent: joined"))
+        sent = asyncio.run(stream_call(self.app, "/rooms/nope/events"))
+        self.assertEqual(sent[0]['status'], 404)
+        self.assertEqual(json.loads(sent[1]['body'])['message'], "Room not found")
+
+
+if __name__ == '__main__':
+    unittest.main()
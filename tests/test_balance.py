@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+from benchmarks.balance import STRATEGIES, distribution, play, simulate, simulate_target
+from src.game.geo import GeoEngine
+
+# A 4 x 4 grid of made-up countries, 5 degrees apart
+COORDINATES = {f"c{row}{col}": (10.0 + 5 * row, 20.0 + 5 * col) for row in range(4) for col in range(4)}
+
+
+class TestBalance(unittest.TestCase):
+
+    def setUp(self):
+        self.geo = GeoEngine(COORDINATES)
+
+    def test_every_game_ends_on_the_target(self):
+        n = len(self.geo)
+        for name in STRATEGIES:
+            with self.subTest(strategy=name):
+                counts = simulate_target(self.geo, name, 5)
+                self.assertEqual(counts[5], 1)
+                self.assertTrue(((counts >= 2) & (counts <= n))[np.arange(n) != 5].all())
+                np.testing.assert_array_equal(counts, simulate_target(self.geo, name, 5))
+
+    def test_strategies_use_the_hints(self):
+        means = {name: simulate(self.geo, name, workers=1)[0].mean() for name in STRATEGIES}
+        # Direction and exact distance from one wrong guess leave very few countries
+        self.assertLess(means['elimination'], 3)
+        self.assertLess(means['greedy'], means['random'])
+
+    def test_elimination_never_guesses_an_inconsistent_country(self):
+        guesses = []
+
+        def record(geo, turn, rng):
+            guess = STRATEGIES['elimination'](geo, turn, rng)
+            guesses.append((turn.guess, turn.cardinal, turn.distance, guess))
+            return guess
+        play(self.geo, record, 0, [15], np.random.default_rng(1))
+        for last, cardinal, distance, guess in guesses:
+            self.assertEqual(self.geo.cardinals[last[0], guess[0]], cardinal[0])
+            self.assertAlmostEqual(self.geo.distances[last[0], guess[0]], distance[0], delta=0.5)
+
+    def test_workers_match_a_serial_run(self):
+        serial, _ = simulate(self.geo, 'random', seed=3, workers=1)
+        parallel, _ = simulate(self.geo, 'random', seed=3, workers=2)
+        np.testing.assert_array_equal(serial, parallel)
+        summary = distribution(serial)
+        self.assertEqual(sum(summary['histogram']), serial.size)
+        self.assertEqual(summary['histogram'][0], len(self.geo))
+
+
+if __name__ == '__main__':
+    unittest.main()
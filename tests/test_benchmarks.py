@@ -0,0 +1,31 @@
+import unittest
+
+from benchmarks.common import percentile, summarize
+from benchmarks.compare import compare
+
+
+class TestBenchmarkHelpers(unittest.TestCase):
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_summarize(self):
+        stats = summarize([0.001] * 9 + [0.1], elapsed=2.0)
+        self.assertEqual(stats['count'], 10)
+        self.assertEqual(stats['throughput_rps'], 5.0)
+        self.assertAlmostEqual(stats['p50_ms'], 1.0)
+        self.assertAlmostEqual(stats['p99_ms'], 100.0)
+
+    def test_compare_flags_regressions(self):
+        base = {'endpoints': {'/guess': {'p50_ms': 1.0, 'count': 10}}, 'micro_us': {'hint': 2.0}}
+        new = {'endpoints': {'/guess': {'p50_ms': 1.5, 'count': 99}}, 'micro_us': {'hint': 2.1}}
+        rows = {metric: regressed for metric, _, _, _, regressed in compare(base, new, threshold=10)}
+        self.assertEqual(rows, {'endpoints./guess.p50_ms': True, 'micro_us.hint': False})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import datetime
+import json
+import unittest
+
+from src.api.daily import DailyChallenges, seconds_until_midnight, utc_today
+from src.game.registry import CountryRegistry
+from src.game.round_pool import Round
+
+NAMES = ["Chile", "Fiji", "Japan", "Norway", "Peru"]
+
+
+class FakePool:
+
+    def find(self, country, year):
+        if country == "Fiji":
+            return None
+        return Round(country, year, {"electricity_generation": 10.0 + len(country)}, None)
+
+
+def score_all(target):
+    cardinals = ["Correct" if i == target else "N" for i in range(len(NAMES))]
+    return cardinals, [abs(i - target) * 1000.0 for i in range(len(NAMES))]
+
+
+class TestDailyChallenges(unittest.TestCase):
+
+    def setUp(self):
+        self.daily = DailyChallenges(CountryRegistry(NAMES), FakePool(), score_all, "Correct", 2020)
+
+    def test_each_candidate_once_per_cycle(self):
+        start = datetime.date(2024, 1, 1)
+        targets = [self.daily.target_for(start + datetime.timedelta(days=d)) for d in range(8)]
+        self.assertEqual(sorted(targets[:4]), [0, 2, 3, 4])  # Fiji has no round
+        self.assertEqual(sorted(targets[4:]), [0, 2, 3, 4])
+        # Stable across instances
+        other = DailyChallenges(CountryRegistry(NAMES), FakePool(), score_all, "Correct", 2020)
+        self.assertEqual(other.target_for(start), targets[0])
+
+    def test_responses_are_precomputed_once(self):
+        date = datetime.date(2026, 3, 14)
+        daily = self.daily.get(date)
+        self.assertIs(self.daily.get(date), daily)
+        start = json.loads(daily.start.body)
+        self.assertEqual(start['date'], '2026-03-14')
+        self.assertNotIn('country', start['energy_data'])
+        correct = json.loads(daily.guesses[daily.target].body)
+        self.assertEqual(correct['target'], NAMES[daily.target])
+        other = (daily.target + 1) % len(NAMES)
+        self.assertEqual(json.loads(daily.guesses[other].body)['distance_km'], 1000)
+
+    def test_old_days_are_dropped(self):
+        first = datetime.date(2026, 3, 14)
+        for offset in range(4):
+            self.daily.get(first + datetime.timedelta(days=offset))
+        self.assertEqual(sorted(self.daily._days), [datetime.date(2026, 3, 16), datetime.date(2026, 3, 17)])
+
+    def test_reload_keeps_the_days_in_play(self):
+        today = utc_today()
+        tomorrow = today + datetime.timedelta(days=1)
+        # Brazil is added: the shuffle is of a different list, but today's and yesterday's targets stay
+        names = ["Brazil"] + NAMES
+        registry = CountryRegistry(names)
+        reloaded = DailyChallenges(registry, FakePool(), score_all, "Correct", 2020, previous=self.daily)
+        fresh = DailyChallenges(registry, FakePool(), score_all, "Correct", 2020)
+        for date in (today - datetime.timedelta(days=1), today):
+            self.assertEqual(names[reloaded.target_for(date)], NAMES[self.daily.target_for(date)])
+        self.assertEqual(reloaded.target_for(tomorrow), fresh.target_for(tomorrow))
+        # Chained reloads keep the same targets
+        again = DailyChallenges(registry, FakePool(), score_all, "Correct", 2020, previous=reloaded)
+        self.assertEqual(again.target_for(today), reloaded.target_for(today))
+
+    def test_seconds_until_midnight(self):
+        now = datetime.datetime(2026, 3, 14, 23, 59, 30, tzinfo=datetime.timezone.utc)
+        self.assertEqual(seconds_until_midnight(now), 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
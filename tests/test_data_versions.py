@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+from src.utils.data_versions import DataVersions, content_version
+
+
+class FakeClock:
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestDataVersions(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'energy.csv')
+        self.addCleanup(os.remove, self.path)
+        self.write("country,year\nNorway,2020\n")
+        self.builds = []
+        self.stats = []
+        self.clock = FakeClock(1000.0)
+        self.fail = False
+        self.data = DataVersions(self.build, [self.path], keep=2, retain=60, settle=0, clock=self.clock,
+                                 on_stat=self.stats.append)
+
+    def write(self, text):
+        with open(self.path, 'w') as f:
+            f.write(text)
+        # Some filesystems have coarse mtimes; the size alone must not be what changes
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + len(text) * 10**9))
+
+    def build(self, version, previous):
+        if self.fail:
+            raise ValueError("bad file")
+        with open(self.path) as f:
+            rows = f.read().splitlines()[1:]
+        self.builds.append((version, previous))
+        return {'version': version, 'rows': rows}
+
+    def reload(self):
+        self.assertTrue(self.data.check())
+        self.data.wait()
+
+    def test_change_is_swapped_in_and_old_version_kept(self):
+        first = self.data.load()
+        self.assertEqual(first, content_version([self.path]))
+        self.assertFalse(self.data.check())
+        old = self.data.current
+
+        self.write("country,year\nNorway,2020\nChile,2020\n")
+        self.reload()
+        self.assertEqual(self.data.current['rows'], ["Norway,2020", "Chile,2020"])
+        self.assertIs(self.builds[-1][1], old)
+        # Games started before the reload still find their data
+        self.assertIs(self.data.get(first), old)
+        self.assertEqual(self.data.versions(), [first, self.data.version])
+        self.assertEqual(self.stats, ['loaded', 'loaded'])
+
+    def test_old_versions_are_evicted(self):
+        first = self.data.load()
+        self.write("country,year\nChile,2020\n")
+        self.reload()
+        second = self.data.version
+        self.write("country,year\nPeru,2020\n")
+        self.reload()
+        self.assertIsNone(self.data.get(first))
+        self.assertIsNotNone(self.data.get(second))
+        third = self.data.version
+        # Replaced more than retain seconds ago
+        self.data.keep = 5
+        self.clock.now += 61
+        self.write("country,year\nLima,2020\n")
+        self.reload()
+        self.assertEqual(self.data.versions(), [third, self.data.version])
+        self.assertEqual(self.data.current['rows'], ["Lima,2020"])
+
+    def test_unchanged_content_is_not_rebuilt(self):
+        self.data.load()
+        self.assertTrue(self.data.reload())
+        self.data.wait()
+        self.assertEqual(len(self.builds), 1)
+        self.assertEqual(self.stats, ['loaded', 'unchanged'])
+
+    def test_failed_rebuild_keeps_serving(self):
+        first = self.data.load()
+        self.fail = True
+        self.write("country,year\nbroken\n")
+        self.reload()
+        self.assertEqual(self.data.version, first)
+        self.assertIsInstance(self.data.error, ValueError)
+        self.assertEqual(self.stats, ['loaded', 'failed'])
+        # Not retried until the files change again
+        self.assertFalse(self.data.check())
+        self.assertEqual(self.data.status()['error'], "ValueError('bad file')")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.api.events import GUESS, START, WIN, EventBuffer, EventLog
+
+NAMES = ["Chile", "Norway", "Peru"]
+
+
+class TestEventBuffer(unittest.TestCase):
+
+    def test_drain_wraps_around_and_full_buffer_drops(self):
+        buffer = EventBuffer(capacity=4)
+        for i in range(3):
+            self.assertTrue(buffer.append(i, START, i))
+        self.assertEqual(buffer.drain()['session'].tolist(), [0, 1, 2])
+        for i in range(3, 8):
+            buffer.append(i, START, 0)
+        self.assertEqual(buffer.dropped, 1)
+        self.assertEqual(buffer.drain()['session'].tolist(), [3, 4, 5, 6])
+        self.assertEqual(len(buffer.drain()), 0)
+
+
+class TestEventLog(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        self.addCleanup(lambda: [os.remove(p) for p in (self.path, self.path + '-wal', self.path + '-shm')
+                                 if os.path.exists(p)])
+        self.log = EventLog(self.path)
+        self.assertEqual(self.log.country_ids(NAMES), [0, 1, 2])
+
+    def play(self, sid, target, wrong, log=None):
+        log = log or self.log
+        log.record(sid, START, target)
+        for attempt, guess in enumerate(wrong, 1):
+            log.record(sid, GUESS, target, guess, attempt, 1000.0 * attempt)
+        log.record(sid, WIN, target, target, len(wrong) + 1)
+
+    def test_aggregates_are_updated_incrementally(self):
+        self.play("a", 1, [0, 2])
+        self.assertEqual(self.log.flush(), 4)
+        self.play("b", 1, [0])
+        self.log.record("c", START, 2)
+        self.assertEqual(self.log.flush(), 4)
+        self.assertEqual(self.log.flush(), 0)
+
+        summary = self.log.summary(max_age=0)
+        norway = summary['countries']['Norway']
+        self.assertEqual((norway['games'], norway['wins']), (2, 2))
+        self.assertEqual(norway['average_guesses'], 2.5)
+        self.assertEqual(norway['guess_distribution'], {'2': 1, '3': 1})
+        self.assertEqual(norway['common_wrong_guesses'], ["Chile", "Peru"])
+        self.assertEqual(norway['average_miss_km'], round((1000 + 2000 + 1000) / 3))
+        self.assertEqual(summary['countries']['Peru']['win_rate'], 0.0)
+        self.assertEqual((summary['games'], summary['wins']), (3, 2))
+        self.assertEqual(summary['guess_distribution'], {'2': 1, '3': 1})
+
+        raw = sqlite3.connect(self.path).execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        self.assertEqual(raw, 8)
+
+    def test_country_ids_survive_a_renumbered_registry(self):
+        self.play("a", 1, [2])
+        self.log.flush()
+        # A reload adds Brazil: the registry renumbers Chile, Norway and Peru, the event log does not
+        reloaded = ["Brazil", "Chile", "Norway", "Peru"]
+        ids = self.log.country_ids(reloaded)
+        self.assertEqual(ids, [3, 0, 1, 2])
+        self.play("b", ids[reloaded.index("Norway")], [ids[reloaded.index("Brazil")]])
+        self.log.flush()
+        norway = self.log.summary(max_age=0)['countries']['Norway']
+        self.assertEqual(norway['wins'], 2)
+        self.assertEqual(sorted(norway['common_wrong_guesses']), ["Brazil", "Peru"])
+        self.assertEqual(EventLog(self.path).country_ids(["Peru", "Norway"]), [2, 1])
+
+    def test_summary_is_cached_for_max_age(self):
+        first = self.log.summary(max_age=60)
+        self.play("a", 0, [])
+        self.log.flush()
+        self.assertIs(self.log.summary(max_age=60), first)
+        self.assertEqual(self.log.summary(max_age=0)['games'], 1)
+
+    def test_background_flusher(self):
+        log = EventLog(self.path, interval=0.01)
+        log.start()
+        self.play("a", 0, [1], log)
+        log.stop()
+        self.assertEqual(log.summary(max_age=0)['wins'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
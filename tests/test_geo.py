@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from src.game.geo import CORRECT, GeoEngine, get_bearing, get_cardinal, haversine_distance
+
+COORDINATES = {
+    "Norway": (60.5, 8.5),
+    "Chile": (-31.8, -71.3),
+    "Japan": (36.6, 139.2),
+    "Fiji": (-18.1, 178.0),
+    "Samoa": (-13.8, -172.1),
+}
+
+
+class TestGeoEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.geo = GeoEngine(COORDINATES)
+
+    def test_matrices_match_scalar_formulas(self):
+        for guess in COORDINATES:
+            for target in COORDINATES:
+                if guess == target:
+                    continue
+                cardinal, distance = self.geo.hint(self.geo.index_of(guess), self.geo.index_of(target))
+                expected = haversine_distance(COORDINATES[guess], COORDINATES[target])
+                self.assertAlmostEqual(distance, expected, delta=0.5)
+                self.assertEqual(cardinal, get_cardinal(get_bearing(COORDINATES[guess], COORDINATES[target])))
+
+    def test_same_country_is_correct(self):
+        index = self.geo.index_of("Japan")
+        self.assertEqual(self.geo.hint(index, index), (CORRECT, 0.0))
+
+    def test_batch_score(self):
+        target = self.geo.index_of("Fiji")
+        guesses = [self.geo.index_of(name) for name in ("Samoa", "Fiji", "Norway")]
+        cardinals, distances = self.geo.score(guesses, target)
+        self.assertEqual(cardinals[1], CORRECT)
+        self.assertEqual(len(distances), 3)
+        for guess, cardinal, distance in zip(guesses, cardinals, distances):
+            self.assertEqual((cardinal, float(distance)), self.geo.hint(guess, target))
+        self.assertTrue(np.all(distances[[0, 2]] > 0))
+
+    def test_rejects_invalid_coordinates(self):
+        with self.assertRaises(ValueError):
+            GeoEngine({"Nowhere": (95.0, 0.0)})
+
+
+if __name__ == '__main__':
+    unittest.main()
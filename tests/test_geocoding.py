@@ -0,0 +1,74 @@
+import os
+import tempfile
+import time
+import unittest
+
+from src.utils.geocoding import (FixtureGeocoder, GeocodeCache, Geocoder, RateLimiter, geocode_missing,
+                                 read_coordinates_csv, write_coordinates_csv)
+
+COORDINATES = {'Chile': (-31.76, -71.31), 'Norway': (64.57, 11.52), 'Atlantis': None}
+
+
+class FlakyGeocoder(Geocoder):
+    """Fails the first attempt for every query, then answers from COORDINATES."""
+    name = "flaky"
+
+    def __init__(self):
+        self.attempts = {}
+
+    def geocode(self, query):
+        self.attempts[query] = self.attempts.get(query, 0) + 1
+        if self.attempts[query] == 1:
+            raise TimeoutError("upstream timeout")
+        return COORDINATES.get(query)
+
+
+class TestGeocoding(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.fixture = os.path.join(self.tmp.name, 'fixture.csv')
+        write_coordinates_csv(self.fixture, COORDINATES)
+
+    def test_csv_round_trip(self):
+        self.assertEqual(read_coordinates_csv(self.fixture), COORDINATES)
+        self.assertEqual(read_coordinates_csv(os.path.join(self.tmp.name, 'missing.csv')), {})
+
+    def test_rate_limiter_spaces_calls(self):
+        limiter = RateLimiter(50)
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 4 / 50 - 0.005)
+
+    def test_only_uncached_queries_are_geocoded(self):
+        cache_path = os.path.join(self.tmp.name, 'cache.json')
+        geocoder = FixtureGeocoder(self.fixture)
+        checkpoints = []
+        results = geocode_missing(['Chile', 'Norway', 'Atlantis'], geocoder, GeocodeCache(cache_path),
+                                  rate=0, batch_size=2, on_batch=lambda r: checkpoints.append(dict(r)))
+        self.assertEqual(results, COORDINATES)
+        self.assertEqual(len(checkpoints), 2)
+        self.assertEqual(geocoder.calls, 3)
+
+        # A new run with the persisted cache has nothing left to look up
+        cache = GeocodeCache(cache_path)
+        self.assertEqual(cache.get('fixture', 'Chile'), COORDINATES['Chile'])
+        self.assertIn(('fixture', 'Atlantis'), cache)
+        self.assertEqual(geocode_missing(['Chile', 'Atlantis'], geocoder, cache, rate=0), {})
+        self.assertEqual(geocoder.calls, 3)
+
+    def test_retries_and_failed_lookups(self):
+        geocoder = FlakyGeocoder()
+        cache = GeocodeCache(None)
+        results = geocode_missing(['Chile', 'Norway'], geocoder, cache, rate=0, retries=2)
+        self.assertEqual(results, {'Chile': COORDINATES['Chile'], 'Norway': COORDINATES['Norway']})
+        # With a single attempt every lookup fails and nothing is cached, so the next run retries
+        results = geocode_missing(['Atlantis'], FlakyGeocoder(), cache, rate=0, retries=1)
+        self.assertEqual(results, {})
+        self.assertNotIn(('flaky', 'Atlantis'), cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
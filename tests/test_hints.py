@@ -0,0 +1,130 @@
+import threading
+import time
+import unittest
+
+from src.hints import HintService, StreamLimitError, StubHintProvider, fallback_hint
+
+PAYLOAD = {
+    'electricity_generation': 200.0,
+    'electricity_shares': {'Coal': 20.0, 'Hydro': 150.0, 'Wind': 30.0},
+}
+
+
+class FailingProvider(StubHintProvider):
+
+    def generate(self, country):
+        raise RuntimeError("upstream down")
+
+    def stream(self, country):
+        yield "This"
+        raise RuntimeError("upstream down")
+
+
+class TestHintService(unittest.TestCase):
+
+    def make_service(self, provider, **kwargs):
+        service = HintService(provider, fallback=lambda country: f"fallback {country}", **kwargs)
+        self.addCleanup(service.shutdown)
+        return service
+
+    def test_cache_hit_skips_provider(self):
+        provider = StubHintProvider()
+        service = self.make_service(provider)
+        first = service.get("Norway")
+        self.assertEqual(service.get("Norway"), first)
+        self.assertEqual(provider.calls, 1)
+        self.assertEqual(service.stats['hits'], 1)
+
+    def test_concurrent_misses_are_coalesced(self):
+        provider = StubHintProvider(delay=0.1)
+        service = self.make_service(provider)
+        threads = [threading.Thread(target=service.get, args=("Chile",)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(provider.calls, 1)
+
+    def test_budget_falls_back_and_fills_cache_later(self):
+        provider = StubHintProvider(delay=0.2)
+        service = self.make_service(provider, budget=0.01)
+        self.assertEqual(service.get("Peru"), "fallback Peru")
+        time.sleep(0.3)
+        self.assertEqual(service.get("Peru"), provider.generate("Peru"))
+
+    def test_provider_errors_fall_back_and_are_not_cached(self):
+        service = self.make_service(FailingProvider())
+        self.assertEqual(service.get("Peru"), "fallback Peru")
+        self.assertIsNone(service.cached("Peru"))
+
+    def test_warm_prefetches(self):
+        provider = StubHintProvider()
+        service = self.make_service(provider)
+        service.warm(["Norway", "Chile"])
+        time.sleep(0.05)
+        self.assertIsNotNone(service.cached("Chile"))
+        service.get("Norway")
+        self.assertEqual(provider.calls, 2)
+
+    def test_ttl_and_lru_eviction(self):
+        service = self.make_service(StubHintProvider(), max_entries=1)
+        service.get("Norway")
+        service.get("Chile")
+        self.assertIsNone(service.cached("Norway"))
+        expiring = self.make_service(StubHintProvider(), ttl=0.01)
+        expiring.get("Norway")
+        time.sleep(0.02)
+        self.assertIsNone(expiring.cached("Norway"))
+
+
+class TestHintStream(unittest.TestCase):
+
+    def make_service(self, provider, **kwargs):
+        service = HintService(provider, fallback=lambda country: f"fallback {country}", **kwargs)
+        self.addCleanup(service.shutdown)
+        return service
+
+    def test_tokens_then_done_fills_cache(self):
+        provider = StubHintProvider()
+        service = self.make_service(provider)
+        events = list(service.stream("Norway"))
+        self.assertEqual([kind for kind, _ in events[:-1]], ['token'] * (len(events) - 1))
+        self.assertGreater(len(events), 2)
+        self.assertEqual(events[-1], ('done', provider.text("Norway")))
+        self.assertEqual(''.join(text for kind, text in events[:-1]), provider.text("Norway"))
+        self.assertEqual(service.cached("Norway"), provider.text("Norway"))
+        self.assertEqual(list(service.stream("Norway"))[-1], ('done', provider.text("Norway")))
+        self.assertEqual(provider.calls, 1)
+
+    def test_close_cancels_provider_and_frees_slot(self):
+        provider = StubHintProvider()
+        service = self.make_service(provider, max_streams=1)
+        stream = service.stream("Chile")
+        iterator = iter(stream)
+        next(iterator)
+        with self.assertRaises(StreamLimitError):
+            service.stream("Peru")
+        stream.close()
+        stream.close()
+        self.assertEqual(provider.cancelled, 1)
+        self.assertEqual(service.stats['cancelled'], 1)
+        self.assertIsNone(service.cached("Chile"))
+        # A stream closed before it started frees its slot too
+        service.stream("Peru").close()
+        self.assertEqual(list(service.stream("Peru"))[-1][0], 'done')
+
+    def test_provider_error_ends_with_fallback(self):
+        service = self.make_service(FailingProvider())
+        self.assertEqual(list(service.stream("Peru")), [('token', "This"), ('fallback', "fallback Peru")])
+        self.assertEqual(service.stats['errors'], 1)
+        self.assertEqual(service._streams, 0)
+
+
+class TestFallbackHint(unittest.TestCase):
+
+    def test_mentions_dominant_source(self):
+        self.assertIn("Hydro (about 75% of 200 TWh", fallback_hint(PAYLOAD))
+
+
+if __name__ == '__main__':
+    unittest.main()
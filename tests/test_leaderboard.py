@@ -0,0 +1,138 @@
+import datetime
+import os
+import random
+import tempfile
+import unittest
+
+from src.game.leaderboard import Board, Leaderboard, RankedList, period_key, points_for
+
+MONDAY = datetime.datetime(2024, 5, 6, 12, tzinfo=datetime.timezone.utc).timestamp()
+DAY = 24 * 60 * 60
+
+
+class FakeClock:
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestRankedList(unittest.TestCase):
+
+    def test_matches_sorted_list(self):
+        rng = random.Random(3)
+        ranked, reference = RankedList(), []
+        for _ in range(5000):
+            if reference and rng.random() < 0.4:
+                key = reference.pop(rng.randrange(len(reference)))
+                ranked.remove(key)
+            else:
+                key = rng.random()
+                reference.append(key)
+                ranked.add(key)
+        reference.sort()
+        self.assertEqual(list(ranked), reference)
+        self.assertEqual(len(ranked), len(reference))
+        for key in rng.sample(reference, 100):
+            self.assertEqual(ranked.index(key), reference.index(key))
+        self.assertEqual(ranked.head(10), reference[:10])
+        with self.assertRaises(ValueError):
+            ranked.remove(2.0)
+
+
+class TestBoard(unittest.TestCase):
+
+    def test_ranks_by_score_then_first_to_reach_it(self):
+        board = Board('alltime')
+        board.add("ann", 50)
+        board.add("bob", 80)
+        board.add("cid", 30)
+        board.add("cid", 20)  # ties ann at 50, but later
+        self.assertEqual(board.top(3), [(1, "bob", 80), (2, "ann", 50), (3, "cid", 50)])
+        self.assertEqual(board.rank("cid"), (3, 50))
+        self.assertIsNone(board.rank("dan"))
+
+    def test_bulk_load_matches_inserts(self):
+        board = Board('alltime')
+        for player, points in (("ann", 10), ("bob", 30), ("ann", 40)):
+            board.add(player, points)
+        restored = Board('alltime', list(board.keys), list(board.keys.values()))
+        self.assertEqual(restored.top(5), board.top(5))
+        restored.add("bob", 30)
+        self.assertEqual(restored.rank("bob"), (1, 60))
+
+
+class TestLeaderboard(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'board.sqlite3')
+        self.clock = FakeClock(MONDAY)
+
+    def open(self, clock=None):
+        return Leaderboard(self.path, clock or self.clock, sync_interval=0)
+
+    def test_points(self):
+        self.assertEqual([points_for(n) for n in (1, 2, 10, 50)], [100, 90, 10, 10])
+
+    def test_periods_roll_over(self):
+        leaderboard = self.open()
+        leaderboard.record_win("ann", 1)
+        self.clock.now += DAY
+        leaderboard.record_win("ann", 2)
+        self.assertEqual(leaderboard.rank('daily', "ann"), (1, 90))
+        self.assertEqual(leaderboard.rank('weekly', "ann"), (1, 190))
+        self.clock.now += 7 * DAY
+        self.assertIsNone(leaderboard.rank('weekly', "ann"))
+        self.assertEqual(leaderboard.rank('alltime', "ann"), (1, 190))
+        self.assertEqual(period_key('weekly', MONDAY), '2024-W19')
+        with self.assertRaises(ValueError):
+            period_key('yearly', MONDAY)
+
+    def test_workers_share_the_scores(self):
+        # Two workers on one file: wins recorded by either are ranked by both, ties in the order they were won
+        first, second = self.open(), self.open()
+        first.record_win("ann", 3)
+        second.record_win("bob", 1)
+        second.record_win("ann", 2)
+        first.set_name("bob", "Bob ✓")
+        for leaderboard in (first, second):
+            self.assertEqual(leaderboard.top('daily', 5), [(1, "ann", "player-ann", 170), (2, "bob", "Bob ✓", 100)])
+        first.record_win("bob", 6)
+        self.assertEqual(second.top('alltime', 2), first.top('alltime', 2))
+        self.assertEqual(second.rank('alltime', "bob"), (2, 150))
+
+    def test_win_is_applied_without_a_sync(self):
+        # Other workers' wins wait for the next sync; the winner's total includes them all the same
+        first = Leaderboard(self.path, self.clock, sync_interval=3600)
+        second = self.open()
+        second.record_win("bob", 1)
+        second.record_win("ann", 2)
+        first.record_win("ann", 3)
+        first.set_name("ann", "Ann")
+        self.assertEqual(first.top('daily', 5), [(1, "ann", "Ann", 170)])
+        first.sync(force=True)
+        self.assertEqual(first.top('daily', 5), [(1, "ann", "Ann", 170), (2, "bob", "player-bob", 100)])
+        self.assertEqual(second.top('daily', 5), first.top('daily', 5))
+
+    def test_reopened_store_drops_finished_periods(self):
+        leaderboard = self.open()
+        leaderboard.record_win("ann", 3)
+        leaderboard.record_win("bob", 1)
+        leaderboard.set_name("bob", "Bob ✓")
+
+        restored = self.open(FakeClock(MONDAY + 60))
+        self.assertEqual(restored.top('daily', 5), leaderboard.top('daily', 5))
+        self.assertEqual(restored.top('alltime', 1), [(1, "bob", "Bob ✓", 100)])
+        tomorrow = self.open(FakeClock(MONDAY + DAY))
+        self.assertEqual(tomorrow.size('daily'), 0)
+        self.assertEqual(tomorrow.rank('weekly', "ann"), (2, 80))
+        # A win on the new day starts the daily score again
+        tomorrow.record_win("ann", 1)
+        self.assertEqual(tomorrow.rank('daily', "ann"), (1, 100))
+        self.assertEqual(tomorrow.rank('weekly', "ann"), (1, 180))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from src.api.metrics import TOTALS_FILE, Metrics, clear_directory, mark_process_dead
+from src.utils.profiler import SamplingProfiler
+
+
+def record_in_child(directory):
+    metrics = Metrics(directory)
+    metrics.inc('errors_total', (('route', '/guess'),), 2)
+    metrics.observe('request_seconds', 0.003, (('route', '/guess'),))
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_counter_and_histogram_render(self):
+        metrics = Metrics()
+        metrics.inc('session_misses_total')
+        metrics.inc('session_misses_total')
+        metrics.observe('request_seconds', 0.0007, (('route', '/guess'),))
+        metrics.observe('request_seconds', 20.0, (('route', '/guess'),))
+        text = metrics.render()
+        self.assertIn("energy_game_session_misses_total 2", text)
+        self.assertIn('energy_game_request_seconds_bucket{route="/guess",le="0.0005"} 0', text)
+        self.assertIn('energy_game_request_seconds_bucket{route="/guess",le="0.001"} 1', text)
+        self.assertIn('energy_game_request_seconds_bucket{route="/guess",le="10.0"} 1', text)
+        self.assertIn('energy_game_request_seconds_bucket{route="/guess",le="+Inf"} 2', text)
+        self.assertIn('energy_game_request_seconds_count{route="/guess"} 2', text)
+
+    def test_timed_decorator(self):
+        metrics = Metrics()
+
+        @metrics.timed('slow_helper')
+        def slow_helper():
+            time.sleep(0.002)
+            return 42
+
+        self.assertEqual(slow_helper(), 42)
+        self.assertIn('energy_game_function_seconds_count{function="slow_helper"} 1', metrics.render())
+
+    def test_aggregates_across_processes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        context = multiprocessing.get_context('fork')
+        for _ in range(2):
+            child = context.Process(target=record_in_child, args=(directory,))
+            child.start()
+            child.join()
+        metrics = Metrics(directory)
+        metrics.inc('errors_total', (('route', '/guess'),))
+        text = metrics.render()
+        self.assertIn('energy_game_errors_total{route="/guess"} 5', text)
+        self.assertIn('energy_game_request_seconds_count{route="/guess"} 2', text)
+
+    def test_exited_workers_are_folded_into_totals(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        context = multiprocessing.get_context('fork')
+        for _ in range(2):
+            child = context.Process(target=record_in_child, args=(directory,))
+            child.start()
+            child.join()
+            mark_process_dead(directory, child.pid)
+        self.assertEqual(os.listdir(directory), [TOTALS_FILE])
+        text = Metrics(directory).render()
+        self.assertIn('energy_game_errors_total{route="/guess"} 4', text)
+        self.assertIn('energy_game_request_seconds_count{route="/guess"} 2', text)
+        clear_directory(directory)
+        self.assertEqual(os.listdir(directory), [])
+
+
+class TestSamplingProfiler(unittest.TestCase):
+
+    def test_collects_stacks_of_other_threads(self):
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        deadline = time.time() + 0.05
+        while time.time() < deadline:
+            sum(range(1000))
+        profiler.stop()
+        self.assertIn("test_collects_stacks_of_other_threads", profiler.collapsed())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+import pandas as pd
+
+from src.game.geo import CORRECT, GeoEngine
+from src.game.registry import CountryRegistry, is_aggregate, normalize
+
+COORDINATES = {
+    "Cote d'Ivoire": (7.5, -5.5),
+    "South Africa": (-28.8, 24.9),
+    "Central African Republic": (7.0, 20.0),
+    "Saint Lucia": (13.9, -60.9),
+    "United States": (39.8, -98.6),
+    "Micronesia (country)": (6.9, 158.2),
+    "Africa (EI)": (40.2, -83.0),
+}
+
+
+class TestCountryRegistry(unittest.TestCase):
+
+    def setUp(self):
+        names = list(COORDINATES) + ["World", "Europe (Ember)", "High-income countries", "Atlantis"]
+        df = pd.DataFrame({
+            'country': pd.Categorical(names + ["South Africa"]),
+            'year': [2020] * len(names) + [2019],
+        })
+        self.registry = CountryRegistry.from_frame(df, COORDINATES, 2020)
+
+    def test_aggregates_match_exactly(self):
+        self.assertTrue(is_aggregate("World"))
+        self.assertTrue(is_aggregate("Asia Pacific (EI)"))
+        self.assertFalse(is_aggregate("South Africa"))
+        self.assertFalse(is_aggregate("Central African Republic"))
+
+    def test_playable_countries(self):
+        # Aggregates and countries without coordinates are left out; ids follow sorted names
+        self.assertEqual(self.registry.names, (
+            "Central African Republic", "Cote d'Ivoire", "Micronesia (country)",
+            "Saint Lucia", "South Africa", "United States"))
+        self.assertEqual(self.registry.ids["South Africa"], 4)
+        self.assertEqual(list(self.registry.rows[4]), [1, 11])
+
+    def test_resolve_aliases(self):
+        registry = self.registry
+        united_states = registry.ids["United States"]
+        for alias in ("United States", "united states", "  USA ", "U.S.A.", "america"):
+            self.assertEqual(registry.resolve(alias), united_states, alias)
+        self.assertEqual(registry.resolve("Côte d’Ivoire"), registry.ids["Cote d'Ivoire"])
+        self.assertEqual(registry.resolve("Ivory Coast"), registry.ids["Cote d'Ivoire"])
+        self.assertEqual(registry.resolve("st. lucia"), registry.ids["Saint Lucia"])
+        self.assertEqual(registry.resolve("Micronesia"), registry.ids["Micronesia (country)"])
+        self.assertIsNone(registry.resolve("Atlantis"))
+        self.assertIsNone(registry.resolve("World"))
+        self.assertIsNone(registry.resolve(None))
+        self.assertNotIn("Africa (EI)", registry)
+
+    def test_normalize(self):
+        self.assertEqual(normalize("  São Tomé & Príncipe "), "sao tome and principe")
+
+    def test_geo_engine_aligned_with_ids(self):
+        geo = GeoEngine(COORDINATES, names=self.registry.names)
+        target = self.registry.resolve("South Africa")
+        self.assertEqual(geo.hint(target, target)[0], CORRECT)
+        self.assertEqual(geo.index_of("United States"), self.registry.ids["United States"])
+        with self.assertRaises(ValueError):
+            GeoEngine(COORDINATES, names=["Atlantis"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import gzip
+import json
+import unittest
+
+from flask import Flask, jsonify, request
+
+from src.api.response_cache import ResponseCache, encode_json, make_response
+
+COUNTRIES = {"count": 200, "countries": [f"Country {i}" for i in range(200)]}
+
+
+class TestEncodeJson(unittest.TestCase):
+
+    def test_matches_jsonify(self):
+        app = Flask(__name__)
+        with app.app_context():
+            expected = jsonify(COUNTRIES).get_data()
+        self.assertEqual(encode_json(COUNTRIES, 'no-cache').body, expected)
+
+    def test_gzip_only_for_large_bodies(self):
+        encoded = encode_json(COUNTRIES, 'no-cache')
+        self.assertEqual(gzip.decompress(encoded.gzipped), encoded.body)
+        self.assertIsNone(encode_json(["Chile"], 'no-cache').gzipped)
+
+    def test_etag_is_stable(self):
+        self.assertEqual(encode_json(COUNTRIES, 'a'), encode_json(dict(COUNTRIES), 'a'))
+
+
+class TestMakeResponse(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.cache = ResponseCache(max_entries=2)
+        self.builds = 0
+
+        def build():
+            self.builds += 1
+            return COUNTRIES
+
+        @self.app.route('/countries')
+        def countries():
+            encoded = self.cache.get('countries', build, 'public, max-age=60')
+            return make_response(encoded, request, self.app.response_class)
+
+        self.client = self.app.test_client()
+
+    def test_plain_and_gzip_variants(self):
+        plain = self.client.get('/countries')
+        self.assertEqual(json.loads(plain.data), COUNTRIES)
+        self.assertEqual(plain.headers['Cache-Control'], 'public, max-age=60')
+        self.assertEqual(plain.headers['Vary'], 'Accept-Encoding')
+        zipped = self.client.get('/countries', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(zipped.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(zipped.data), plain.data)
+        self.assertNotEqual(zipped.headers['ETag'], plain.headers['ETag'])
+        self.assertEqual(self.builds, 1)
+
+    def test_conditional_request_gets_304(self):
+        etag = self.client.get('/countries').headers['ETag']
+        response = self.client.get('/countries', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        self.assertEqual(response.headers['ETag'], etag)
+        stale = self.client.get('/countries', headers={'If-None-Match': '"stale"'})
+        self.assertEqual(stale.status_code, 200)
+
+    def test_lru_eviction(self):
+        for key in ('a', 'b', 'c'):
+            self.cache.get(key, lambda: [key], 'no-cache')
+        self.assertEqual(len(self.cache), 2)
+        self.cache.get('a', lambda: ['a'], 'no-cache')
+        self.assertEqual(self.cache.stats, {'hits': 0, 'misses': 4})
+
+
+if __name__ == '__main__':
+    unittest.main()
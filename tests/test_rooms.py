@@ -0,0 +1,161 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+
+from src.game.rooms import EVENT_LOG_SIZE, MAX_LISTENERS, RoomError, RoomManager
+
+
+def score(guess_id, target_id):
+    return ("Correct", 0.0) if guess_id == target_id else ("N", 100.0 * abs(guess_id - target_id))
+
+
+class TestRoomManager(unittest.TestCase):
+
+    def setUp(self):
+        self.rooms = RoomManager(score, "Correct", ttl=60)
+
+    def start_room(self):
+        room_id, host = self.rooms.create("room", "ann")
+        guest = self.rooms.join(room_id, "bob")
+        self.rooms.start(room_id, host, target=5, public_data={"year": 2020})
+        return room_id, host, guest
+
+    def test_round_trip(self):
+        room_id, host, guest = self.start_room()
+        self.assertEqual(self.rooms.info(room_id)['state'], 'in_progress')
+        self.assertEqual(self.rooms.guess(room_id, guest, 3, "Chile"), ("N", 200.0, False))
+        with self.assertRaises(RoomError):
+            self.rooms.guess(room_id, guest, 3, "Chile")
+        with self.assertRaises(RoomError):
+            self.rooms.join(room_id, "carl")
+        self.assertEqual(self.rooms.guess(room_id, host, 5, "Peru")[2], True)
+        info = self.rooms.info(room_id)
+        self.assertEqual((info['state'], info['winner'], info['progress']), ('finished', 'ann', {'ann': 1, 'bob': 1}))
+        with self.assertRaises(RoomError) as cm:
+            self.rooms.guess(room_id, "stranger", 1, "Fiji")
+        self.assertEqual(cm.exception.status, 403)
+
+    def test_subscribers_share_encoded_events(self):
+        room_id, host, guest = self.start_room()
+        streams = [self.rooms.subscribe(room_id, keepalive=0.05) for _ in range(3)]
+        first = [next(stream) for stream in streams]
+        self.assertEqual(len(set(first)), 1)
+        self.assertEqual(first[0].count(b"event: "), 3)  # two joins and the start
+
+        received = []
+        reader = threading.Thread(target=lambda: received.append(next(streams[0])))
+        reader.start()
+        time.sleep(0.01)
+        self.rooms.guess(room_id, guest, 4, "Chile")
+        reader.join(timeout=1)
+        self.assertIn(b'event: guess', received[0])
+        self.assertTrue(received[0].startswith(b"id: 4\n"))
+
+    def test_resume_after_last_event_id(self):
+        room_id, host, guest = self.start_room()
+        frames = next(self.rooms.subscribe(room_id, last_seq=2))
+        self.assertTrue(frames.startswith(b"id: 3\nevent: started"))
+        self.assertEqual(next(self.rooms.subscribe(room_id, last_seq=3, keepalive=0.01)), b": keepalive\n\n")
+
+    def test_lost_events_become_one_resync(self):
+        room_id, host, guest = self.start_room()
+        for guess in range(EVENT_LOG_SIZE):
+            self.rooms.guess(room_id, guest, 1000 + guess, "Chile")
+        frames = next(self.rooms.subscribe(room_id, last_seq=2))
+        self.assertEqual(frames.count(b"event: "), 1)
+        self.assertTrue(frames.startswith(b"id: %d\nevent: resync\n" % (3 + EVENT_LOG_SIZE)))
+        state = json.loads(frames.split(b"data: ", 1)[1])
+        self.assertEqual((state['year'], state['progress']['bob']), (2020, EVENT_LOG_SIZE))
+        # Still in the ring: only the missing events
+        self.assertEqual(next(self.rooms.subscribe(room_id, last_seq=EVENT_LOG_SIZE + 1)).count(b"event: guess"), 2)
+
+    def test_listeners_wait_on_the_event_loop(self):
+        room_id, host, guest = self.start_room()
+
+        async def scenario():
+            streams = [self.rooms.listen(room_id, last_seq=3, keepalive=0.05) for _ in range(3)]
+            # Published from another thread, like a guess request in the app's thread pool
+            threading.Timer(0.02, self.rooms.guess, (room_id, guest, 4, "Chile")).start()
+            received = [await stream.__anext__() for stream in streams]
+            keepalive = await streams[0].__anext__()
+            for stream in streams:
+                await stream.aclose()
+            return received, keepalive
+
+        received, keepalive = asyncio.run(scenario())
+        self.assertEqual(len(set(received)), 1)
+        self.assertTrue(received[0].startswith(b"id: 4\nevent: guess"))
+        self.assertEqual(keepalive, b": keepalive\n\n")
+        self.assertEqual(self.rooms.listeners(room_id), 0)
+
+    def test_slow_listener_resyncs_and_closed_room_ends_the_stream(self):
+        room_id, host, guest = self.start_room()
+
+        async def scenario():
+            stream = self.rooms.listen(room_id, last_seq=3)
+            for guess in range(EVENT_LOG_SIZE + 10):
+                self.rooms.guess(room_id, guest, 1000 + guess, "Chile")
+            await asyncio.sleep(0)  # deliver the queued events; the queue overflows
+            frames = await stream.__anext__()
+            self.rooms.evict_idle(now=time.monotonic() + 61)
+            return frames, [chunk async for chunk in stream]
+
+        frames, rest = asyncio.run(scenario())
+        self.assertIn(b"event: resync", frames)
+        self.assertEqual(frames.count(b"event: "), 1)
+        self.assertEqual(len(rest), 1)
+        self.assertIn(b"event: closed", rest[0])
+
+    def test_listeners_per_room_are_capped(self):
+        room_id, host, guest = self.start_room()
+
+        async def scenario():
+            streams = [self.rooms.listen(room_id) for _ in range(MAX_LISTENERS)]
+            for stream in streams:
+                await stream.__anext__()  # the backlog
+            with self.assertRaises(RoomError) as cm:
+                self.rooms.listen(room_id)
+            self.assertEqual(cm.exception.status, 429)
+            await streams[0].aclose()
+            self.rooms.listen(room_id)
+            for stream in streams[1:]:
+                await stream.aclose()
+
+        asyncio.run(scenario())
+
+    def test_idle_rooms_are_evicted(self):
+        room_id, host, guest = self.start_room()
+        stream = self.rooms.subscribe(room_id, last_seq=3, keepalive=5)
+        self.assertEqual(self.rooms.evict_idle(now=time.monotonic() + 61), 1)
+        self.assertIn(b"event: closed", next(stream))
+        self.assertEqual(list(stream), [])
+        self.assertEqual(len(self.rooms), 0)
+        with self.assertRaises(RoomError):
+            self.rooms.info(room_id)
+
+    def test_many_rooms_from_many_threads(self):
+        def play(n):
+            for _ in range(n):
+                room_id, host, guest = self.start_room()
+                self.rooms.guess(room_id, guest, 5, "Peru")
+
+        threads = [threading.Thread(target=play, args=(250,)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(self.rooms), 2000)
+
+    def test_max_rooms(self):
+        rooms = RoomManager(score, "Correct", max_rooms=2)
+        rooms.create("a", "ann")
+        rooms.create("b", "bob")
+        with self.assertRaises(RoomError) as cm:
+            rooms.create("c", "carl")
+        self.assertEqual(cm.exception.status, 503)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import random
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.game.round_pool import ENERGY_COLUMNS, RoundPool, parse_year_range
+
+
+def make_frame():
+    rows = []
+    for country in ["Norway", "Chile", "World"]:
+        for year in (2019, 2020):
+            row = {'country': country, 'year': year}
+            row.update({col: 10.0 for col in ENERGY_COLUMNS})
+            rows.append(row)
+    df = pd.DataFrame(rows)
+    df.loc[(df['country'] == 'Chile') & (df['year'] == 2019), 'electricity_generation'] = np.nan
+    df.loc[(df['country'] == 'Norway') & (df['year'] == 2020), 'coal_electricity'] = np.nan
+    df.loc[(df['country'] == 'Norway') & (df['year'] == 2020), 'other_renewable_electricity'] = 25.0
+    return df
+
+
+class TestRoundPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = RoundPool.from_frame(make_frame(), allowed=["Norway", "Chile"])
+
+    def test_eligible_rows(self):
+        self.assertEqual(len(self.pool), 3)
+        self.assertEqual(self.pool.available_years(), [2019, 2020])
+        self.assertIsNone(self.pool.find("Chile", 2019))
+        self.assertIsNone(self.pool.find("World", 2020))
+
+    def test_payload_matches_cleaning_rules(self):
+        payload = self.pool.find("Norway", 2020).payload
+        self.assertEqual(payload['electricity_generation'], 10.0)
+        self.assertEqual(payload['electricity_shares']['Coal'], 0.0)
+        self.assertEqual(payload['electricity_shares']['Geothermal'], 15.0)
+        self.assertNotIn('country', payload)
+        self.assertNotIn('Norway', self.pool.find("Norway", 2020).energy_json)
+
+    def test_rebuild_reuses_unchanged_rows(self):
+        df = make_frame()
+        df.loc[(df['country'] == 'Chile') & (df['year'] == 2020), 'coal_electricity'] = 40.0
+        df.loc[(df['country'] == 'Chile') & (df['year'] == 2019), 'electricity_generation'] = 5.0
+        pool = RoundPool.from_frame(df, allowed=["Norway", "Chile"], previous=self.pool)
+        self.assertEqual(pool.reused, 2)
+        self.assertIs(pool.find("Norway", 2020).payload, self.pool.find("Norway", 2020).payload)
+        self.assertEqual(pool.find("Chile", 2020).payload['electricity_shares']['Coal'], 40.0)
+        fresh = RoundPool.from_frame(df, allowed=["Norway", "Chile"])
+        self.assertEqual(pool.energy_json, fresh.energy_json)
+
+    def test_pick_respects_year_range(self):
+        rng = random.Random(1)
+        for _ in range(20):
+            self.assertEqual(self.pool.pick(2019, 2019, rng=rng).country, "Norway")
+        years = {self.pool.pick(2019, 2020, rng=rng).year for _ in range(50)}
+        self.assertEqual(years, {2019, 2020})
+        with self.assertRaises(LookupError):
+            self.pool.pick(1990, 1995)
+
+    def test_upcoming_picks_are_served_in_order(self):
+        upcoming = self.pool.upcoming(2019, 2020, n=3, rng=random.Random(2))
+        self.assertEqual(len(upcoming), 3)
+        self.assertEqual([self.pool.pick(2019, 2020).country for _ in range(3)], upcoming)
+
+    def test_parse_year_range(self):
+        self.assertEqual(parse_year_range("2015"), (2015, 2015))
+        self.assertEqual(parse_year_range("2000-2010"), (2000, 2010))
+        for bad in ("20x0", "2010-2000", "1-2-3", ""):
+            with self.assertRaises(ValueError):
+                parse_year_range(bad)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from src.api.sessions import GameSession, MemorySessionStore, SQLiteSessionStore, create_session_store
+
+
+class StoreContract:
+    """Behaviour every session backend must share."""
+
+    def make_store(self, ttl=60, max_sessions=100):
+        raise NotImplementedError
+
+    def test_round_trip_and_bitmap(self):
+        store = self.make_store()
+        game = GameSession(7, version='a1b2c3')
+        game.add_guess(3)
+        game.add_guess(130)
+        store.put("abc", game)
+        loaded = store.get("abc")
+        self.assertEqual(loaded.target, 7)
+        self.assertTrue(loaded.has_guessed(130))
+        self.assertFalse(loaded.has_guessed(4))
+        self.assertEqual(loaded.guessed_indices(), [3, 130])
+        self.assertEqual(loaded.guess_count, 2)
+        self.assertEqual(loaded.version, 'a1b2c3')
+
+    def test_missing_and_deleted(self):
+        store = self.make_store()
+        self.assertIsNone(store.get("nope"))
+        store.put("abc", GameSession(1))
+        store.delete("abc")
+        self.assertIsNone(store.get("abc"))
+
+    def test_ttl_expiry(self):
+        store = self.make_store(ttl=0.05)
+        store.put("abc", GameSession(1))
+        time.sleep(0.1)
+        self.assertIsNone(store.get("abc"))
+
+
+class TestMemorySessionStore(StoreContract, unittest.TestCase):
+
+    def make_store(self, ttl=60, max_sessions=100):
+        return MemorySessionStore(ttl=ttl, max_sessions=max_sessions)
+
+    def test_memory_cap_evicts_least_recent(self):
+        store = self.make_store(max_sessions=2)
+        for sid in ("a", "b", "c"):
+            store.put(sid, GameSession(0))
+        self.assertEqual(len(store), 2)
+        self.assertIsNone(store.get("a"))
+
+
+class TestSQLiteSessionStore(StoreContract, unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def make_store(self, ttl=60, max_sessions=100):
+        return create_session_store('sqlite', os.path.join(self.tmp, 'sessions.db'), ttl=ttl, max_sessions=max_sessions)
+
+    def test_shared_between_instances(self):
+        path = os.path.join(self.tmp, 'sessions.db')
+        SQLiteSessionStore(path).put("abc", GameSession(5))
+        self.assertEqual(SQLiteSessionStore(path).get("abc").target, 5)
+
+    def test_adds_version_column_to_an_older_file(self):
+        path = os.path.join(self.tmp, 'sessions.db')
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE sessions (sid TEXT PRIMARY KEY, target INTEGER NOT NULL, "
+                     "guessed BLOB NOT NULL, guess_count INTEGER NOT NULL, expires REAL NOT NULL)")
+        conn.execute("INSERT INTO sessions VALUES ('old', 4, x'', 0, ?)", (time.time() + 60,))
+        conn.commit()
+        conn.close()
+        store = SQLiteSessionStore(path)
+        self.assertEqual(store.get("old").version, '')
+        store.put("new", GameSession(2, version='v2'))
+        self.assertEqual(store.get("new").version, 'v2')
+
+    def test_purge_enforces_cap(self):
+        store = self.make_store(max_sessions=2)
+        for sid in ("a", "b", "c"):
+            store.put(sid, GameSession(0))
+            time.sleep(0.01)
+        store.purge()
+        self.assertEqual(len(store), 2)
+        self.assertIsNone(store.get("a"))
+
+
+if __name__ == '__main__':
+    unittest.main()
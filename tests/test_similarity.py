@@ -0,0 +1,62 @@
+import random
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.game.round_pool import ENERGY_COLUMNS
+from src.game.similarity import MixSimilarity
+
+
+def make_shares():
+    # Columns: Coal, Gas, Hydro; rows 0-2 are coal-heavy near-duplicates, 3-4 hydro, 5 has no data
+    return np.array([
+        [90.0, 10.0, 0.0],
+        [45.0, 5.0, 0.0],
+        [88.0, 12.0, 0.0],
+        [0.0, 5.0, 95.0],
+        [0.0, 40.0, 60.0],
+        [0.0, 0.0, 0.0],
+    ])
+
+
+class TestMixSimilarity(unittest.TestCase):
+
+    def setUp(self):
+        self.similarity = MixSimilarity(make_shares(), near_duplicate=0.99, top_k=3)
+
+    def test_matrix_matches_cosine(self):
+        shares = make_shares()[:5]
+        unit = shares / np.linalg.norm(shares, axis=1)[:, None]
+        expected = unit @ unit.T
+        np.fill_diagonal(expected, -1.0)
+        np.testing.assert_allclose(self.similarity.similarity[:5, :5], expected, atol=1e-6)
+        self.assertAlmostEqual(self.similarity.shares[1].sum(), 1.0)
+        self.assertTrue((self.similarity.similarity[5] == -1).all())
+
+    def test_most_similar_skips_self_and_missing(self):
+        self.assertEqual([i for i, _ in self.similarity.most_similar(0, 2)], [1, 2])
+        self.assertEqual([i for i, _ in self.similarity.most_similar(3, 5)], [4, 2, 0])
+        self.assertEqual(self.similarity.most_similar(5, 3), [])
+
+    def test_tiers_follow_near_duplicates(self):
+        self.assertEqual(self.similarity.near_duplicates.tolist(), [2, 2, 2, 0, 0, 0])
+        self.assertEqual(sorted(self.similarity.tiers['easy']), [3, 4])
+        self.assertNotIn(5, self.similarity.difficulty)
+        self.assertEqual(set(self.similarity.tiers['medium'] + self.similarity.tiers['hard']), {0, 1, 2})
+        self.assertIn(self.similarity.pick('hard', random.Random(1)), self.similarity.tiers['hard'])
+        with self.assertRaises(ValueError):
+            self.similarity.pick('extreme')
+
+    def test_from_frame_uses_round_rules(self):
+        rows = []
+        for country, generation in (("Norway", 100.0), ("Chile", 0.0), ("World", 100.0)):
+            row = {column: 1.0 for column in ENERGY_COLUMNS}
+            row.update(country=country, year=2020, electricity_generation=generation)
+            rows.append(row)
+        similarity = MixSimilarity.from_frame(pd.DataFrame(rows), ["Chile", "Norway"], 2020)
+        self.assertEqual(similarity.valid.tolist(), [False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from src.utils.shared_data import load_shared_data, publish_shared_data
+from src.utils import snapshot
+from src.utils.snapshot import build_snapshot, load_energy_data
+
+COLUMNS = ['electricity_generation', 'coal_electricity']
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.csv = os.path.join(self.tmp, 'energy.csv')
+        self.snapshot = os.path.join(self.tmp, 'energy.snapshot')
+        pd.DataFrame({
+            'country': ['Norway', 'Norway', 'Chile'],
+            'year': [2019, 2020, 2020],
+            'electricity_generation': [134.3, 154.21, np.nan],
+            'coal_electricity': [0.1, np.nan, 30.5],
+            'unused_column': [1, 2, 3],
+        }).to_csv(self.csv, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_falls_back_to_csv_without_snapshot(self):
+        frame, report = load_energy_data(self.csv, self.snapshot, COLUMNS)
+        self.assertEqual(report.source, 'csv')
+        self.assertNotIn('unused_column', frame.columns)
+        self.assertEqual(frame['coal_electricity'].dtype, np.float32)
+
+    def test_snapshot_round_trip(self):
+        build_snapshot(self.csv, self.snapshot, COLUMNS)
+        frame, report = load_energy_data(self.csv, self.snapshot, COLUMNS)
+        self.assertEqual(report.source, 'snapshot')
+        expected, _ = load_energy_data(self.csv, os.path.join(self.tmp, 'missing'), COLUMNS)
+        pd.testing.assert_frame_equal(frame, expected)
+
+    def test_snapshot_invalidated_by_csv_change(self):
+        build_snapshot(self.csv, self.snapshot, COLUMNS)
+        with open(self.csv, 'a') as f:
+            f.write("Peru,2020,55.0,1.0,4\n")
+        frame, report = load_energy_data(self.csv, self.snapshot, COLUMNS)
+        self.assertEqual(report.source, 'csv')
+        self.assertEqual(len(frame), 4)
+
+    def test_unchanged_csv_is_not_hashed(self):
+        build_snapshot(self.csv, self.snapshot, COLUMNS)
+        with mock.patch.object(snapshot, 'file_sha256', wraps=snapshot.file_sha256) as file_sha256:
+            self.assertEqual(load_energy_data(self.csv, self.snapshot, COLUMNS)[1].source, 'snapshot')
+            file_sha256.assert_not_called()
+            # Touched but not changed (e.g. a fresh checkout): the hash still matches
+            os.utime(self.csv, ns=(0, 10**9))
+            self.assertEqual(load_energy_data(self.csv, self.snapshot, COLUMNS)[1].source, 'snapshot')
+            file_sha256.assert_called_once_with(self.csv)
+
+
+class TestSharedData(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.csv = os.path.join(self.tmp, 'energy.csv')
+        self.coordinates_csv = os.path.join(self.tmp, 'coordinates.csv')
+        pd.DataFrame({
+            'country': ['Norway', 'Norway', 'Chile'],
+            'year': [2019, 2020, 2020],
+            'electricity_generation': [134.3, 154.21, np.nan],
+            'coal_electricity': [0.1, np.nan, 30.5],
+        }).to_csv(self.csv, index=False)
+        with open(self.coordinates_csv, 'w') as f:
+            f.write("country,latitude,longitude\nChile,-31.76,-71.31\nNorway,64.57,11.52\nWorld,,\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_publish_and_map(self):
+        directory = publish_shared_data(self.csv, os.path.join(self.tmp, 'missing'), self.coordinates_csv,
+                                        COLUMNS, root=self.tmp)
+        frame, coordinates, report = load_shared_data(directory)
+        self.assertEqual(report.source, 'shared')
+        expected, _ = load_energy_data(self.csv, os.path.join(self.tmp, 'missing'), COLUMNS)
+        pd.testing.assert_frame_equal(frame, expected)
+        self.assertEqual(coordinates, {'Chile': (-31.76, -71.31), 'Norway': (64.57, 11.52)})
+        # Workers only get read-only views of the published arrays
+        values = frame['coal_electricity'].to_numpy()
+        self.assertFalse(values.flags.writeable)
+        self.assertEqual(np.load(os.path.join(directory, 'country.npy')).dtype, np.int16)
+
+
+if __name__ == '__main__':
+    unittest.main()
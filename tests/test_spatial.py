@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+
+from src.game.geo import distance_matrix
+from src.game.spatial import BallTree, SpatialIndex
+
+
+class TestSpatialIndex(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.lat = np.degrees(np.arcsin(rng.uniform(-1, 1, 300)))
+        self.lon = rng.uniform(-180, 180, 300)
+        self.index = SpatialIndex(self.lat, self.lon)
+        self.km = distance_matrix(self.lat, self.lon)
+
+    def test_nearest_matches_brute_force(self):
+        for target in (0, 17, 150, 299):
+            expected = [int(i) for i in np.argsort(self.km[target], kind='stable') if i != target][:5]
+            found = self.index.nearest(target, 5)
+            self.assertEqual([i for i, _ in found], expected)
+            for i, km in found:
+                self.assertAlmostEqual(km, self.km[target, i], delta=1e-6 * km + 1e-6)
+
+    def test_within_matches_brute_force(self):
+        for radius in (500, 2500, 20000):
+            expected = [i for i in range(300) if i != 42 and self.km[42, i] < radius]
+            self.assertEqual(self.index.within(42, radius), expected)
+
+    def test_rank_and_percentile(self):
+        target = 10
+        order = [int(i) for i in np.argsort(self.km[target], kind='stable') if i != target]
+        self.assertEqual(self.index.rank(order[0], target), 1)
+        self.assertEqual(self.index.rank(order[9], target), 10)
+        self.assertEqual(self.index.proximity_percentile(order[0], target), 100.0)
+        self.assertEqual(self.index.proximity_percentile(order[-1], target), 0.0)
+
+    def test_empty_tree(self):
+        tree = BallTree(np.zeros((0, 3)))
+        self.assertEqual(tree.count_radius([1.0, 0.0, 0.0], 1.0), 0)
+        self.assertEqual(len(tree.query([1.0, 0.0, 0.0], 3)[1]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
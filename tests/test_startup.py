@@ -0,0 +1,50 @@
+import os
+import unittest
+
+from benchmarks.common import ROOT_DIR
+from benchmarks.startup import ImportTime, cold_start, package_totals, parse_importtime, subtree
+from src.utils.snapshot import read_snapshot_meta
+
+# Seconds from launching a fresh process to its first successful /start_game
+COLD_START_BUDGET = float(os.environ.get('COLD_START_BUDGET', 5))
+ENERGY_CSV = os.path.join(ROOT_DIR, 'data', 'owid-energy-data.csv')
+ENERGY_SNAPSHOT = os.path.join(ROOT_DIR, 'data', 'owid-energy-data.snapshot')
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 | sitecustomize
+import time:        50 |         50 |     numpy._core
+import time:       300 |        350 |   numpy
+import time:        20 |         20 |   flask.json
+import time:       400 |        770 | app
+"""
+
+
+class TestImportProfile(unittest.TestCase):
+
+    def test_parse_and_totals(self):
+        rows = parse_importtime(IMPORTTIME)
+        self.assertEqual(rows[1], ImportTime('numpy._core', 50, 50, 2))
+        app = subtree(rows, 'app')
+        self.assertEqual([row.module for row in app], ['numpy._core', 'numpy', 'flask.json', 'app'])
+        self.assertEqual(package_totals(app), {'app': 400, 'numpy': 350, 'flask': 20})
+
+
+# The app starts from the snapshot when the CSV is absent, so either one is enough
+@unittest.skipUnless(os.path.exists(ENERGY_CSV) or read_snapshot_meta(ENERGY_SNAPSHOT) is not None,
+                     "needs data/owid-energy-data.csv or its snapshot")
+class TestColdStart(unittest.TestCase):
+
+    def test_first_game_within_budget(self):
+        for warmup in ('sync', 'background'):
+            with self.subTest(warmup=warmup):
+                result = cold_start({'WARMUP': warmup})
+                self.assertLess(result['wall_s'], COLD_START_BUDGET,
+                                f"cold start to first /start_game took {result['wall_s']:.2f} s")
+                self.assertNotIn('geopy', result['modules'])
+                self.assertNotIn('utils.geocoding', result['modules'])
+                self.assertNotIn('openai', result['modules'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.game.round_pool import ENERGY_COLUMNS
+from src.game.timeseries import TimeSeriesIndex
+
+
+def make_frame():
+    rows = []
+    for country, years in (("Norway", range(2000, 2011)), ("Chile", range(2005, 2011)), ("World", range(2000, 2011))):
+        for year in years:
+            row = {column: 1.0 for column in ENERGY_COLUMNS}
+            row.update(country=country, year=year, electricity_generation=float(year - 1999))
+            rows.append(row)
+    frame = pd.DataFrame(rows).sample(frac=1, random_state=3)  # shuffled, like nothing is sorted upstream
+    frame.loc[(frame['country'] == "Chile") & (frame['year'] == 2007), 'electricity_generation'] = np.nan
+    return frame
+
+
+class TestTimeSeriesIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = TimeSeriesIndex(make_frame(), ["Chile", "Norway"])
+
+    def test_blocks_are_sorted_views(self):
+        self.assertEqual(self.index.offsets.tolist(), [0, 6, 17])
+        years, values = self.index.series(1, 2003, 2005)
+        self.assertEqual(years.tolist(), [2003, 2004, 2005])
+        self.assertEqual(values[:, 0].tolist(), [4.0, 5.0, 6.0])
+        self.assertTrue(np.shares_memory(values, self.index.values))
+
+    def test_coverage_and_eligibility(self):
+        coverage = self.index.coverage(2000, 2009)
+        self.assertAlmostEqual(coverage[0], 0.4)  # Chile: 2005-2009 without 2007
+        self.assertAlmostEqual(coverage[1], 1.0)
+        self.assertEqual(self.index.eligible(2000, 2009, 0.8), (1,))
+        self.assertEqual(self.index.eligible(2005, 2010, 0.8), (0, 1))
+        with self.assertRaises(LookupError):
+            self.index.pick(1900, 1910)
+        with self.assertRaises(ValueError):
+            self.index.pick(1900, 2010)
+
+    def test_payload_marks_missing_years(self):
+        payload = self.index.payload(0, 2006, 2008)
+        self.assertEqual(payload['years'], [2006, 2007, 2008])
+        self.assertEqual(payload['electricity_generation'], [7.0, None, 9.0])
+        self.assertEqual(payload['electricity_shares']['Coal'], [1.0, None, 1.0])
+
+    def test_payload_fills_years_without_rows(self):
+        payload = self.index.payload(0, 2003, 2006)
+        self.assertEqual(payload['years'], [2003, 2004, 2005, 2006])
+        self.assertEqual(payload['electricity_generation'], [None, None, 6.0, 7.0])
+        self.assertEqual(payload['electricity_shares']['Coal'], [None, None, 1.0, 1.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
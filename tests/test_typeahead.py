@@ -0,0 +1,35 @@
+import unittest
+
+from src.utils.typeahead import SuggestionIndex
+
+NAMES = ["Germany", "Georgia", "Ghana", "Greece", "United States", "United Kingdom", "Uganda", "Niger", "Nigeria"]
+
+
+class TestSuggestionIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SuggestionIndex(NAMES)
+
+    def test_prefix_hits_are_alphabetical_and_case_insensitive(self):
+        self.assertEqual(self.index.suggest("ge"), ("Georgia", "Germany"))
+        self.assertEqual(self.index.suggest("GE"), ("Georgia", "Germany"))
+        self.assertEqual(self.index.suggest("united", 1), ("United Kingdom",))
+        self.assertEqual(self.index.suggest("nige", 5), ("Niger", "Nigeria"))
+
+    def test_fuzzy_fallback_for_typos(self):
+        self.assertEqual(self.index.suggest("germny", 1), ("Germany",))
+        self.assertEqual(self.index.suggest("untied states", 1), ("United States",))
+        self.assertEqual(self.index.suggest("germny", 3, False), ())
+
+    def test_no_match(self):
+        self.assertEqual(self.index.suggest(""), ())
+        self.assertEqual(self.index.suggest("zzzzzz"), ())
+
+    def test_hot_queries_are_cached(self):
+        self.index.suggest("gh")
+        self.index.suggest("gh")
+        self.assertGreaterEqual(self.index.suggest.cache_info().hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()